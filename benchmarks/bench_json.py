@@ -0,0 +1,60 @@
+"""
+Micro-benchmark: JSON encode/decode cost per request, stdlib json (before)
+vs. bot.serialization (after, orjson when installed).
+
+Usage:
+    python benchmarks/bench_json.py
+"""
+import json
+import os
+import sys
+import timeit
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from bot import serialization
+
+# Payloads shaped like what the handlers actually move around
+PAYLOADS = {
+    "profile_cache": {"social_id": "BraveCobaltMango", "points": 1250},
+    "events_cache": [
+        {"id": i, "title": f"Campaign #{i} — The God of All Flesh", "score": i * 7 % 100}
+        for i in range(50)
+    ],
+    "event_links": {
+        "instagram": "https://instagram.com/p/abc123",
+        "x": "https://x.com/nelius/status/1234567890",
+        "tiktok": "https://tiktok.com/@nelius/video/987654321",
+        "bsky": "https://bsky.app/profile/nelius/post/xyz",
+    },
+    "user_handles": {"x": "@nelius", "instagram": "@nelius.dao", "tiktok": "@neliusdao"},
+}
+
+NUMBER = 20_000
+
+
+def bench(dumps, loads):
+    results = {}
+    for name, payload in PAYLOADS.items():
+        encoded = dumps(payload)
+        encode = timeit.timeit(lambda: dumps(payload), number=NUMBER) / NUMBER
+        decode = timeit.timeit(lambda: loads(encoded), number=NUMBER) / NUMBER
+        results[name] = (encode, decode)
+    return results
+
+
+def main():
+    before = bench(json.dumps, json.loads)
+    after = bench(serialization.dumps, serialization.loads)
+
+    print(f"Serializer in use: {serialization.SERIALIZER}\n")
+    print(f"{'payload':<16}{'encode before':>15}{'encode after':>15}{'decode before':>15}{'decode after':>15}")
+    for name in PAYLOADS:
+        (eb, db), (ea, da) = before[name], after[name]
+        print(f"{name:<16}{eb * 1e6:>13.2f}µs{ea * 1e6:>13.2f}µs{db * 1e6:>13.2f}µs{da * 1e6:>13.2f}µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+"""
+Synthetic load test: replays realistic Telegram updates against the webhook.
+
+Two modes:
+
+  In-process (default): builds the real Application with every Bot API call
+  stubbed, serves it on a local port and POSTs updates to it. Postgres and
+  Redis come from DATABASE_URL / REDIS_URL, so point them at local instances.
+
+      python benchmarks/loadtest.py --rate 50 --duration 30
+
+  Add --fake to swap Redis and Postgres for the in-memory fakes in
+  bot/fakes.py (seeded with --users members and --events campaigns), so
+  only the bot's own code is measured:
+
+      python benchmarks/loadtest.py --fake --rate 200 --duration 10
+
+  Remote: POST to an already running bot's webhook (only webhook ingest is
+  measured, the bot's own /stats shows processing latency).
+
+      python benchmarks/loadtest.py --target http://localhost:10000/<token>
+
+Reports sustained updates/s, latency percentiles and error rates.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import aiohttp
+from telegram.request import BaseRequest
+
+from bot.serialization import dumps
+from bot.variables import menu_buttons
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Nelius", "username": "nelius_load_bot"}
+
+
+# ------------------------
+# Update payloads
+# ------------------------
+
+class UpdateFactory:
+    """Builds Update JSON the way Telegram sends it."""
+
+    def __init__(self):
+        self._update_ids = itertools.count(random.randint(10**8, 10**9))
+        self._message_ids = itertools.count(1)
+
+    @staticmethod
+    def _user(user_id):
+        return {"id": user_id, "is_bot": False, "first_name": f"Load{user_id}"}
+
+    def message(self, user_id, text):
+        message = {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": self._user(user_id),
+            "text": text,
+        }
+        if text.startswith("/"):
+            # CommandHandler only matches messages that carry a bot_command entity
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        return {"update_id": next(self._update_ids), "message": message}
+
+    def callback(self, user_id, data):
+        return {
+            "update_id": next(self._update_ids),
+            "callback_query": {
+                "id": str(next(self._message_ids)),
+                "from": self._user(user_id),
+                "chat_instance": str(user_id),
+                "data": data,
+                "message": {
+                    "message_id": next(self._message_ids),
+                    "date": int(time.time()),
+                    "chat": {"id": user_id, "type": "private"},
+                    "from": BOT_USER,
+                    "text": "🎉 Nelius Events",
+                },
+            },
+        }
+
+
+def sessions(factory, user_ids, event_ids, onboarding_share):
+    """Endless stream of user sessions; each session is an ordered list of updates."""
+    new_users = itertools.count(random.randint(10**9, 2 * 10**9))
+    buttons = list(menu_buttons)
+
+    while True:
+        roll = random.random()
+        if roll < onboarding_share:
+            # A brand new member going through /start
+            user_id = next(new_users)
+            yield [
+                factory.message(user_id, "/start"),
+                factory.message(user_id, f"234810{random.randint(1000000, 9999999)}"),
+                factory.message(user_id, f"@load_x_{user_id}"),
+                factory.message(user_id, "Skip"),
+                factory.message(user_id, f"@load_tt_{user_id}"),
+            ]
+        elif roll < onboarding_share + (1 - onboarding_share) / 2:
+            # Menu taps (matched by menu_pattern)
+            user_id = random.choice(user_ids)
+            yield [factory.message(user_id, random.choice(buttons)) for _ in range(random.randint(1, 3))]
+        else:
+            # Browsing events: open the list, open one event, go back
+            user_id = random.choice(user_ids)
+            yield [
+                factory.message(user_id, "🎉 Events"),
+                factory.callback(user_id, f"event_{random.choice(event_ids)}"),
+                factory.callback(user_id, "events_list"),
+            ]
+
+
+# ------------------------
+# Stubbed Bot API
+# ------------------------
+
+class StubRequest(BaseRequest):
+    """Answers every Bot API call locally, optionally after a simulated round trip."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self._message_ids = itertools.count(1)
+
+    @property
+    def read_timeout(self):
+        return None
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url, method, request_data=None, *args, **kwargs):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        api_method = url.rsplit("/", 1)[-1]
+        params = request_data.parameters if request_data else {}
+
+        if api_method == "getMe":
+            result = {**BOT_USER, "can_join_groups": True, "can_read_all_group_messages": False,
+                      "supports_inline_queries": True}
+        elif api_method in ("sendMessage", "editMessageText", "sendDocument"):
+            chat_id = params.get("chat_id", 0)
+            result = {
+                "message_id": params.get("message_id") or next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "from": BOT_USER,
+                "text": params.get("text", ""),
+            }
+        else:
+            # answerCallbackQuery, setWebhook, setMyCommands, ...
+            result = True
+
+        return 200, dumps({"ok": True, "result": result}).encode()
+
+
+# ------------------------
+# Driver
+# ------------------------
+
+def percentile(ordered, p):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+async def run_load(target, rate, duration, user_ids, event_ids, onboarding_share, concurrency):
+    factory = UpdateFactory()
+    stream = sessions(factory, user_ids, event_ids, onboarding_share)
+    active = []
+    latencies = []
+    statuses = {}
+    in_flight = set()
+    limiter = asyncio.Semaphore(concurrency)
+
+    async def post(http, payload):
+        async with limiter:
+            started = time.perf_counter()
+            try:
+                async with http.post(target, data=dumps(payload),
+                                     headers={"Content-Type": "application/json"}) as resp:
+                    await resp.read()
+                    status = resp.status
+            except aiohttp.ClientError:
+                status = "error"
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    interval = 1 / rate
+    sent = 0
+    started = time.perf_counter()
+    async with aiohttp.ClientSession() as http:
+        # Open-loop schedule: one update every `interval`, regardless of how fast the bot answers
+        while time.perf_counter() - started < duration:
+            # Round-robin over a handful of live sessions so one user's steps stay in order
+            while len(active) < 8:
+                active.append(iter(next(stream)))
+            session = active.pop(0)
+            payload = next(session, None)
+            if payload is None:
+                continue
+            active.append(session)
+
+            task = asyncio.create_task(post(http, payload))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+            sent += 1
+
+            next_at = started + sent * interval
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+
+        if in_flight:
+            await asyncio.gather(*in_flight)
+
+    return sent, time.perf_counter() - started, sorted(latencies), statuses
+
+
+async def run_in_process(args):
+    from nelius_community_bot import build_application
+    from bot import db, metrics
+    from bot.generate_and_load_ids import load_to_redis
+    from bot.webhook import start_webhook_server
+    from bot.watchdog import start_watchdog, enable_strict_mode
+    from bot.shutdown import graceful_shutdown
+    from bot.migrations import migrate
+    from config.settings import TELEGRAM_BOT_TOKEN
+
+    if args.fake:
+        from bot.fakes import FakeRedis, FakePool
+        from bot.redis_client import use_redis_backend
+
+        use_redis_backend(FakeRedis())
+        db_pool = FakePool.seeded(users=args.users, events=args.events,
+                                  first_user_id=args.first_user_id, latency=args.db_latency)
+        # A fresh fake has no Social IDs to hand out to onboarding users
+        await load_to_redis()
+    else:
+        db_pool = await db.create_db_pool()
+        await migrate(db_pool)
+    if args.load_ids and not args.fake:
+        await load_to_redis()
+
+    stub = StubRequest(latency=args.bot_api_latency)
+    app = build_application(db_pool, request=stub)
+    await app.initialize()
+    await app.start()
+    if args.strict:
+        enable_strict_mode()
+    start_watchdog()
+    runner = await start_webhook_server(app, port=args.port, url_path=TELEGRAM_BOT_TOKEN)
+
+    try:
+        target = f"http://127.0.0.1:{args.port}/{TELEGRAM_BOT_TOKEN}"
+        started = time.perf_counter()
+        result = await run_load(target, args.rate, args.duration, args.user_ids, args.event_ids,
+                                args.onboarding_share, args.concurrency)
+
+        # Let the bot finish what is still queued before reading its metrics
+        while app.update_queue.qsize() or app.update_processor.current_concurrent_updates:
+            await asyncio.sleep(0.05)
+        return result, metrics.snapshot(), stub.calls, time.perf_counter() - started
+    finally:
+        # Same path as a deploy's SIGTERM
+        await graceful_shutdown(app, runner, db_pool)
+
+
+def report(result, snapshot=None, bot_api_calls=None, processing_elapsed=None):
+    sent, elapsed, latencies, statuses = result
+    errors = sum(count for status, count in statuses.items() if status != 200)
+
+    print("\n=== Webhook ingest ===")
+    print(f"Sent:        {sent} updates in {elapsed:.1f}s ({sent / elapsed:.1f} updates/s)")
+    print(f"Errors:      {errors} ({errors / max(sent, 1) * 100:.2f}%)  {statuses}")
+    print(f"POST latency p50/p95/p99: "
+          f"{percentile(latencies, 50) * 1000:.1f} / {percentile(latencies, 95) * 1000:.1f} / "
+          f"{percentile(latencies, 99) * 1000:.1f} ms")
+
+    if snapshot is None:
+        return
+
+    processed = sum(h["count"] for name, h in snapshot["latency"].items() if name.startswith("update."))
+    handler_errors = sum(v for name, v in snapshot["counters"].items() if name.endswith(".errors"))
+    print("\n=== Bot processing ===")
+    print(f"Processed:   {processed} updates in {processing_elapsed:.1f}s "
+          f"({processed / processing_elapsed:.1f} updates/s sustained)")
+    print(f"Dropped:     {snapshot['counters'].get('updates.duplicate', 0)} duplicate, "
+          f"{snapshot['counters'].get('updates.throttled', 0)} throttled")
+    print(f"Errors:      {handler_errors} ({handler_errors / max(processed, 1) * 100:.2f}%)")
+    print(f"Bot API:     {bot_api_calls} stubbed calls")
+    print(f"Event loop:  {snapshot['counters'].get('loop.blocked', 0)} blocks reported, "
+          f"{snapshot['counters'].get('loop.blocking_calls', 0)} blocking calls refused")
+    print("\nLatency (ms)                          count      p50      p95      p99")
+    for name, h in snapshot["latency"].items():
+        if name.startswith(("update.", "handler.", "loop.")):
+            print(f"{name:<36}{h['count']:>8}{h['p50'] * 1000:>9.1f}{h['p95'] * 1000:>9.1f}{h['p99'] * 1000:>9.1f}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Replay synthetic Telegram updates against the webhook.")
+    parser.add_argument("--target", help="Webhook URL of a running bot (default: run the bot in-process)")
+    parser.add_argument("--rate", type=float, default=20, help="Updates per second to send")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to keep sending")
+    parser.add_argument("--users", type=int, default=1000, help="Existing users to tap menus as")
+    parser.add_argument("--first-user-id", type=int, default=1, help="First existing telegram_id")
+    parser.add_argument("--events", type=int, default=20, help="Event ids 1..N used in event_* callbacks")
+    parser.add_argument("--onboarding-share", type=float, default=0.1, help="Share of sessions that are /start flows")
+    parser.add_argument("--concurrency", type=int, default=200, help="Max POSTs in flight")
+    parser.add_argument("--port", type=int, default=18080, help="Local port for the in-process webhook")
+    parser.add_argument("--bot-api-latency", type=float, default=0.0, help="Simulated Bot API round trip (s)")
+    parser.add_argument("--load-ids", action="store_true", help="Reload the Social ID list before starting")
+    parser.add_argument("--fake", action="store_true", help="Use in-memory Redis and Postgres (bot/fakes.py)")
+    parser.add_argument("--strict", action="store_true",
+                        help="Fail (exit 1) if a handler makes a known blocking call on the event loop")
+    parser.add_argument("--db-latency", type=float, default=0.0, help="Simulated query time with --fake (s)")
+    args = parser.parse_args()
+    args.user_ids = list(range(args.first_user_id, args.first_user_id + args.users))
+    args.event_ids = list(range(1, args.events + 1))
+    return args
+
+
+async def main():
+    args = parse_args()
+    if args.target:
+        result = await run_load(args.target, args.rate, args.duration, args.user_ids, args.event_ids,
+                                args.onboarding_share, args.concurrency)
+        report(result)
+    else:
+        result, snapshot, calls, processing_elapsed = await run_in_process(args)
+        report(result, snapshot, calls, processing_elapsed)
+        if args.strict and snapshot["counters"].get("loop.blocking_calls"):
+            print("\n❌ Handlers made blocking calls on the event loop (see the tracebacks above).")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,257 @@
+"""
+Micro-benchmarks for the bot's hot functions, runnable locally without Redis,
+Postgres or Telegram.
+
+Usage:
+    python benchmarks/run_benchmarks.py                      # run, write results JSON
+    python benchmarks/run_benchmarks.py --save-baseline      # run and store as the baseline
+    python benchmarks/run_benchmarks.py --compare            # run and compare against the baseline
+    python benchmarks/run_benchmarks.py --only events        # run benchmarks whose name contains "events"
+
+Exits with status 1 when --compare finds a benchmark slower than --threshold.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from bot import serialization
+from bot import assign_social_id as assign_module
+from bot import redis_client as redis_module
+from bot.fakes import FakeRedis
+from bot.bot_utils import parse_event_args
+from bot.generate_and_load_ids import generate_social_ids
+from bot.rendering import sort_events, render_events_list, render_event_detail, render_profile
+from rewards.airtime_rewards.rewards import get_network_from_prefix
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+BASELINE_PATH = os.path.join(RESULTS_DIR, "baseline.json")
+
+# Minimum wall time per measurement, and how many measurements to take the best of
+MIN_RUN_TIME = 0.2
+REPEAT = 5
+
+
+# ------------------------
+# Fixtures
+# ------------------------
+
+EVENTS = [
+    {"id": i, "title": f"Campaign #{i} — The God of All Flesh", "score": (i * 37) % 101}
+    for i in range(50)
+]
+LINKS = {
+    "instagram": "https://instagram.com/p/abc123",
+    "x": "https://x.com/nelius/status/1234567890",
+    "tiktok": "https://tiktok.com/@nelius/video/987654321",
+    "bsky": "https://bsky.app/profile/nelius/post/xyz",
+}
+HANDLES = {"x": "@nelius", "instagram": "@nelius.dao", "tiktok": "@neliusdao"}
+EVENT_ARGS = ["The", "God", "of", "All", "Flesh", *LINKS.values(), "https://www.x.com/nelius/status/2"]
+PHONES = ["08031234567", "+2348021234567", "0705 123 4567", "0909-123-4567", "08101234567"]
+
+
+def _quiet(func):
+    """Run func with its print() output swallowed (e.g. generate_social_ids)."""
+    def wrapper():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return func()
+    return wrapper
+
+
+def bench_get_network_from_prefix():
+    for phone in PHONES:
+        get_network_from_prefix(phone)
+
+
+def bench_parse_event_args():
+    parse_event_args(EVENT_ARGS)
+
+
+def bench_events_sort_and_keyboard():
+    render_events_list(sort_events(EVENTS))
+
+
+def bench_event_detail_render():
+    render_event_detail("The God of All Flesh", 42, LINKS)
+
+
+def bench_profile_render():
+    render_profile("BraveCobaltMango", 1250, "+2348031234567", HANDLES)
+
+
+def make_assign_social_id():
+    fake = FakeRedis()
+    redis_module.use_redis_backend(fake)
+    counter = iter(range(10**9))
+
+    async def bench():
+        user_id = next(counter)
+        if not await fake.llen(assign_module.LIST_KEY):
+            # Refilling with the same IDs: forget that they were handed out
+            await fake.delete(assign_module.USED_KEY)
+            await fake.lpush(assign_module.LIST_KEY, *(f"Id{i}" for i in range(100_000)))
+        with contextlib.redirect_stdout(io.StringIO()):
+            await assign_module.assign_social_id(user_id)
+    return bench
+
+
+def make_cache_roundtrip():
+    redis_module.use_redis_backend(FakeRedis())
+
+    async def bench():
+        await redis_module.cache_user_profile(1, "BraveCobaltMango", 1250)
+        await redis_module.get_cached_user_profile(1)
+        await redis_module.cache_events_list(EVENTS)
+        await redis_module.get_cached_events_list()
+    return bench
+
+
+SYNC_BENCHMARKS = {
+    "generate_social_ids": _quiet(generate_social_ids),
+    "get_network_from_prefix": bench_get_network_from_prefix,
+    "parse_event_args": bench_parse_event_args,
+    "events_sort_and_keyboard": bench_events_sort_and_keyboard,
+    "event_detail_render": bench_event_detail_render,
+    "profile_render": bench_profile_render,
+}
+
+ASYNC_BENCHMARKS = {
+    "assign_social_id": make_assign_social_id,
+    "cache_serialization_roundtrip": make_cache_roundtrip,
+}
+
+
+# ------------------------
+# Runner
+# ------------------------
+
+def _measure_sync(func):
+    # Calibrate: grow the loop count until one measurement takes MIN_RUN_TIME
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - started >= MIN_RUN_TIME:
+            break
+        number *= 2
+
+    best = float("inf")
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - started) / number)
+    return best, number
+
+
+def _measure_async(factory):
+    loop = asyncio.new_event_loop()
+    try:
+        coro_func = factory()
+
+        async def run(number):
+            started = time.perf_counter()
+            for _ in range(number):
+                await coro_func()
+            return time.perf_counter() - started
+
+        number = 1
+        while loop.run_until_complete(run(number)) < MIN_RUN_TIME:
+            number *= 2
+
+        best = min(loop.run_until_complete(run(number)) / number for _ in range(REPEAT))
+        return best, number
+    finally:
+        loop.close()
+
+
+def run_all(only=None):
+    results = {}
+    for name, func in SYNC_BENCHMARKS.items():
+        if only and only not in name:
+            continue
+        per_op, number = _measure_sync(func)
+        results[name] = {"per_op_us": per_op * 1e6, "loops": number}
+        print(f"{name:<34}{per_op * 1e6:>14.2f} µs/op")
+
+    for name, factory in ASYNC_BENCHMARKS.items():
+        if only and only not in name:
+            continue
+        per_op, number = _measure_async(factory)
+        results[name] = {"per_op_us": per_op * 1e6, "loops": number}
+        print(f"{name:<34}{per_op * 1e6:>14.2f} µs/op")
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "serializer": serialization.SERIALIZER,
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """Print per-benchmark change vs. the baseline; return names that regressed."""
+    regressions = []
+    print(f"\n{'benchmark':<34}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if not base:
+            print(f"{name:<34}{'-':>12}{result['per_op_us']:>10.2f}µs{'new':>10}")
+            continue
+        change = result["per_op_us"] / base["per_op_us"] - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  ⚠️ slower"
+        print(f"{name:<34}{base['per_op_us']:>10.2f}µs{result['per_op_us']:>10.2f}µs{change * 100:>+9.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the bot's micro-benchmarks.")
+    parser.add_argument("--only", help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--output", help="Where to write the results JSON (default: results/<timestamp>.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="Also store the results as the baseline")
+    parser.add_argument("--compare", nargs="?", const=BASELINE_PATH, help="Compare against a baseline JSON")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown before failing (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    current = run_all(args.only)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        f.write(serialization.dumps(current))
+    print(f"\nResults saved to {output}")
+
+    if args.save_baseline:
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            f.write(serialization.dumps(current))
+        print(f"Baseline saved to {BASELINE_PATH}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = serialization.loads(f.read())
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ Slower than baseline by more than {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\n✅ No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
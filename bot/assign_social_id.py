@@ -1,6 +1,7 @@
 from bot.redis_client import redis_client
 
 LIST_KEY = "nelius:available_ids"
+USED_KEY = "nelius:used_ids"
 USER_KEY_PREFIX = "nelius:user:"
 
 async def assign_social_id(user_id: str):
@@ -14,14 +15,20 @@ async def assign_social_id(user_id: str):
     if existing:
         return existing
 
-    # Atomically pop from Redis list (safe for concurrent users)
-    social_id = await redis_client.rpop(LIST_KEY)
+    # Atomically pop from Redis list (safe for concurrent users), skipping
+    # IDs imported from the legacy database while this list was loaded
+    while True:
+        social_id = await redis_client.rpop(LIST_KEY)
 
-    if not social_id:
-        raise Exception("No available Social IDs left!")
+        if not social_id:
+            raise Exception("No available Social IDs left!")
 
-    # Save the mapping
+        if not await redis_client.sismember(USED_KEY, social_id):
+            break
+
+    # Save the mapping, and keep the ID out of the list the next load_to_redis builds
     await redis_client.set(user_key, social_id)
+    await redis_client.sadd(USED_KEY, social_id)
 
     print(f"Assigned '{social_id}' to user {user_id}")
     return social_id
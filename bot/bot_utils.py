@@ -1,6 +1,9 @@
 import asyncio
 import asyncpg
 import io
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+from telegram import Update
 
 async def export_table_to_csv(db_pool, table_name):
     # Use BytesIO directly so asyncpg can write raw bytes to it
@@ -22,3 +25,125 @@ async def export_table_to_csv(db_pool, table_name):
     
     return buffer
 
+
+
+def command_name(update: object):
+    """Return the bot command of an update (e.g. 'dump_db'), or None for non-commands."""
+    if not isinstance(update, Update) or not update.effective_message:
+        return None
+
+    text = update.effective_message.text or update.effective_message.caption or ""
+    if not text.startswith("/"):
+        return None
+
+    # '/dump_db@NeliusBot users' -> 'dump_db'
+    return text.split()[0][1:].split("@")[0].lower()
+
+
+def link_platform(url: str) -> str:
+    """'https://www.instagram.com/p/1' -> 'instagram', 'https://bsky.app/...' -> 'bsky'."""
+    # Parse the URL dynamically
+    domain = urlparse(url).netloc.lower() # e.g., 'www.instagram.com'
+
+    # Strip 'www.' if it exists
+    if domain.startswith("www."):
+        domain = domain[4:]
+
+    # Extract the core platform name (everything before the first dot)
+    # e.g., 'instagram.com' -> 'instagram', 'bsky.app' -> 'bsky'
+    return domain.split('.')[0] if '.' in domain else "link"
+
+
+def normalize_repost_url(url: str) -> str:
+    """'https://mobile.twitter.com/Nelius/status/1?s=20' -> 'https://x.com/Nelius/status/1'."""
+    parsed = urlparse(url.strip())
+    host = parsed.netloc.lower()
+    for prefix in ("www.", "mobile.", "m."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    if host == "twitter.com":
+        host = "x.com"
+    # Query strings are share/tracking noise (?s=20, ?igsh=...), not part of the post
+    return f"https://{host}{parsed.path.rstrip('/')}"
+
+
+def parse_event_args(args):
+    """Split command args into an event title and a {platform: url} dict.
+
+    '/addevent My Event https://instagram.com/p/1 https://x.com/p/2'
+    -> ("My Event", {"instagram": "https://instagram.com/p/1", "x": "https://x.com/p/2"})
+    """
+    title_parts = []
+    urls = []
+
+    for arg in args:
+        if is_link(arg):
+            urls.append(arg)
+        else:
+            title_parts.append(arg)
+
+    return " ".join(title_parts), links_by_platform(urls)
+
+
+def is_link(text: str) -> bool:
+    return text.startswith("http://") or text.startswith("https://")
+
+
+def links_by_platform(urls) -> dict:
+    """['https://x.com/p/1', 'https://x.com/p/2'] -> {"x": "https://x.com/p/1", "x_1": "https://x.com/p/2"}."""
+    links_dict = {}
+
+    for url in urls:
+        base_platform = link_platform(url)
+
+        platform_name = base_platform
+
+        # Just in case you add TWO links from the same platform (e.g., two X posts),
+        # this prevents the second one from overwriting the first in the dictionary!
+        counter = 1
+        while platform_name in links_dict:
+            platform_name = f"{base_platform}_{counter}"
+            counter += 1
+
+        links_dict[platform_name] = url
+
+    return links_dict
+
+
+def parse_event_date(value: str) -> datetime:
+    """ISO 8601 date or date-time ('2026-11-01', '2026-11-01T18:00'), UTC unless it has an offset."""
+    moment = datetime.fromisoformat(value.strip())
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def parse_event_window(args):
+    """Pull the optional 'starts=' / 'ends=' dates out of event command args.
+
+    ['My', 'Event', 'ends=2026-11-01T18:00'] -> (['My', 'Event'], None, datetime(2026, 11, 1, 18, 0, tzinfo=UTC))
+    Dates are ISO 8601, in UTC unless they carry an offset. Raises ValueError
+    for a date that doesn't parse or an event that ends before it starts.
+    """
+    rest = []
+    bounds = {"starts": None, "ends": None}
+
+    for arg in args:
+        key, sep, value = arg.partition("=")
+        if not sep or key.lower() not in bounds:
+            rest.append(arg)
+            continue
+        try:
+            bounds[key.lower()] = parse_event_date(value)
+        except ValueError:
+            raise ValueError(f"'{value}' is not a date, use e.g. {key}=2026-11-01 or {key}=2026-11-01T18:00") from None
+
+    starts_at, ends_at = bounds["starts"], bounds["ends"]
+    if starts_at and ends_at and ends_at <= starts_at:
+        raise ValueError("The event must end after it starts.")
+    return rest, starts_at, ends_at
+
+
+def format_event_window(starts_at, ends_at) -> str:
+    """'2026-10-20 00:00 → 2026-11-01 18:00 UTC' (open ends shown as '…')."""
+    def fmt(moment):
+        return moment.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M") if moment else "…"
+    return f"{fmt(starts_at)} → {fmt(ends_at)} UTC"
@@ -0,0 +1,77 @@
+import time
+
+from bot import metrics
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Exported as the breaker.<name>.state gauge
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    """Stops calling a dependency that keeps failing, and probes it back to health.
+
+    closed:    calls go through; `failure_threshold` failures in a row open it.
+    open:      calls are refused immediately (no timeouts piling up) until
+               `reset_timeout` seconds have passed.
+    half_open: one probe call is let through. Success closes the breaker and
+               runs the on_close callbacks (e.g. replaying queued writes),
+               failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._probe_started = 0.0
+        self._on_close = []
+        metrics.register_gauge(f"breaker.{name}.state", lambda: STATE_VALUES[self.state])
+
+    def on_close(self, callback):
+        """Call `callback()` every time the breaker recovers."""
+        self._on_close.append(callback)
+
+    def allow(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+            self._probing = False
+        now = time.monotonic()
+        # A probe that never reported back (e.g. cancelled) doesn't block the next one
+        if self.state == HALF_OPEN and (not self._probing or now - self._probe_started >= self.reset_timeout):
+            # This caller is the probe; everyone else keeps failing fast
+            self._probing = True
+            self._probe_started = now
+            return True
+        metrics.incr(f"breaker.{self.name}.rejected")
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        if self.state != CLOSED:
+            self.state = CLOSED
+            self._probing = False
+            print(f"✅ {self.name} is reachable again, circuit closed")
+            for callback in self._on_close:
+                callback()
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                print(f"🔌 {self.name} is failing, circuit open for {self.reset_timeout:g}s")
+                metrics.incr(f"breaker.{self.name}.opened")
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+            self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.state != CLOSED
@@ -0,0 +1,235 @@
+import asyncio
+
+import asyncpg
+from redis.exceptions import RedisError
+
+from bot import metrics
+from bot.circuit import CircuitBreaker
+from bot.queries import QUERIES
+from bot.redis_client import redis_client
+from bot.serialization import dumps, loads
+from config.settings import (DATABASE_URL, DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_MAX_QUERIES,
+                             DB_POOL_MAX_INACTIVE_LIFETIME, DB_STATEMENT_CACHE_SIZE, DB_COMMAND_TIMEOUT,
+                             DB_BREAKER_FAILURES, DB_BREAKER_RESET)
+
+# Postgres health: opens after DB_BREAKER_FAILURES connection errors/timeouts
+# in a row. While open, acquire() fails fast and handlers serve snapshots.
+db_breaker = CircuitBreaker("postgres", DB_BREAKER_FAILURES, DB_BREAKER_RESET)
+
+# Errors that mean "the database is unreachable", not "this query is wrong"
+CONNECTION_ERRORS = (
+    asyncio.TimeoutError,
+    OSError,
+    asyncpg.exceptions.PostgresConnectionError,
+    asyncpg.exceptions.CannotConnectNowError,
+    asyncpg.exceptions.InterfaceError,
+)
+
+
+class DatabaseUnavailable(Exception):
+    """Postgres is down, failing over, or too slow to answer in time."""
+
+
+class BotConnection(asyncpg.Connection):
+    """asyncpg connection that keeps our named queries prepared on it."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statements = {}
+
+
+async def init_connection(conn):
+    """Pool `init` hook: runs once for every new physical connection."""
+    # JSON/JSONB columns come back as dicts and accept dicts, no manual json.loads.
+    # Codecs must be set before preparing, statements capture them at prepare time.
+    for type_name in ("json", "jsonb"):
+        await conn.set_type_codec(type_name, encoder=dumps, decoder=loads, schema="pg_catalog")
+
+    for name, sql in QUERIES.items():
+        try:
+            conn.statements[name] = await conn.prepare(sql)
+        except (asyncpg.exceptions.UndefinedTableError, asyncpg.exceptions.UndefinedColumnError,
+                asyncpg.exceptions.UndefinedFunctionError):
+            # Fresh or not yet migrated database (missing tables, columns or
+            # extensions): prepare lazily on first use, after migrate()
+            continue
+
+
+async def create_db_pool():
+    """Create the asyncpg pool sized from config (see DB_POOL_* settings)."""
+    pool = await asyncpg.create_pool(
+        DATABASE_URL,
+        min_size=DB_POOL_MIN_SIZE,
+        max_size=DB_POOL_MAX_SIZE,
+        max_queries=DB_POOL_MAX_QUERIES,
+        max_inactive_connection_lifetime=DB_POOL_MAX_INACTIVE_LIFETIME,
+        statement_cache_size=DB_STATEMENT_CACHE_SIZE,
+        connection_class=BotConnection,
+        init=init_connection,
+        # Default timeout for every query, so a failover can't hang a handler
+        command_timeout=DB_COMMAND_TIMEOUT,
+    )
+
+    metrics.register_gauge("db.pool.size", pool.get_size)
+    metrics.register_gauge("db.pool.idle", pool.get_idle_size)
+    metrics.register_gauge("db.pool.max_size", pool.get_max_size)
+    return pool
+
+
+async def _statement(conn, name: str):
+    stmt = conn.statements.get(name)
+    if stmt is None:
+        stmt = conn.statements[name] = await conn.prepare(QUERIES[name])
+    return stmt
+
+
+async def _run(conn, name: str, method: str, *args):
+    """Call a prepared statement method, timed, feeding the outcome into the Postgres breaker."""
+    with metrics.timer(f"db.query.{name}"):
+        try:
+            stmt = await _statement(conn, name)
+            result = await getattr(stmt, method)(*args)
+        except CONNECTION_ERRORS as e:
+            db_breaker.record_failure()
+            raise DatabaseUnavailable(f"{name}: {e!r}") from e
+        except asyncpg.exceptions.PostgresError:
+            # Postgres answered (constraint violation, bad input...), so it is up
+            db_breaker.record_success()
+            raise
+    db_breaker.record_success()
+    return stmt, result
+
+
+# ------------------------
+# Named query helpers: `await db.fetchrow(conn, "user_profile", user_id)`
+# ------------------------
+
+async def fetch(conn, name: str, *args):
+    return (await _run(conn, name, "fetch", *args))[1]
+
+
+async def fetchrow(conn, name: str, *args):
+    return (await _run(conn, name, "fetchrow", *args))[1]
+
+
+async def fetchval(conn, name: str, *args):
+    return (await _run(conn, name, "fetchval", *args))[1]
+
+
+async def execute(conn, name: str, *args) -> str:
+    """Run a named write and return its status string, e.g. 'UPDATE 1'."""
+    stmt, _ = await _run(conn, name, "fetch", *args)
+    return stmt.get_statusmsg()
+
+
+# ------------------------
+# Write journal
+#
+# While Postgres is unavailable, user writes are appended to a Redis stream
+# as (query name, args) and replayed in order once the breaker closes. Until
+# the journal is drained, new writes are journaled too so they can't overtake
+# older ones. Every replica shares the stream, so "is anything pending" is
+# read from the stream itself (XLEN), not from a flag only the replica that
+# journaled would know about; and one replica at a time replays it (a Redis
+# claim), so two replays can't interleave stale values. Replay is
+# at-least-once (a crash between applying and deleting an entry repeats it),
+# so only idempotent writes without RETURNING belong here; e.g.
+# allocate_points is not.
+# ------------------------
+
+JOURNAL_STREAM = "nelius:journal:writes"
+JOURNALED_QUERIES = {"insert_user", "set_phone", "set_handle", "set_publicity_score"}
+JOURNAL_BATCH = 100
+# Held (and extended per batch) by the replica replaying the journal
+JOURNAL_REPLAY_CLAIM = "nelius:journal:replaying"
+JOURNAL_REPLAY_CLAIM_TTL = 60
+
+_replaying = False
+
+
+async def journal_pending() -> bool:
+    """True while the shared journal still holds writes (from any replica)."""
+    try:
+        return await redis_client.xlen(JOURNAL_STREAM) > 0
+    except RedisError:
+        # No Redis, no journal: nothing can be queued ahead of a direct write
+        return False
+
+
+async def journal_write(name: str, *args) -> str:
+    try:
+        await redis_client.xadd(JOURNAL_STREAM, {"name": name, "args": dumps(list(args))})
+    except RedisError as e:
+        # Nowhere durable to put it: the caller has to report the failure
+        raise DatabaseUnavailable(f"{name}: journal unavailable ({e!r})") from e
+    metrics.incr("db.journal.appended")
+    return "JOURNALED"
+
+
+async def write(db_pool, name: str, *args) -> str:
+    """Run a named write on its own connection, or journal it while Postgres is down.
+
+    Returns the status string ('UPDATE 1'), or 'JOURNALED' when it was queued.
+    """
+    if name in JOURNALED_QUERIES and await journal_pending():
+        status = await journal_write(name, *args)
+        # Postgres looks healthy again (or was only blipping): start draining
+        if not db_breaker.is_open:
+            schedule_journal_replay(db_pool)
+        return status
+    try:
+        async with db_pool.acquire() as conn:
+            return await execute(conn, name, *args)
+    except DatabaseUnavailable:
+        if name not in JOURNALED_QUERIES:
+            raise
+        return await journal_write(name, *args)
+
+
+async def replay_journal(db_pool):
+    """Apply journaled writes in order. Stops (and keeps the rest) if Postgres fails again."""
+    global _replaying
+    if _replaying:
+        return
+    _replaying = True
+    replayed = 0
+    claimed = False
+    try:
+        claimed = await redis_client.set(JOURNAL_REPLAY_CLAIM, "1", nx=True, ex=JOURNAL_REPLAY_CLAIM_TTL)
+        if not claimed:
+            # Another replica is draining it
+            return
+        while True:
+            entries = await redis_client.xrange(JOURNAL_STREAM, count=JOURNAL_BATCH)
+            if not entries:
+                break
+            async with db_pool.acquire() as conn:
+                for entry_id, fields in entries:
+                    name, args = fields["name"], loads(fields["args"])
+                    try:
+                        await execute(conn, name, *args)
+                        replayed += 1
+                    except asyncpg.exceptions.PostgresError as e:
+                        # The write itself is bad (e.g. duplicate user); retrying won't help
+                        metrics.incr("db.journal.dropped")
+                        print(f"⚠️ Dropping journaled {name}{tuple(args)}: {e}")
+                    await redis_client.xdel(JOURNAL_STREAM, entry_id)
+            await redis_client.expire(JOURNAL_REPLAY_CLAIM, JOURNAL_REPLAY_CLAIM_TTL)
+    except (DatabaseUnavailable, RedisError) as e:
+        print(f"⚠️ Journal replay paused after {replayed} writes: {e}")
+    finally:
+        _replaying = False
+        if claimed:
+            try:
+                await redis_client.delete(JOURNAL_REPLAY_CLAIM)
+            except RedisError:
+                pass
+    if replayed:
+        metrics.incr("db.journal.replayed", replayed)
+        print(f"♻️ Replayed {replayed} writes journaled while Postgres was down")
+
+
+def schedule_journal_replay(db_pool):
+    """Hook for db_breaker.on_close: drain the journal in the background (a no-op when it's empty)."""
+    if not _replaying:
+        asyncio.get_running_loop().create_task(replay_journal(db_pool))
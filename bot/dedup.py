@@ -0,0 +1,85 @@
+import hashlib
+import math
+import time
+from telegram import Update
+
+from bot.redis_client import redis_client, RedisUnavailable
+from config.settings import UPDATE_DEDUP_TTL
+
+DEDUP_KEY_PREFIX = "nelius:update:"
+
+
+class RotatingBloomFilter:
+    """Bloom filter with two generations, so old ids age out instead of filling it up.
+
+    A new generation starts every `capacity` ids or `max_age` seconds, and the
+    previous one is still checked, giving a sliding window of recent ids.
+    """
+
+    def __init__(self, capacity: int = 50_000, error_rate: float = 1e-6, max_age: float = UPDATE_DEDUP_TTL):
+        self.capacity = capacity
+        self.max_age = max_age
+        self.num_bits = math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._current = bytearray(self.num_bits // 8 + 1)
+        self._previous = bytearray(self.num_bits // 8 + 1)
+        self._count = 0
+        self._started_at = time.monotonic()
+
+    def _positions(self, item: int):
+        # Enhanced double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(str(item).encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little")
+        return [(h1 + i * h2 + i * i) % self.num_bits for i in range(self.num_hashes)]
+
+    @staticmethod
+    def _has(bits, positions):
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in positions)
+
+    def __contains__(self, item: int) -> bool:
+        positions = self._positions(item)
+        return self._has(self._current, positions) or self._has(self._previous, positions)
+
+    def add(self, item: int):
+        if self._count >= self.capacity or time.monotonic() - self._started_at > self.max_age:
+            self._previous = self._current
+            self._current = bytearray(self.num_bits // 8 + 1)
+            self._count = 0
+            self._started_at = time.monotonic()
+
+        for p in self._positions(item):
+            self._current[p >> 3] |= 1 << (p & 7)
+        self._count += 1
+
+
+# Local fast path: redeliveries to this process never touch Redis
+seen_updates = RotatingBloomFilter()
+
+
+async def is_duplicate_update(update: object) -> bool:
+    """True if this update_id was already dispatched (by us or by a previous instance)."""
+    if not isinstance(update, Update):
+        return False
+
+    update_id = update.update_id
+    if update_id in seen_updates:
+        return True
+    seen_updates.add(update_id)
+
+    # Shared window in Redis so a restarted instance still recognises redeliveries
+    key = f"{DEDUP_KEY_PREFIX}{update_id}"
+    try:
+        claimed = await redis_client.set(key, 1, nx=True, ex=UPDATE_DEDUP_TTL)
+        if not claimed:
+            # Slide the window: keep dropping it for as long as Telegram keeps retrying
+            await redis_client.expire(key, UPDATE_DEDUP_TTL)
+            return True
+    except RedisUnavailable:
+        # Circuit open: the local bloom filter is all we have for now
+        pass
+    except Exception as e:
+        # Fail open: better to risk a duplicate than to drop a real update
+        print(f"⚠️ Update dedup check failed for {update_id}: {e}")
+
+    return False
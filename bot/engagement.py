@@ -0,0 +1,122 @@
+import asyncpg
+from redis.exceptions import RedisError
+
+from bot import db, metrics
+from bot.events_cache import refresh_events_cache
+from bot.redis_client import redis_client, redis_breaker
+from config.settings import ENGAGEMENT_VIEW_POINTS, ENGAGEMENT_VIEWER_POINTS, ENGAGEMENT_FOLD_BATCH
+
+# ------------------------
+# Engagement-driven publicity scores
+# Handlers only bump Redis counters (one pipelined round trip per interaction).
+# fold_engagement() (the fold_engagement job, bot/jobs.py) turns them into a
+# publicity_score delta per event, applied to Postgres in one batched UPDATE.
+# Reposts are not counted here: they add publicity once verified, in the
+# same transaction that credits the member (credit_reposts, bot/reposts.py).
+# ------------------------
+
+VIEWS_KEY = "nelius:engagement:views:{}"        # INCR per event detail view
+VIEWERS_KEY = "nelius:engagement:viewers:{}"    # HyperLogLog of viewer telegram ids
+DIRTY_KEY = "nelius:engagement:dirty"           # events with activity not folded yet
+# event id -> unique viewers already turned into score (HyperLogLogs only grow)
+FOLDED_VIEWERS_KEY = "nelius:engagement:folded_viewers"
+
+# Viewer sets of events nobody has opened for this long are dropped
+VIEWERS_TTL = 30 * 24 * 3600
+
+
+async def _record(event_id: int, *commands):
+    # While the Redis circuit is open a counter isn't worth a socket timeout
+    if redis_breaker.is_open:
+        metrics.incr("engagement.dropped")
+        return
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for name, *args in commands:
+            getattr(pipe, name)(*args)
+        pipe.sadd(DIRTY_KEY, event_id)
+        await pipe.execute()
+    except RedisError:
+        metrics.incr("engagement.dropped")
+
+
+async def record_view(event_id: int, user_id: int):
+    """Count one event detail view by `user_id`."""
+    viewers = VIEWERS_KEY.format(event_id)
+    await _record(event_id,
+                  ("incr", VIEWS_KEY.format(event_id)),
+                  ("pfadd", viewers, user_id),
+                  ("expire", viewers, VIEWERS_TTL))
+
+
+async def _restore(counts: dict):
+    """Put popped counters back after a failed fold, so nothing is lost."""
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for event_id, (views, _) in counts.items():
+            if views:
+                pipe.incrby(VIEWS_KEY.format(event_id), views)
+            pipe.sadd(DIRTY_KEY, event_id)
+        await pipe.execute()
+    except RedisError as e:
+        print(f"⚠️ Lost engagement counters for {len(counts)} events: {e!r}")
+
+
+async def fold_engagement(db_pool) -> int:
+    """Fold pending engagement into events.publicity_score. Returns the number of events updated."""
+    try:
+        event_ids = [int(e) for e in await redis_client.spop(DIRTY_KEY, ENGAGEMENT_FOLD_BATCH)]
+    except RedisError:
+        return 0
+    if not event_ids:
+        return 0
+
+    # 1. Read-and-reset every counter in one round trip
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for event_id in event_ids:
+            pipe.getdel(VIEWS_KEY.format(event_id))
+            pipe.pfcount(VIEWERS_KEY.format(event_id))
+        pipe.hmget(FOLDED_VIEWERS_KEY, [str(event_id) for event_id in event_ids])
+        results = await pipe.execute()
+    except RedisError as e:
+        await _restore({event_id: (0, 0) for event_id in event_ids})
+        print(f"⚠️ Engagement fold skipped, Redis failed: {e!r}")
+        return 0
+
+    folded_viewers = results[-1]
+    counts, ids, deltas = {}, [], []
+    for i, event_id in enumerate(event_ids):
+        views, viewers = results[2 * i: 2 * i + 2]
+        views = int(views or 0)
+        folded = int(folded_viewers[i] or 0)
+        # An expired viewer set starts from zero again
+        new_viewers = viewers - folded if viewers >= folded else viewers
+        counts[event_id] = (views, viewers)
+
+        delta = views * ENGAGEMENT_VIEW_POINTS + new_viewers * ENGAGEMENT_VIEWER_POINTS
+        if delta:
+            ids.append(event_id)
+            deltas.append(delta)
+
+    # 2. One UPDATE for every event, then the list cache in the same step
+    if ids:
+        try:
+            async with db_pool.acquire() as conn:
+                await db.execute(conn, "add_publicity_scores", ids, deltas)
+                await refresh_events_cache(conn)
+        except (db.DatabaseUnavailable, asyncpg.exceptions.PostgresError) as e:
+            await _restore(counts)
+            print(f"⏳ Engagement fold postponed: {e!r}")
+            return 0
+
+    try:
+        await redis_client.hset(FOLDED_VIEWERS_KEY, mapping={
+            event_id: viewers for event_id, (_, viewers) in counts.items()
+        })
+    except RedisError:
+        # Worst case those viewers are counted once more
+        pass
+
+    metrics.incr("engagement.folded_events", len(ids))
+    return len(ids)
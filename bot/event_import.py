@@ -0,0 +1,188 @@
+import csv
+import io
+import json
+import re
+
+from bot import db
+from bot.bot_utils import is_link, links_by_platform, parse_event_date
+from bot.redis_client import invalidate_cache
+from bot.serialization import dumps
+
+# ------------------------
+# Bulk event import (dev /importevents).
+#
+# A JSON or CSV document describes many events. Rows with an id update that
+# event (same rules as /updateevent), rows without one are new events. The
+# whole batch is written in one transaction with one statement per kind,
+# and the events list cache is dropped once at the end.
+#
+# CSV: a header row with title, links, starts, ends and optionally id.
+#      links holds URLs separated by spaces, commas or semicolons; any other
+#      column whose cell is a URL (e.g. "x", "instagram") counts as a link too.
+# JSON: a list of objects with the same keys (or {"events": [...]}); links
+#      may be a list of URLs or a {platform: url} object.
+# ------------------------
+
+_URL_SEPARATORS = re.compile(r"[\s,;]+")
+_KNOWN_COLUMNS = {"id", "title", "links", "starts", "starts_at", "ends", "ends_at"}
+
+
+class DocumentError(ValueError):
+    """The document as a whole can't be read (not one of its rows)."""
+
+
+def _rows_from_csv(text: str) -> list:
+    reader = csv.DictReader(io.StringIO(text))
+    if not reader.fieldnames:
+        raise DocumentError("The CSV file is empty.")
+    rows = []
+    # Line 1 is the header
+    for line, record in enumerate(reader, start=2):
+        record = {(key or "").strip().lower(): (value or "").strip() for key, value in record.items()}
+        urls = [url for url in _URL_SEPARATORS.split(record.get("links", "")) if url]
+        urls += [value for key, value in record.items() if key not in _KNOWN_COLUMNS and is_link(value)]
+        rows.append((line, record, urls))
+    return rows
+
+
+def _rows_from_json(text: str) -> list:
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise DocumentError(f"The JSON file doesn't parse: {e}") from None
+    if isinstance(data, dict):
+        data = data.get("events")
+    if not isinstance(data, list):
+        raise DocumentError('The JSON file must be a list of events (or {"events": [...]}).')
+
+    rows = []
+    for line, record in enumerate(data, start=1):
+        if not isinstance(record, dict):
+            rows.append((line, None, []))
+            continue
+        links = record.get("links") or []
+        if isinstance(links, dict):
+            urls = list(links.values())
+        elif isinstance(links, str):
+            urls = _URL_SEPARATORS.split(links)
+        elif isinstance(links, list):
+            urls = links
+        else:
+            # A number or true: _event_from_record rejects it as not a link
+            urls = [links]
+        record = {key.lower(): "" if value is None else value for key, value in record.items()}
+        rows.append((line, record, [str(url).strip() for url in urls if url]))
+    return rows
+
+
+def _event_from_record(record, urls) -> dict:
+    """One validated event (id, title, links, starts_at, ends_at). Raises ValueError."""
+    if record is None:
+        raise ValueError("not an object")
+
+    event_id = str(record.get("id", "")).strip()
+    if event_id and not event_id.isdigit():
+        raise ValueError(f"id '{event_id}' is not a number")
+
+    bad = [url for url in urls if not is_link(url)]
+    if bad:
+        raise ValueError(f"'{bad[0]}' is not a link")
+
+    bounds = {}
+    for key in ("starts", "ends"):
+        value = str(record.get(key) or record.get(f"{key}_at") or "").strip()
+        try:
+            bounds[key] = parse_event_date(value) if value else None
+        except ValueError:
+            raise ValueError(f"{key} '{value}' is not a date (e.g. 2026-11-01 or 2026-11-01T18:00)") from None
+    if bounds["starts"] and bounds["ends"] and bounds["ends"] <= bounds["starts"]:
+        raise ValueError("ends before it starts")
+
+    event = {
+        "id": int(event_id) if event_id else None,
+        "title": str(record.get("title", "")).strip() or None,
+        "links": links_by_platform(urls) or None,
+        "starts_at": bounds["starts"],
+        "ends_at": bounds["ends"],
+    }
+    if event["id"] is None and not event["title"]:
+        raise ValueError("new events need a title")
+    if event["id"] is not None and not any(event[key] for key in ("title", "links", "starts_at", "ends_at")):
+        raise ValueError("nothing to update")
+    return event
+
+
+def parse_event_document(filename: str, data: bytes):
+    """Parse an uploaded document into ([(line, event), ...], [(line, error), ...]).
+
+    Raises DocumentError when the file can't be read at all.
+    """
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise DocumentError("The file must be UTF-8 text.") from None
+
+    if filename.lower().endswith(".json"):
+        records = _rows_from_json(text)
+    elif filename.lower().endswith(".csv"):
+        records = _rows_from_csv(text)
+    else:
+        raise DocumentError("Send a .csv or .json file.")
+
+    events, errors = [], []
+    seen_ids = set()
+    for line, record, urls in records:
+        try:
+            event = _event_from_record(record, urls)
+        except ValueError as e:
+            errors.append((line, str(e)))
+            continue
+        # Two updates of one event in a batch would race inside one UPDATE
+        if event["id"] is not None:
+            if event["id"] in seen_ids:
+                errors.append((line, f"event {event['id']} appears twice"))
+                continue
+            seen_ids.add(event["id"])
+        events.append((line, event))
+    return events, errors
+
+
+async def import_events(db_pool, events: list):
+    """Write parsed events in one transaction. Returns (new ids, updated ids, [(line, error)])."""
+    new = [event for _, event in events if event["id"] is None]
+    updates = [(line, event) for line, event in events if event["id"] is not None]
+
+    def links_json(event):
+        return dumps(event["links"]) if event["links"] else None
+
+    async with db_pool.acquire() as conn:
+        async with conn.transaction():
+            new_ids = []
+            if new:
+                rows = await db.fetch(
+                    conn, "insert_events",
+                    [e["title"] for e in new],
+                    [links_json(e) for e in new],
+                    [e["starts_at"] for e in new],
+                    [e["ends_at"] for e in new],
+                )
+                new_ids = [row['id'] for row in rows]
+
+            updated_ids = []
+            if updates:
+                rows = await db.fetch(
+                    conn, "update_events",
+                    [e["id"] for _, e in updates],
+                    [e["title"] for _, e in updates],
+                    [links_json(e) for _, e in updates],
+                    [e["starts_at"] for _, e in updates],
+                    [e["ends_at"] for _, e in updates],
+                )
+                updated_ids = [row['id'] for row in rows]
+
+    found = set(updated_ids)
+    missing = [(line, f"no event with id {e['id']}") for line, e in updates if e["id"] not in found]
+
+    # One invalidation for the whole batch: the list, and partial hashes of updated events
+    await invalidate_cache("events:list", *[f"event:{event_id}" for event_id in updated_ids])
+    return new_ids, updated_ids, missing
@@ -0,0 +1,107 @@
+import asyncio
+
+from redis.exceptions import RedisError
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from bot import db, metrics
+from bot.redis_client import redis_client
+from bot.rendering import render_search_results
+from bot.reposts import reposts_enabled
+from bot.serialization import dumps, loads
+from config.settings import EVENT_SEARCH_LIMIT, EVENT_SEARCH_CACHE_TTL, EVENT_SEARCH_DEBOUNCE, EVENT_SEARCH_MAX_QUERY
+
+# ------------------------
+# Inline event search: "@NeliusBot launch" in any chat.
+#
+# Telegram sends an inline query on every keystroke, so:
+#   1. answers are cached per normalized query for EVENT_SEARCH_CACHE_TTL;
+#      a cached shorter prefix that held every match ("complete") answers
+#      longer queries too, filtered locally ("lau" -> "laun" -> "launch")
+#   2. on a cache miss we wait EVENT_SEARCH_DEBOUNCE; if the member typed
+#      again meanwhile, this query is dropped and only the newest one runs
+#   3. Telegram caches each answer on its side for the same TTL
+# ------------------------
+
+SEARCH_KEY = "search:events:{}"
+
+# user id -> id of their newest inline query (for the debounce)
+_latest = {}
+
+
+def normalize_query(text: str) -> str:
+    """'  Launch   WEEK ' -> 'launch week' (capped at EVENT_SEARCH_MAX_QUERY chars)."""
+    return " ".join(text.lower().split())[:EVENT_SEARCH_MAX_QUERY]
+
+
+def _like_pattern(text: str) -> str:
+    # % and _ typed by a member are literal characters, not wildcards
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+async def cached_search(text: str):
+    """Events for `text` from the cache (its own entry or a complete prefix), else None."""
+    # The query itself and every shorter prefix, longest first, in one round trip
+    keys = [SEARCH_KEY.format(text[:n]) for n in range(len(text), -1, -1)]
+    try:
+        cached = await redis_client.mget(keys)
+    except RedisError:
+        return None
+
+    for n, payload in enumerate(cached):
+        if payload is None:
+            continue
+        entry = loads(payload)
+        if n == 0:
+            metrics.incr("search.cache_hit")
+            return entry["events"]
+        if entry["complete"]:
+            # Every event matching the longer query also matched this prefix
+            metrics.incr("search.prefix_hit")
+            return [e for e in entry["events"] if text in e["title"].lower()]
+    return None
+
+
+async def search_events(db_pool, text: str) -> list:
+    """Running events whose title contains `text`, best match first, cached."""
+    async with db_pool.acquire() as conn:
+        rows = await db.fetch(conn, "search_events", _like_pattern(text), text, EVENT_SEARCH_LIMIT)
+
+    events_data = [
+        {"id": row['id'], "title": row['title'], "score": row['publicity_score'], "links": row['links'] or {}}
+        for row in rows
+    ]
+    entry = {"events": events_data, "complete": len(events_data) < EVENT_SEARCH_LIMIT}
+    try:
+        await redis_client.setex(SEARCH_KEY.format(text), EVENT_SEARCH_CACHE_TTL, dumps(entry))
+    except RedisError:
+        pass
+    return events_data
+
+
+async def inline_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.inline_query
+    user_id = query.from_user.id
+    text = normalize_query(query.query)
+    _latest[user_id] = query.id
+
+    try:
+        events_data = await cached_search(text)
+        if events_data is None:
+            await asyncio.sleep(EVENT_SEARCH_DEBOUNCE)
+            if _latest.get(user_id) != query.id:
+                # Superseded by a newer keystroke: Telegram ignores late answers anyway
+                metrics.incr("search.debounced")
+                return
+            metrics.incr("search.miss")
+            try:
+                events_data = await search_events(context.bot_data['db_pool'], text)
+            except db.DatabaseUnavailable:
+                events_data = []
+    finally:
+        if _latest.get(user_id) == query.id:
+            del _latest[user_id]
+
+    await query.answer(render_search_results(events_data, repost_hint=reposts_enabled()),
+                       cache_time=EVENT_SEARCH_CACHE_TTL)
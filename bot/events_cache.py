@@ -0,0 +1,33 @@
+import math
+from datetime import datetime, timezone
+
+from bot import db
+from bot.redis_client import cache_events_list, save_events_snapshot
+from bot.rendering import sort_events
+
+EVENTS_LIST_TTL = 600
+
+
+async def refresh_events_cache(conn) -> list:
+    """Read the events list from Postgres, sorted by score, into the cache and the snapshot.
+
+    The cached copy expires when the next event starts or ends, so the list
+    changes at that exact moment instead of up to ten minutes later.
+    """
+    rows = await db.fetch(conn, "events_list")
+    boundary = await db.fetchval(conn, "next_event_boundary")
+
+    # Build the list by accessing the Record dictionary keys
+    events_data = [
+        {"id": row['id'], "title": row['title'], "score": row['publicity_score']} for row in rows
+    ]
+
+    # 🔥 Sort by score (highest first)
+    events_data = sort_events(events_data)
+
+    ttl = EVENTS_LIST_TTL
+    if boundary is not None:
+        ttl = min(ttl, max(1, math.ceil((boundary - datetime.now(timezone.utc)).total_seconds())))
+    await cache_events_list(events_data, ttl)
+    await save_events_snapshot(events_data)
+    return events_data
@@ -0,0 +1,859 @@
+"""
+In-memory stand-ins for Redis and the asyncpg pool.
+
+They implement exactly what the bot uses, so handlers can be benchmarked,
+profiled and load-tested in-process without live services:
+
+    from bot.fakes import FakeRedis, FakePool
+    from bot.redis_client import use_redis_backend
+
+    use_redis_backend(FakeRedis())
+    app = build_application(FakePool.seeded(users=1000, events=20))
+
+Postgres is faked at the level of our named queries (bot/queries.py): every
+name has a small Python implementation over in-memory tables.
+"""
+import asyncio
+import copy
+import csv
+import fnmatch
+import io
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+import asyncpg
+
+from bot.queries import QUERIES
+from bot.serialization import loads
+
+
+# ------------------------
+# Redis
+# ------------------------
+
+def _str(value):
+    # decode_responses=True: Redis hands everything back as str
+    if isinstance(value, bytes):
+        return value.decode()
+    return str(value)
+
+
+class FakeScript:
+    """Callable like redis-py's Script, backed by a Python emulation of the Lua."""
+
+    def __init__(self, redis, func):
+        self.redis = redis
+        self.func = func
+
+    async def __call__(self, keys=None, args=None, client=None):
+        return self.func(self.redis, keys or [], args or [])
+
+
+def _gcra_emulation(redis, keys, args):
+    now = int(time.time() * 1000)
+    interval, tolerance = float(args[0]), float(args[1])
+    tat = float(redis._get_value(keys[0]) or now)
+    tat = max(tat, now)
+    allow_at = tat - tolerance
+    if now < allow_at:
+        return int(allow_at - now)
+    new_tat = tat + interval
+    redis._set_value(keys[0], str(new_tat), px=int(new_tat - now) + 1)
+    return 0
+
+
+class FakePipeline:
+    """Queues commands like redis-py's asyncio Pipeline and runs them on execute()."""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self._commands = []
+
+    def __getattr__(self, name):
+        method = getattr(self.redis, name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((method, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self):
+        commands, self._commands = self._commands, []
+        return [await method(*args, **kwargs) for method, args, kwargs in commands]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self._commands = []
+
+
+class FakeRedis:
+    """Async, in-memory subset of redis.asyncio.Redis (decode_responses=True)."""
+
+    def __init__(self):
+        self._data = {}
+        self._expires = {}
+
+    # --- internals ---
+
+    def _alive(self, key):
+        expires = self._expires.get(key)
+        if expires is not None and expires <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._data
+
+    def _get_value(self, key, default=None):
+        return self._data[key] if self._alive(key) else default
+
+    def _set_value(self, key, value, ex=None, px=None):
+        self._data[key] = value
+        self._expires.pop(key, None)
+        if ex is not None:
+            self._expires[key] = time.monotonic() + ex
+        elif px is not None:
+            self._expires[key] = time.monotonic() + px / 1000
+
+    def _container(self, key, factory):
+        if not self._alive(key):
+            self._data[key] = factory()
+        return self._data[key]
+
+    # --- generic ---
+
+    async def ping(self):
+        return True
+
+    async def exists(self, *keys):
+        return sum(1 for key in keys if self._alive(key))
+
+    async def delete(self, *keys):
+        removed = 0
+        for key in keys:
+            if self._alive(key):
+                del self._data[key]
+                self._expires.pop(key, None)
+                removed += 1
+        return removed
+
+    async def expire(self, key, seconds):
+        if not self._alive(key):
+            return False
+        self._expires[key] = time.monotonic() + seconds
+        return True
+
+    async def ttl(self, key):
+        if not self._alive(key):
+            return -2
+        expires = self._expires.get(key)
+        return -1 if expires is None else max(0, int(expires - time.monotonic()))
+
+    async def scan_iter(self, match=None, count=None):
+        for key in list(self._data):
+            if self._alive(key) and (match is None or fnmatch.fnmatchcase(key, match)):
+                yield key
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def register_script(self, script):
+        from bot.throttle import GCRA_SCRIPT
+        if script == GCRA_SCRIPT:
+            return FakeScript(self, _gcra_emulation)
+        raise NotImplementedError("FakeRedis has no emulation for this Lua script")
+
+    async def aclose(self):
+        pass
+
+    async def close(self):
+        pass
+
+    # --- strings ---
+
+    async def get(self, key):
+        return self._get_value(key)
+
+    async def set(self, key, value, ex=None, px=None, nx=False, xx=False, get=False):
+        exists = self._alive(key)
+        old = self._data.get(key) if exists else None
+        if (nx and exists) or (xx and not exists):
+            return old if get else None
+        self._set_value(key, _str(value), ex=ex, px=px)
+        return old if get else True
+
+    async def setex(self, key, seconds, value):
+        self._set_value(key, _str(value), ex=seconds)
+        return True
+
+    async def getdel(self, key):
+        value = self._get_value(key)
+        await self.delete(key)
+        return value
+
+    async def mget(self, keys, *more):
+        keys = list(keys) + list(more) if isinstance(keys, (list, tuple)) else [keys, *more]
+        return [self._get_value(key) for key in keys]
+
+    async def incr(self, key, amount=1):
+        return await self.incrby(key, amount)
+
+    async def incrby(self, key, amount=1):
+        value = int(self._get_value(key, 0)) + amount
+        expires = self._expires.get(key)
+        self._data[key] = str(value)
+        if expires is not None:
+            self._expires[key] = expires
+        return value
+
+    # --- lists ---
+
+    async def lpush(self, key, *values):
+        items = self._container(key, deque)
+        items.extendleft(_str(v) for v in values)
+        return len(items)
+
+    async def rpush(self, key, *values):
+        items = self._container(key, deque)
+        items.extend(_str(v) for v in values)
+        return len(items)
+
+    async def rpop(self, key):
+        items = self._get_value(key)
+        if not items:
+            return None
+        value = items.pop()
+        if not items:
+            await self.delete(key)
+        return value
+
+    async def lpop(self, key):
+        items = self._get_value(key)
+        if not items:
+            return None
+        value = items.popleft()
+        if not items:
+            await self.delete(key)
+        return value
+
+    async def llen(self, key):
+        return len(self._get_value(key, []))
+
+    async def lrange(self, key, start, end):
+        items = list(self._get_value(key, []))
+        end = len(items) if end == -1 else end + 1
+        return items[start:end]
+
+    # --- hashes ---
+
+    async def hset(self, key, field=None, value=None, mapping=None):
+        fields = self._container(key, dict)
+        new = 0
+        updates = dict(mapping or {})
+        if field is not None:
+            updates[field] = value
+        for f, v in updates.items():
+            new += f not in fields
+            fields[_str(f)] = _str(v)
+        return new
+
+    async def hget(self, key, field):
+        return self._get_value(key, {}).get(_str(field))
+
+    async def hmget(self, key, keys, *args):
+        fields = self._get_value(key, {})
+        return [fields.get(_str(f)) for f in [*keys, *args]]
+
+    async def hgetall(self, key):
+        return dict(self._get_value(key, {}))
+
+    async def hdel(self, key, *fields):
+        values = self._get_value(key, {})
+        removed = sum(1 for f in fields if values.pop(_str(f), None) is not None)
+        if key in self._data and not values:
+            await self.delete(key)
+        return removed
+
+    async def hincrby(self, key, field, amount=1):
+        fields = self._container(key, dict)
+        fields[_str(field)] = str(int(fields.get(_str(field), 0)) + amount)
+        return int(fields[_str(field)])
+
+    # --- sets ---
+
+    async def sadd(self, key, *members):
+        members_set = self._container(key, set)
+        before = len(members_set)
+        members_set.update(_str(m) for m in members)
+        return len(members_set) - before
+
+    async def sismember(self, key, member):
+        return _str(member) in self._get_value(key, set())
+
+    async def smembers(self, key):
+        return set(self._get_value(key, set()))
+
+    async def srem(self, key, *members):
+        members_set = self._get_value(key, set())
+        removed = sum(1 for m in members if _str(m) in members_set)
+        members_set.difference_update(_str(m) for m in members)
+        return removed
+
+    async def spop(self, key, count=None):
+        members_set = self._get_value(key, set())
+        popped = [members_set.pop() for _ in range(min(count or 1, len(members_set)))]
+        if count is None:
+            return popped[0] if popped else None
+        return popped
+
+    async def scard(self, key):
+        return len(self._get_value(key, set()))
+
+    # --- sorted sets ---
+
+    async def zadd(self, key, mapping, nx=False, xx=False):
+        scores = self._container(key, dict)
+        added = 0
+        for member, score in mapping.items():
+            member = _str(member)
+            if (nx and member in scores) or (xx and member not in scores):
+                continue
+            added += member not in scores
+            scores[member] = float(score)
+        return added
+
+    async def zincrby(self, key, amount, member):
+        scores = self._container(key, dict)
+        member = _str(member)
+        scores[member] = scores.get(member, 0.0) + amount
+        return scores[member]
+
+    async def zscore(self, key, member):
+        return self._get_value(key, {}).get(_str(member))
+
+    async def zrem(self, key, *members):
+        scores = self._get_value(key, {})
+        return sum(1 for m in members if scores.pop(_str(m), None) is not None)
+
+    async def zcard(self, key):
+        return len(self._get_value(key, {}))
+
+    def _zsorted(self, key, desc):
+        return sorted(self._get_value(key, {}).items(), key=lambda kv: (kv[1], kv[0]), reverse=desc)
+
+    async def zrange(self, key, start, end, desc=False, withscores=False):
+        items = self._zsorted(key, desc)
+        end = len(items) if end == -1 else end + 1
+        items = items[start:end]
+        return items if withscores else [member for member, _ in items]
+
+    async def zrevrange(self, key, start, end, withscores=False):
+        return await self.zrange(key, start, end, desc=True, withscores=withscores)
+
+    async def zremrangebyrank(self, key, start, end):
+        items = self._zsorted(key, False)
+        end = len(items) if end == -1 else end + 1
+        doomed = items[start:end]
+        scores = self._get_value(key, {})
+        for member, _ in doomed:
+            scores.pop(member, None)
+        return len(doomed)
+
+    # --- HyperLogLog (exact sets are fine at fake scale) ---
+
+    async def pfadd(self, key, *values):
+        return 1 if await self.sadd(key, *values) else 0
+
+    async def pfcount(self, *keys):
+        merged = set()
+        for key in keys:
+            merged |= self._get_value(key, set())
+        return len(merged)
+
+    # --- streams ---
+
+    async def xadd(self, key, fields, id="*", maxlen=None, approximate=True):
+        entries = self._container(key, list)
+        last_ms, last_seq = (map(int, entries[-1][0].split("-")) if entries else (0, -1))
+        now_ms = int(time.time() * 1000)
+        entry_id = f"{now_ms}-0" if now_ms > last_ms else f"{last_ms}-{last_seq + 1}"
+        entries.append((entry_id, {_str(k): _str(v) for k, v in fields.items()}))
+        if maxlen is not None and len(entries) > maxlen:
+            del entries[: len(entries) - maxlen]
+        return entry_id
+
+    @staticmethod
+    def _stream_id(entry_id):
+        ms, _, seq = entry_id.partition("-")
+        return int(ms), int(seq or 0)
+
+    async def xrange(self, key, min="-", max="+", count=None):
+        result = []
+        for entry_id, fields in self._get_value(key, []):
+            if min not in ("-",) and self._stream_id(entry_id) < self._stream_id(min.lstrip("(")):
+                continue
+            if min.startswith("(") and entry_id == min[1:]:
+                continue
+            if max != "+" and self._stream_id(entry_id) > self._stream_id(max):
+                continue
+            result.append((entry_id, dict(fields)))
+            if count and len(result) >= count:
+                break
+        return result
+
+    async def xdel(self, key, *ids):
+        entries = self._get_value(key, [])
+        before = len(entries)
+        entries[:] = [e for e in entries if e[0] not in ids]
+        return before - len(entries)
+
+    async def xlen(self, key):
+        return len(self._get_value(key, []))
+
+
+# ------------------------
+# Postgres (named queries over in-memory tables)
+# ------------------------
+
+class FakeDatabase:
+    """The tables our queries touch, as plain Python dicts."""
+
+    def __init__(self):
+        self.users = {}     # telegram_id -> row dict
+        self.events = {}    # id -> row dict
+        self.events_archive = {}  # id -> archived event row dict
+        self.reposts = {}   # id -> repost_submissions row dict
+        self.ledger = []    # points_ledger rows
+        self._user_ids = itertools.count(1)
+        self._event_ids = itertools.count(1)
+        self._repost_ids = itertools.count(1)
+
+    def add_user(self, telegram_id, social_id, phone_number=None, points=0, handles=None):
+        if telegram_id in self.users or any(u["social_id"] == social_id for u in self.users.values()):
+            raise asyncpg.exceptions.UniqueViolationError("duplicate key value violates unique constraint")
+        row = {
+            "id": next(self._user_ids),
+            "telegram_id": telegram_id,
+            "social_id": social_id,
+            "phone_number": phone_number,
+            "points": points,
+            "created_at": datetime.now(),
+            "handles": handles,
+        }
+        self.users[telegram_id] = row
+        return row
+
+    def add_event(self, title, links=None, publicity_score=0, starts_at=None, ends_at=None):
+        row = {"id": next(self._event_ids), "title": title, "links": links, "publicity_score": publicity_score,
+               "starts_at": starts_at, "ends_at": ends_at}
+        self.events[row["id"]] = row
+        return row
+
+    def user_by_social_id(self, social_id):
+        return next((u for u in self.users.values() if u["social_id"] == social_id), None)
+
+
+def _pick(row, *columns):
+    return {column: row[column] for column in columns}
+
+
+def _q_user_profile(db, telegram_id):
+    user = db.users.get(telegram_id)
+    return ([_pick(user, "social_id", "points")] if user else []), None
+
+
+def _q_user_full_profile(db, telegram_id):
+    user = db.users.get(telegram_id)
+    return ([_pick(user, "social_id", "points", "phone_number", "handles")] if user else []), None
+
+
+def _q_user_phone(db, telegram_id):
+    user = db.users.get(telegram_id)
+    return ([_pick(user, "phone_number")] if user else []), None
+
+
+def _q_insert_user(db, telegram_id, social_id):
+    db.add_user(telegram_id, social_id)
+    return [], "INSERT 0 1"
+
+
+def _q_set_phone(db, phone_number, telegram_id):
+    user = db.users.get(telegram_id)
+    if user:
+        user["phone_number"] = phone_number
+    return [], f"UPDATE {int(bool(user))}"
+
+
+def _q_set_handle(db, platform, handle, telegram_id):
+    user = db.users.get(telegram_id)
+    if user:
+        user["handles"] = {**(user["handles"] or {}), platform: handle}
+    return [], f"UPDATE {int(bool(user))}"
+
+
+def _q_allocate_points(db, points, social_id):
+    user = db.user_by_social_id(social_id)
+    if user:
+        user["points"] += points
+    return [], f"UPDATE {int(bool(user))}"
+
+
+def _running(event):
+    now = datetime.now(timezone.utc)
+    return ((event["starts_at"] is None or event["starts_at"] <= now)
+            and (event["ends_at"] is None or event["ends_at"] > now))
+
+
+def _q_events_list(db):
+    rows = [_pick(e, "id", "title", "publicity_score") for e in db.events.values() if _running(e)]
+    return sorted(rows, key=lambda r: r["id"], reverse=True), None
+
+
+def _q_event_detail(db, event_id):
+    event = db.events.get(event_id)
+    return ([_pick(event, "title", "publicity_score", "links")] if event and _running(event) else []), None
+
+
+def _q_event_title(db, event_id):
+    event = db.events.get(event_id)
+    return ([_pick(event, "title")] if event else []), None
+
+
+def _q_insert_event(db, title, links, starts_at=None, ends_at=None):
+    return [{"id": db.add_event(title, links, starts_at=starts_at, ends_at=ends_at)["id"]}], "INSERT 0 1"
+
+
+def _q_update_event(db, title, links, event_id, starts_at=None, ends_at=None):
+    event = db.events.get(event_id)
+    if event:
+        if title is not None:
+            event["title"] = title
+        if links is not None:
+            event["links"] = {**(event["links"] or {}), **links}
+        if starts_at is not None:
+            event["starts_at"] = starts_at
+        if ends_at is not None:
+            event["ends_at"] = ends_at
+    return [], f"UPDATE {int(bool(event))}"
+
+
+def _q_set_publicity_score(db, score, event_id):
+    event = db.events.get(event_id)
+    if event:
+        event["publicity_score"] = score
+    return [], f"UPDATE {int(bool(event))}"
+
+
+def _q_delete_event(db, event_id):
+    return [], f"DELETE {int(db.events.pop(event_id, None) is not None)}"
+
+
+def _lookup_row(user):
+    return _pick(user, "telegram_id", "social_id", "points", "phone_number", "handles")
+
+
+def _q_user_by_handle(platform):
+    def query(db, handle):
+        for user in db.users.values():
+            value = (user["handles"] or {}).get(platform)
+            if value and value.lstrip("@").lower() == handle:
+                return [_lookup_row(user)], None
+        return [], None
+    return query
+
+
+def _q_user_by_phone(db, digits):
+    for user in db.users.values():
+        if "".join(ch for ch in user["phone_number"] or "" if ch.isdigit()) == digits:
+            return [_lookup_row(user)], None
+    return [], None
+
+
+def _q_insert_repost(db, telegram_id, event_id, platform, url):
+    for r in db.reposts.values():
+        if r["url"] == url or (r["telegram_id"], r["event_id"], r["platform"]) == (telegram_id, event_id, platform):
+            return [], "INSERT 0 0"
+    row = {"id": next(db._repost_ids), "telegram_id": telegram_id, "event_id": event_id,
+           "platform": platform, "url": url, "status": "pending", "reason": None}
+    db.reposts[row["id"]] = row
+    return [{"id": row["id"]}], "INSERT 0 1"
+
+
+def _q_pending_reposts(db):
+    rows = [_pick(r, "id", "telegram_id", "event_id", "platform", "url")
+            for r in db.reposts.values() if r["status"] == "pending"]
+    return rows, None
+
+
+def _q_credit_reposts(db, submission_ids, telegram_ids, points, boost):
+    credited = {row["submission_id"] for row in db.ledger}
+    for submission_id, telegram_id, amount in zip(submission_ids, telegram_ids, points):
+        if submission_id in credited:
+            continue
+        db.ledger.append({"telegram_id": telegram_id, "points": amount, "reason": "repost",
+                          "submission_id": submission_id})
+        if telegram_id in db.users:
+            db.users[telegram_id]["points"] += amount
+        event = db.events.get(db.reposts[submission_id]["event_id"])
+        if event:
+            event["publicity_score"] += boost
+    for submission_id in submission_ids:
+        db.reposts[submission_id].update(status="verified", reason=None)
+    return [], f"UPDATE {len(submission_ids)}"
+
+
+def _q_reject_reposts(db, submission_ids, reasons):
+    updated = 0
+    for submission_id, reason in zip(submission_ids, reasons):
+        row = db.reposts.get(submission_id)
+        if row and row["status"] == "pending":
+            row.update(status="rejected", reason=reason)
+            updated += 1
+    return [], f"UPDATE {updated}"
+
+
+def _q_add_publicity_scores(db, event_ids, deltas):
+    updated = 0
+    for event_id, delta in zip(event_ids, deltas):
+        event = db.events.get(event_id)
+        if event:
+            event["publicity_score"] += delta
+            updated += 1
+    return [], f"UPDATE {updated}"
+
+
+def _q_user_profiles(db, telegram_ids):
+    rows = [_pick(db.users[t], "telegram_id", "social_id", "points") for t in telegram_ids if t in db.users]
+    return rows, None
+
+
+def _q_top_members(db, limit):
+    users = sorted(db.users.values(), key=lambda u: (-u["points"], u["id"]))[:limit]
+    return [_pick(u, "social_id", "points") for u in users], None
+
+
+def _q_member_totals(db):
+    return [{"members": len(db.users), "points": sum(u["points"] for u in db.users.values())}], None
+
+
+def _q_event_ids(db):
+    return [{"id": event_id} for event_id in db.events], None
+
+
+def _q_insert_events(db, titles, links, starts, ends):
+    rows = [{"id": db.add_event(title, loads(link) if link else None, starts_at=start, ends_at=end)["id"]}
+            for title, link, start, end in zip(titles, links, starts, ends)]
+    return rows, f"INSERT 0 {len(rows)}"
+
+
+def _q_update_events(db, event_ids, titles, links, starts, ends):
+    updated = []
+    for event_id, title, link, start, end in zip(event_ids, titles, links, starts, ends):
+        _, status = _q_update_event(db, title, loads(link) if link else None, event_id, start, end)
+        if status == "UPDATE 1":
+            updated.append({"id": event_id})
+    return updated, f"UPDATE {len(updated)}"
+
+
+def _q_search_events(db, pattern, text, limit):
+    # `text` is the unescaped search text behind the ILIKE pattern
+    matches = [e for e in db.events.values() if _running(e) and text.lower() in (e["title"] or "").lower()]
+    matches.sort(key=lambda e: (e["publicity_score"], e["id"]), reverse=True)
+    return [_pick(e, "id", "title", "publicity_score", "links") for e in matches[:limit]], None
+
+
+def _q_next_event_boundary(db):
+    now = datetime.now(timezone.utc)
+    upcoming = [t for e in db.events.values() for t in (e["starts_at"], e["ends_at"]) if t is not None and t > now]
+    return [{"least": min(upcoming, default=None)}], None
+
+
+def _q_archive_expired_events(db, limit):
+    now = datetime.now(timezone.utc)
+    expired = sorted((e for e in db.events.values() if e["ends_at"] is not None and e["ends_at"] <= now),
+                     key=lambda e: e["ends_at"])[:limit]
+    for event in expired:
+        db.events_archive[event["id"]] = {**db.events.pop(event["id"]), "archived_at": now}
+    return [{"id": e["id"]} for e in expired], f"INSERT 0 {len(expired)}"
+
+
+# Every named query in bot/queries.py needs an entry here
+QUERY_IMPLEMENTATIONS = {
+    "user_profile": _q_user_profile,
+    "user_full_profile": _q_user_full_profile,
+    "user_phone": _q_user_phone,
+    "insert_user": _q_insert_user,
+    "set_phone": _q_set_phone,
+    "set_handle": _q_set_handle,
+    "allocate_points": _q_allocate_points,
+    "events_list": _q_events_list,
+    "event_detail": _q_event_detail,
+    "event_title": _q_event_title,
+    "insert_event": _q_insert_event,
+    "update_event": _q_update_event,
+    "set_publicity_score": _q_set_publicity_score,
+    "delete_event": _q_delete_event,
+    "user_by_x_handle": _q_user_by_handle("x"),
+    "user_by_instagram_handle": _q_user_by_handle("instagram"),
+    "user_by_tiktok_handle": _q_user_by_handle("tiktok"),
+    "user_by_phone": _q_user_by_phone,
+    "insert_repost": _q_insert_repost,
+    "pending_reposts": _q_pending_reposts,
+    "credit_reposts": _q_credit_reposts,
+    "reject_reposts": _q_reject_reposts,
+    "add_publicity_scores": _q_add_publicity_scores,
+    "user_profiles": _q_user_profiles,
+    "top_members": _q_top_members,
+    "member_totals": _q_member_totals,
+    "event_ids": _q_event_ids,
+    "insert_events": _q_insert_events,
+    "update_events": _q_update_events,
+    "search_events": _q_search_events,
+    "next_event_boundary": _q_next_event_boundary,
+    "archive_expired_events": _q_archive_expired_events,
+}
+_NAMES_BY_SQL = {sql: name for name, sql in QUERIES.items()}
+
+
+class FakeStatement:
+    """Quacks like asyncpg's PreparedStatement for one named query."""
+
+    def __init__(self, connection, name):
+        self.connection = connection
+        self.name = name
+        self._status = None
+
+    async def _run(self, args):
+        if self.connection.latency:
+            await asyncio.sleep(self.connection.latency)
+        rows, status = QUERY_IMPLEMENTATIONS[self.name](self.connection.db, *args)
+        self._status = status or f"SELECT {len(rows)}"
+        return rows
+
+    async def fetch(self, *args):
+        return await self._run(args)
+
+    async def fetchrow(self, *args):
+        rows = await self._run(args)
+        return rows[0] if rows else None
+
+    async def fetchval(self, *args, column=0):
+        row = await self.fetchrow(*args)
+        return list(row.values())[column] if row else None
+
+    def get_statusmsg(self):
+        return self._status
+
+
+class FakeConnection:
+    def __init__(self, db, latency=0.0):
+        self.db = db
+        self.latency = latency
+        self.statements = {}
+
+    async def prepare(self, sql):
+        name = _NAMES_BY_SQL.get(sql)
+        if name is None or name not in QUERY_IMPLEMENTATIONS:
+            raise NotImplementedError(f"FakeConnection has no implementation for: {sql.strip()[:60]}")
+        return FakeStatement(self, name)
+
+    @asynccontextmanager
+    async def transaction(self):
+        # Rolls back like Postgres: a block that raises leaves no writes behind.
+        # Id counters keep counting, as sequences do.
+        snapshot = copy.deepcopy({name: value for name, value in vars(self.db).items()
+                                  if isinstance(value, (dict, list))})
+        try:
+            yield
+        except BaseException:
+            # In place, so anything holding a table (pool.db.users, ...) sees the rollback
+            for name, value in snapshot.items():
+                table = getattr(self.db, name)
+                if isinstance(table, dict):
+                    table.clear()
+                    table.update(value)
+                else:
+                    table[:] = value
+            raise
+
+    async def copy_from_query(self, query, output, format="csv", header=True):
+        # Only used by /dump_db: "SELECT * FROM <table>"
+        table = query.split()[-1]
+        rows = list(getattr(self.db, table, {}).values())
+        text = io.StringIO()
+        if rows:
+            writer = csv.DictWriter(text, fieldnames=list(rows[0]))
+            if header:
+                writer.writeheader()
+            writer.writerows(rows)
+        output.write(text.getvalue().encode())
+
+
+class _FakeAcquireContext:
+    def __init__(self, pool):
+        self.pool = pool
+        self.conn = None
+
+    def __await__(self):
+        return self.pool._acquire().__await__()
+
+    async def __aenter__(self):
+        self.conn = await self.pool._acquire()
+        return self.conn
+
+    async def __aexit__(self, *exc_info):
+        await self.pool.release(self.conn)
+
+
+class FakePool:
+    """Same interface as the asyncpg pool the handlers get from bot_data['db_pool']."""
+
+    def __init__(self, db=None, max_size=10, latency=0.0):
+        self.db = db or FakeDatabase()
+        self.latency = latency
+        self._max_size = max_size
+        self._slots = asyncio.Semaphore(max_size)
+        self._in_use = 0
+
+    @classmethod
+    def seeded(cls, users=1000, events=20, first_user_id=1, **kwargs):
+        """A pool whose database already holds `users` members and `events` campaigns."""
+        pool = cls(**kwargs)
+        for i in range(users):
+            pool.db.add_user(first_user_id + i, f"FakeSocialId{first_user_id + i}", points=i % 500,
+                             phone_number=f"+234810{i:07d}", handles={"x": f"@fake{i}"})
+        for i in range(events):
+            pool.db.add_event(f"Campaign #{i + 1}", {"x": f"https://x.com/nelius/status/{i + 1}"},
+                              publicity_score=(i * 37) % 101)
+        return pool
+
+    def acquire(self, timeout=None):
+        # Like asyncpg: usable as `async with pool.acquire()` or `await pool.acquire()`
+        return _FakeAcquireContext(self)
+
+    async def _acquire(self):
+        await self._slots.acquire()
+        self._in_use += 1
+        return FakeConnection(self.db, self.latency)
+
+    async def release(self, conn):
+        self._in_use -= 1
+        self._slots.release()
+
+    def get_max_size(self):
+        return self._max_size
+
+    def get_size(self):
+        return self._max_size
+
+    def get_idle_size(self):
+        return self._max_size - self._in_use
+
+    async def expire_connections(self):
+        pass
+
+    async def close(self):
+        pass
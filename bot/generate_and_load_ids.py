@@ -12,6 +12,9 @@ from bot.redis_client import redis_client
 from bot.variables import fruits, colors, adjectives
 
 LIST_KEY = "nelius:available_ids"
+# Social IDs already held by a member (assigned by the bot or imported from the
+# legacy database); never pushed back into the available list
+USED_KEY = "nelius:used_ids"
 
 def generate_social_ids():
     """Generates strings in memory. No I/O, so it stays synchronous."""
@@ -25,8 +28,11 @@ async def load_to_redis():
     # Clear previous list to avoid duplicates
     await redis_client.delete(LIST_KEY)
     
-    all_ids = generate_social_ids()
-    
+    used = await redis_client.smembers(USED_KEY)
+    all_ids = [social_id for social_id in generate_social_ids() if social_id not in used]
+    if used:
+        print(f"Skipped {len(used)} Social IDs that are already in use.")
+
     # Push all IDs into Redis list
     await redis_client.lpush(LIST_KEY, *all_ids)
     print(f"Loaded {len(all_ids)} Social IDs into Redis list '{LIST_KEY}'.")
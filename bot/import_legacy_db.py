@@ -0,0 +1,260 @@
+"""
+One-off importer from the legacy SQLite database (neliusdao.db) into Postgres.
+
+    python bot/import_legacy_db.py                     # ./neliusdao.db
+    python bot/import_legacy_db.py old.db --chunk-size 2000
+    python bot/import_legacy_db.py --restart           # forget progress, import again
+
+Rows are read from SQLite in id order, one chunk at a time, so memory stays
+flat however big the file is. Each user's rows in the legacy social_handles
+table are folded into the users.handles JSONB object. Every chunk is COPYed
+into a staging table and merged into the live tables in one transaction,
+together with its progress row in legacy_import_progress: a crashed or
+interrupted import picks up after the last committed chunk.
+
+Merging into users (matched on telegram_id) never overwrites live data:
+existing phone numbers and handles win, points keep the higher value. A
+legacy user whose social_id already belongs to another member is skipped
+and reported, and so is one without a telegram_id (nothing to match it on,
+so every re-run would insert it again). Imported social IDs are marked as
+used in the Redis allocator.
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from bot import db
+from bot.generate_and_load_ids import USED_KEY
+from bot.migrations import migrate
+from bot.redis_client import redis_client
+from bot.serialization import dumps
+from config.settings import close_db_pool
+
+DEFAULT_PATH = os.path.join(ROOT_DIR, "neliusdao.db")
+DEFAULT_CHUNK_SIZE = 1000
+
+STAGE_USERS = """
+    CREATE TEMP TABLE legacy_users_stage (
+        telegram_id BIGINT,
+        social_id TEXT,
+        phone_number TEXT,
+        points INTEGER,
+        created_at TIMESTAMP,
+        handles TEXT  -- JSON text, cast on merge (COPY is binary, no JSONB codec)
+    ) ON COMMIT DROP
+"""
+
+# Legacy users holding a social_id another member already has can't be merged
+DROP_SOCIAL_ID_CONFLICTS = """
+    DELETE FROM legacy_users_stage s
+    USING users u
+    WHERE u.social_id = s.social_id
+      AND u.telegram_id IS DISTINCT FROM s.telegram_id
+    RETURNING s.telegram_id, s.social_id
+"""
+
+MERGE_USERS = """
+    INSERT INTO users (telegram_id, social_id, phone_number, points, created_at, handles)
+    SELECT telegram_id, social_id, phone_number, COALESCE(points, 0),
+           COALESCE(created_at, CURRENT_TIMESTAMP), handles::jsonb
+    FROM legacy_users_stage
+    ON CONFLICT (telegram_id) DO UPDATE
+    SET phone_number = COALESCE(users.phone_number, EXCLUDED.phone_number),
+        points = GREATEST(users.points, EXCLUDED.points),
+        handles = COALESCE(EXCLUDED.handles, '{}'::jsonb) || COALESCE(users.handles, '{}'::jsonb)
+"""
+
+STAGE_EVENTS = """
+    CREATE TEMP TABLE legacy_events_stage (
+        title TEXT,
+        publicity_score INTEGER
+    ) ON COMMIT DROP
+"""
+
+# Legacy events get fresh ids (the live table has its own sequence); the
+# progress row committed alongside is what stops a resumed run duplicating them
+MERGE_EVENTS = """
+    INSERT INTO events (title, publicity_score)
+    SELECT title, COALESCE(publicity_score, 0) FROM legacy_events_stage
+"""
+
+SAVE_PROGRESS = """
+    INSERT INTO legacy_import_progress (source, table_name, last_id, imported, skipped)
+    VALUES ($1, $2, $3, $4, $5)
+    ON CONFLICT (source, table_name) DO UPDATE
+    SET last_id = EXCLUDED.last_id,
+        imported = legacy_import_progress.imported + EXCLUDED.imported,
+        skipped = legacy_import_progress.skipped + EXCLUDED.skipped,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+
+# ------------------------
+# SQLite side (blocking: always called through asyncio.to_thread)
+# ------------------------
+
+def _open_sqlite(path: str):
+    # Read-only, and usable from whichever worker thread to_thread picks
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _read_users_chunk(conn, after_id: int, limit: int):
+    """Next `limit` users after `after_id`, each with its handles folded into a dict."""
+    users = conn.execute(
+        "SELECT id, telegram_id, social_id, phone_number, points, created_at "
+        "FROM users WHERE id > ? ORDER BY id LIMIT ?",
+        (after_id, limit),
+    ).fetchall()
+    if not users:
+        return []
+
+    handles = {}
+    for row in conn.execute(
+        "SELECT user_id, platform, handle FROM social_handles "
+        "WHERE user_id > ? AND user_id <= ? AND handle IS NOT NULL",
+        (after_id, users[-1]["id"]),
+    ):
+        handles.setdefault(row["user_id"], {})[row["platform"]] = row["handle"]
+
+    return [(dict(user), handles.get(user["id"])) for user in users]
+
+
+def _timestamp(value):
+    # SQLite hands CURRENT_TIMESTAMP back as text; binary COPY wants a datetime
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _read_events_chunk(conn, after_id: int, limit: int):
+    return [dict(row) for row in conn.execute(
+        "SELECT id, title, publicity_score FROM events WHERE id > ? ORDER BY id LIMIT ?",
+        (after_id, limit),
+    )]
+
+
+# ------------------------
+# Postgres side
+# ------------------------
+
+async def _last_id(conn, source: str, table: str) -> int:
+    return await conn.fetchval(
+        "SELECT last_id FROM legacy_import_progress WHERE source = $1 AND table_name = $2",
+        source, table,
+    ) or 0
+
+
+async def _import_users(conn, lite, source: str, chunk_size: int):
+    after_id = await _last_id(conn, source, "users")
+    imported = skipped = 0
+
+    while True:
+        chunk = await asyncio.to_thread(_read_users_chunk, lite, after_id, chunk_size)
+        if not chunk:
+            break
+
+        # ON CONFLICT (telegram_id) never fires for a NULL telegram_id
+        orphans = [user for user, _ in chunk if user["telegram_id"] is None]
+        for user in orphans:
+            print(f"⚠️ Skipped legacy user #{user['id']}: no telegram_id")
+
+        records = [
+            (user["telegram_id"], user["social_id"], user["phone_number"], user["points"],
+             _timestamp(user["created_at"]), dumps(handles) if handles else None)
+            for user, handles in chunk
+            if user["telegram_id"] is not None
+        ]
+        last_id = chunk[-1][0]["id"]
+
+        async with conn.transaction():
+            await conn.execute(STAGE_USERS)
+            await conn.copy_records_to_table(
+                "legacy_users_stage", records=records,
+                columns=["telegram_id", "social_id", "phone_number", "points", "created_at", "handles"],
+            )
+            conflicts = await conn.fetch(DROP_SOCIAL_ID_CONFLICTS)
+            for row in conflicts:
+                print(f"⚠️ Skipped legacy user {row['telegram_id']}: Social ID {row['social_id']} is taken")
+            await conn.execute(MERGE_USERS)
+
+            # Before commit: if the commit fails these IDs are merely wasted,
+            # never handed out twice
+            social_ids = [r[1] for r in records if r[1]]
+            if social_ids:
+                await redis_client.sadd(USED_KEY, *social_ids)
+
+            await conn.execute(SAVE_PROGRESS, source, "users", last_id,
+                               len(records) - len(conflicts), len(conflicts) + len(orphans))
+
+        imported += len(records) - len(conflicts)
+        skipped += len(conflicts) + len(orphans)
+        after_id = last_id
+        print(f"👥 Users: {imported} imported, {skipped} skipped (legacy id {last_id})")
+
+    return imported, skipped
+
+
+async def _import_events(conn, lite, source: str, chunk_size: int):
+    after_id = await _last_id(conn, source, "events")
+    imported = 0
+
+    while True:
+        chunk = await asyncio.to_thread(_read_events_chunk, lite, after_id, chunk_size)
+        if not chunk:
+            break
+
+        async with conn.transaction():
+            await conn.execute(STAGE_EVENTS)
+            await conn.copy_records_to_table(
+                "legacy_events_stage",
+                records=[(event["title"], event["publicity_score"]) for event in chunk],
+                columns=["title", "publicity_score"],
+            )
+            await conn.execute(MERGE_EVENTS)
+            await conn.execute(SAVE_PROGRESS, source, "events", chunk[-1]["id"], len(chunk), 0)
+
+        imported += len(chunk)
+        after_id = chunk[-1]["id"]
+        print(f"🎉 Events: {imported} imported (legacy id {after_id})")
+
+    return imported
+
+
+async def import_legacy_db(path: str = DEFAULT_PATH, chunk_size: int = DEFAULT_CHUNK_SIZE, restart: bool = False):
+    """Import users (with folded handles) and events from the legacy SQLite file."""
+    source = os.path.basename(path)
+    lite = await asyncio.to_thread(_open_sqlite, path)
+    db_pool = await db.create_db_pool()
+    try:
+        await migrate(db_pool)
+        async with db_pool.acquire() as conn:
+            if restart:
+                await conn.execute("DELETE FROM legacy_import_progress WHERE source = $1", source)
+
+            users, skipped = await _import_users(conn, lite, source, chunk_size)
+            events = await _import_events(conn, lite, source, chunk_size)
+
+        print(f"✅ Imported {users} users ({skipped} skipped) and {events} events from {source}")
+        if events:
+            # The cached events list predates the import
+            await redis_client.delete("events:list")
+    finally:
+        await asyncio.to_thread(lite.close)
+        await close_db_pool(db_pool)
+        await redis_client.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import the legacy SQLite database into Postgres.")
+    parser.add_argument("path", nargs="?", default=DEFAULT_PATH)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--restart", action="store_true", help="ignore saved progress (users are merged again, events added again)")
+    args = parser.parse_args()
+    asyncio.run(import_legacy_db(args.path, args.chunk_size, args.restart))
@@ -0,0 +1,75 @@
+import httpx
+from telegram.ext import ConversationHandler
+from telegram.request import HTTPXRequest
+
+from bot import metrics
+from config.settings import (TELEGRAM_POOL_SIZE, TELEGRAM_KEEPALIVE_CONNECTIONS, TELEGRAM_KEEPALIVE_EXPIRY,
+                             TELEGRAM_POOL_TIMEOUT)
+
+
+def _wrap_handler(handler):
+    if isinstance(handler, ConversationHandler):
+        # Conversations don't have a callback of their own, time the steps inside
+        for inner in handler.entry_points + handler.fallbacks:
+            _wrap_handler(inner)
+        for state_handlers in handler.states.values():
+            for inner in state_handlers:
+                _wrap_handler(inner)
+        return
+
+    callback = getattr(handler, "callback", None)
+    if callback is None or getattr(callback, "_timed", False):
+        return
+
+    timed_callback = metrics.timed(f"handler.{callback.__name__}")(callback)
+    timed_callback._timed = True
+    handler.callback = timed_callback
+
+
+def instrument_handlers(app):
+    """Wrap every registered handler callback with a latency histogram (handler.<name>)."""
+    for handlers in app.handlers.values():
+        for handler in handlers:
+            _wrap_handler(handler)
+
+
+class InstrumentedRequest(HTTPXRequest):
+    """HTTPXRequest that times every Bot API call as telegram.<method>.
+
+    Also counts failed calls (telegram.<method>.errors) and reports the calls
+    in flight (telegram.in_flight) next to the pool size, to size the pool.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.in_flight = 0
+        metrics.register_gauge("telegram.in_flight", lambda: self.in_flight)
+
+    async def do_request(self, url, method, request_data=None, *args, **kwargs):
+        # url looks like https://api.telegram.org/bot<token>/sendMessage
+        api_method = url.rsplit("/", 1)[-1]
+        self.in_flight += 1
+        try:
+            with metrics.timer(f"telegram.{api_method}"):
+                return await super().do_request(url, method, request_data, *args, **kwargs)
+        except Exception:
+            metrics.incr(f"telegram.{api_method}.errors")
+            raise
+        finally:
+            self.in_flight -= 1
+
+
+def create_bot_request() -> InstrumentedRequest:
+    """The shared Bot API client: one pool of kept-alive connections for every outbound call."""
+    metrics.register_gauge("telegram.pool_size", lambda: TELEGRAM_POOL_SIZE)
+    return InstrumentedRequest(
+        connection_pool_size=TELEGRAM_POOL_SIZE,
+        pool_timeout=TELEGRAM_POOL_TIMEOUT,
+        # Replaces the limits HTTPXRequest derives from connection_pool_size:
+        # keep fewer idle connections than the burst size, and let them expire
+        httpx_kwargs={"limits": httpx.Limits(
+            max_connections=TELEGRAM_POOL_SIZE,
+            max_keepalive_connections=min(TELEGRAM_KEEPALIVE_CONNECTIONS, TELEGRAM_POOL_SIZE),
+            keepalive_expiry=TELEGRAM_KEEPALIVE_EXPIRY,
+        )},
+    )
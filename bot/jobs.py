@@ -0,0 +1,107 @@
+from redis.exceptions import RedisError
+
+from bot import db, engagement, metrics
+from bot.events_cache import refresh_events_cache
+from bot.leaderboard import refresh_leaderboard
+from bot.nelius_dev import set_bot_commands
+from bot.redis_client import redis_client, cache_user_profile, get_hot_users, HOT_USERS_KEY
+from bot.scheduler import schedule
+from config.settings import (EVENTS_WARM_INTERVAL, HOT_PROFILES_WARM_INTERVAL, HOT_PROFILES_LIMIT,
+                             LEADERBOARD_REFRESH_INTERVAL, REDIS_COMPACT_INTERVAL, BOT_COMMANDS_REFRESH_INTERVAL,
+                             ENGAGEMENT_FOLD_INTERVAL, EVENTS_ARCHIVE_INTERVAL, EVENTS_ARCHIVE_BATCH)
+
+# ------------------------
+# Background jobs. Each gets app, runs on the background lane, and is
+# scheduled once per period across all replicas (see bot/scheduler.py).
+# ------------------------
+
+
+async def warm_events(app):
+    """Reload the events list before its 10 minute cache TTL runs out."""
+    async with app.bot_data['db_pool'].acquire() as conn:
+        await refresh_events_cache(conn)
+
+
+async def archive_events(app):
+    """Move ended events to events_archive, EVENTS_ARCHIVE_BATCH at a time.
+
+    Members stop seeing an event the moment it ends (the list queries filter on
+    ends_at and the cached list expires at that boundary); this only keeps the
+    events table, and so every list query, small.
+    """
+    archived = 0
+    async with app.bot_data['db_pool'].acquire() as conn:
+        while True:
+            moved = len(await db.fetch(conn, "archive_expired_events", EVENTS_ARCHIVE_BATCH))
+            archived += moved
+            if moved < EVENTS_ARCHIVE_BATCH:
+                break
+    if archived:
+        metrics.incr("events.archived", archived)
+        print(f"📦 Archived {archived} ended events")
+
+
+async def warm_hot_profiles(app):
+    """Re-cache the profiles of recently active members in one query."""
+    user_ids = await get_hot_users(HOT_PROFILES_LIMIT)
+    if not user_ids:
+        return
+    async with app.bot_data['db_pool'].acquire() as conn:
+        rows = await db.fetch(conn, "user_profiles", user_ids)
+    for row in rows:
+        await cache_user_profile(row['telegram_id'], row['social_id'], row['points'])
+
+
+async def refresh_leaderboards(app):
+    async with app.bot_data['db_pool'].acquire() as conn:
+        await refresh_leaderboard(conn)
+
+
+async def fold_engagement(app):
+    await engagement.fold_engagement(app.bot_data['db_pool'])
+
+
+async def compact_redis(app):
+    """Drop Redis keys that outlived what they describe."""
+    async with app.bot_data['db_pool'].acquire() as conn:
+        live_events = {str(row['id']) for row in await db.fetch(conn, "event_ids")}
+
+    removed = 0
+    try:
+        # Partial event hashes (/addevent, /updatepub) of deleted events
+        doomed = [key async for key in redis_client.scan_iter(match="event:*", count=500)
+                  if key.split(":", 1)[1] not in live_events]
+
+        # Engagement state of deleted events
+        folded = await redis_client.hgetall(engagement.FOLDED_VIEWERS_KEY)
+        gone = [event_id for event_id in folded if event_id not in live_events]
+        if gone:
+            await redis_client.hdel(engagement.FOLDED_VIEWERS_KEY, *gone)
+            doomed += [engagement.VIEWERS_KEY.format(event_id) for event_id in gone]
+
+        # Per-event repost counters from before reposts only scored once verified
+        doomed += [key async for key in redis_client.scan_iter(match="nelius:engagement:reposts:*", count=500)]
+
+        if doomed:
+            removed += await redis_client.delete(*doomed)
+
+        # Keep only the members the profile warmer could ever pick
+        removed += await redis_client.zremrangebyrank(HOT_USERS_KEY, 0, -(HOT_PROFILES_LIMIT * 4) - 1)
+    except RedisError as e:
+        print(f"⚠️ Redis compaction stopped early: {e!r}")
+    if removed:
+        print(f"🧹 Compacted {removed} stale Redis keys/entries")
+
+
+async def refresh_commands(app):
+    await set_bot_commands(app)
+
+
+def register_jobs():
+    schedule("warm_events", EVENTS_WARM_INTERVAL, warm_events, run_at_start=True)
+    schedule("archive_events", EVENTS_ARCHIVE_INTERVAL, archive_events, run_at_start=True)
+    schedule("warm_hot_profiles", HOT_PROFILES_WARM_INTERVAL, warm_hot_profiles)
+    schedule("refresh_leaderboards", LEADERBOARD_REFRESH_INTERVAL, refresh_leaderboards, run_at_start=True)
+    schedule("fold_engagement", ENGAGEMENT_FOLD_INTERVAL, fold_engagement)
+    schedule("compact_redis", REDIS_COMPACT_INTERVAL, compact_redis, budget=300)
+    schedule("refresh_bot_commands", BOT_COMMANDS_REFRESH_INTERVAL, refresh_commands, budget=60)
@@ -0,0 +1,201 @@
+import asyncio
+import contextvars
+import time
+from contextlib import asynccontextmanager
+from telegram import Update
+from telegram.error import TelegramError
+from telegram.ext import BaseUpdateProcessor
+
+from bot import metrics, outbound, tracing
+from bot.bot_utils import command_name
+from bot.db import db_breaker, DatabaseUnavailable, CONNECTION_ERRORS
+from bot.dedup import is_duplicate_update
+from bot.throttle import should_throttle, throttle_command
+from config.settings import (INTERACTIVE_LANE_CONCURRENCY, BACKGROUND_LANE_CONCURRENCY,
+                             BACKGROUND_LANE_DB_CONNECTIONS, DB_ACQUIRE_TIMEOUT)
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+# Heavy dev / bulk commands that must never slow down a user's menu tap
+BACKGROUND_COMMANDS = {
+    "dump_db",
+    "airtimereward",
+    "allocate",
+    "refreshbotcommands",
+    "addevent",
+    "updateevent",
+    "importevents",
+    "removeevent",
+    "updatepub",
+}
+
+# The lane the current update is running in (read by LanePool.acquire)
+current_lane = contextvars.ContextVar("current_lane", default=INTERACTIVE)
+
+
+def classify_update(update: object) -> str:
+    """Pick the lane for an update. Menu buttons, callbacks and user commands stay interactive."""
+    if command_name(update) in BACKGROUND_COMMANDS:
+        return BACKGROUND
+    return INTERACTIVE
+
+
+class LaneUpdateProcessor(BaseUpdateProcessor):
+    """Runs updates concurrently, with a separate concurrency budget per lane.
+
+    Updates from the same user are still processed in arrival order so the
+    onboarding ConversationHandler never sees its steps out of order.
+    """
+
+    def __init__(self, interactive_limit: int = INTERACTIVE_LANE_CONCURRENCY,
+                 background_limit: int = BACKGROUND_LANE_CONCURRENCY):
+        # The base semaphore is the sum of both lanes, so a full background
+        # lane can never hold a slot the interactive lane needs.
+        super().__init__(interactive_limit + background_limit)
+        self._lanes = {
+            INTERACTIVE: asyncio.Semaphore(interactive_limit),
+            BACKGROUND: asyncio.Semaphore(background_limit),
+        }
+        self._user_locks = {}
+        # Updates handed to us and not finished yet, including those still
+        # waiting for a slot (graceful shutdown drains this to zero)
+        self.pending = 0
+
+    async def process_update(self, update, coroutine):
+        self.pending += 1
+        try:
+            await super().process_update(update, coroutine)
+        finally:
+            self.pending -= 1
+
+    async def do_process_update(self, update, coroutine):
+        lane = classify_update(update)
+        user = update.effective_user if isinstance(update, Update) else None
+
+        # Inline queries don't touch conversation state, and the search
+        # debounce needs a user's next keystroke to run while this one waits
+        if user is None or update.inline_query:
+            await self._admit(lane, coroutine, update)
+            return
+
+        # Reference-counted per-user lock, dropped once nobody is waiting on it.
+        # Registered before the first await: the dedup and flood checks are
+        # Redis round trips, and two of a user's updates must not pass them
+        # out of order.
+        lock, waiters = self._user_locks.get(user.id, (None, 0))
+        if lock is None:
+            lock = asyncio.Lock()
+        self._user_locks[user.id] = (lock, waiters + 1)
+
+        try:
+            async with lock:
+                await self._admit(lane, coroutine, update)
+        finally:
+            lock, waiters = self._user_locks[user.id]
+            if waiters <= 1:
+                del self._user_locks[user.id]
+            else:
+                self._user_locks[user.id] = (lock, waiters - 1)
+
+    async def _admit(self, lane, coroutine, update):
+        # Telegram redelivers slow webhooks: drop those before they take a lane slot
+        if await is_duplicate_update(update):
+            metrics.incr("updates.duplicate")
+            coroutine.close()
+            return
+
+        # Flood control: repeated taps and users over their budget are dropped silently
+        if await should_throttle(update):
+            metrics.incr("updates.throttled")
+            coroutine.close()
+            await self._answer_dropped(update)
+            return
+
+        await self._run_in_lane(lane, coroutine, update)
+
+    async def _answer_dropped(self, update):
+        # A dropped button tap still needs its answerCallbackQuery, or the
+        # member's button spins until Telegram gives up. Duplicates aren't
+        # answered here: the first delivery's handler answers those.
+        if not isinstance(update, Update) or not update.callback_query:
+            return
+        try:
+            await outbound.answer_once(update.callback_query)
+        except TelegramError as e:
+            print(f"⚠️ Couldn't answer a dropped callback query: {e}")
+
+    async def _run_in_lane(self, lane, coroutine, update):
+        async with self._lanes[lane]:
+            token = current_lane.set(lane)
+            try:
+                if isinstance(update, Update):
+                    with metrics.timer(f"update.{lane}"), tracing.trace_update(
+                        update_id=update.update_id,
+                        user_id=update.effective_user.id if update.effective_user else None,
+                        lane=lane,
+                        command=throttle_command(update),
+                    ):
+                        await coroutine
+                else:
+                    await coroutine
+            finally:
+                current_lane.reset(token)
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+
+class LanePool:
+    """Wraps the asyncpg pool so the background lane can only hold a slice of it.
+
+    Whatever is left (max_size - background connections) stays reserved for
+    interactive handlers, so a big export can't starve a "🏆 My Points" tap.
+    """
+
+    def __init__(self, pool, background_connections: int = BACKGROUND_LANE_DB_CONNECTIONS):
+        self._pool = pool
+        # Each lane needs a connection of its own: with one, a background job
+        # holding it would stall every member's tap
+        if pool.get_max_size() < 2:
+            raise ValueError(f"DB_POOL_MAX_SIZE is {pool.get_max_size()}: the lanes need at least 2 connections")
+        # Always leave at least one connection for the interactive lane
+        background_connections = max(1, min(background_connections, pool.get_max_size() - 1))
+        self._background_slots = asyncio.Semaphore(background_connections)
+
+    @asynccontextmanager
+    async def acquire(self):
+        lane = current_lane.get()
+        started = time.perf_counter()
+
+        # Postgres known to be down: fail now instead of waiting out the timeout
+        if not db_breaker.allow():
+            raise DatabaseUnavailable("Postgres circuit is open")
+
+        if lane == BACKGROUND:
+            await self._background_slots.acquire()
+        try:
+            try:
+                conn = await self._pool.acquire(timeout=DB_ACQUIRE_TIMEOUT)
+            except CONNECTION_ERRORS as e:
+                db_breaker.record_failure()
+                raise DatabaseUnavailable(f"acquire: {e!r}") from e
+            try:
+                # Time spent waiting for a connection (lane slot + pool)
+                waited = time.perf_counter() - started
+                metrics.observe(f"db.acquire_wait.{lane}", waited)
+                tracing.record_span("db.acquire", started, waited)
+                metrics.incr(f"db.acquire.{lane}")
+                yield conn
+            finally:
+                await self._pool.release(conn)
+        finally:
+            if lane == BACKGROUND:
+                self._background_slots.release()
+
+    def __getattr__(self, name):
+        # close(), get_size(), expire_connections() ... go straight to the real pool
+        return getattr(self._pool, name)
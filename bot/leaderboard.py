@@ -0,0 +1,34 @@
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from bot import db
+from bot.redis_client import cache_leaderboard, get_cached_leaderboard
+from bot.rendering import render_leaderboard
+from bot.variables import DB_UNAVAILABLE_MSG
+from config.settings import LEADERBOARD_SIZE
+
+
+async def refresh_leaderboard(conn) -> dict:
+    """Top members and community totals from Postgres, into the cache."""
+    members = await db.fetch(conn, "top_members", LEADERBOARD_SIZE)
+    totals = await db.fetchrow(conn, "member_totals")
+    leaderboard = {
+        "members": [{"social_id": row['social_id'], "points": row['points']} for row in members],
+        "totals": {"members": totals['members'], "points": totals['points']},
+    }
+    await cache_leaderboard(leaderboard)
+    return leaderboard
+
+
+async def leaderboard(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # Normally warm: the refresh_leaderboards job rebuilds it every few minutes
+    board = await get_cached_leaderboard()
+    if board is None:
+        try:
+            async with context.bot_data['db_pool'].acquire() as conn:
+                board = await refresh_leaderboard(conn)
+        except db.DatabaseUnavailable:
+            await update.message.reply_text(DB_UNAVAILABLE_MSG)
+            return
+
+    await update.message.reply_text(render_leaderboard(board["members"], board["totals"]), parse_mode="HTML")
@@ -0,0 +1,98 @@
+from redis.exceptions import RedisError
+
+from bot import db, metrics
+from bot.queries import HANDLE_PLATFORMS
+from bot.redis_client import redis_client
+
+# ------------------------
+# Reverse lookup: handle / phone number -> member.
+# Redis hash "<platform>:<handle>" / "phone:<digits>" -> telegram_id, written
+# whenever a handle or phone is saved. Postgres (expression indexes, see
+# migration 7) is the source of truth: a miss or a stale entry falls back to
+# it and repairs the hash, so the index never needs a full rebuild.
+# ------------------------
+
+LOOKUP_KEY = "nelius:lookup"
+
+
+def normalize_handle(handle: str) -> str:
+    """'@Nelius ' -> 'nelius' (same as lower(ltrim(handle, '@')) in SQL)."""
+    return handle.strip().lstrip("@").lower()
+
+
+def normalize_phone(phone: str) -> str:
+    """'+234 810-000' -> '234810000' (same as the digits-only SQL expression)."""
+    return "".join(ch for ch in phone if ch.isdigit())
+
+
+def looks_like_phone(text: str) -> bool:
+    return not text.strip().startswith("@") and len(normalize_phone(text)) >= 7 and not any(ch.isalpha() for ch in text)
+
+
+async def index_handle(telegram_id: int, platform: str, handle: str):
+    try:
+        await redis_client.hset(LOOKUP_KEY, f"{platform}:{normalize_handle(handle)}", telegram_id)
+    except RedisError:
+        metrics.incr("redis.fallback.writes")
+
+
+async def index_phone(telegram_id: int, phone: str):
+    try:
+        await redis_client.hset(LOOKUP_KEY, f"phone:{normalize_phone(phone)}", telegram_id)
+    except RedisError:
+        metrics.incr("redis.fallback.writes")
+
+
+def _matches(row, kind: str, value: str) -> bool:
+    if kind == "phone":
+        return normalize_phone(row["phone_number"] or "") == value
+    return normalize_handle((row["handles"] or {}).get(kind) or "") == value
+
+
+async def find_user(db_pool, text: str, platform: str = None):
+    """Find a member by phone number or handle (any platform unless `platform` is given).
+
+    Returns (kind, row) where kind is "phone" or the platform that matched,
+    and row has telegram_id, social_id, points, phone_number and handles.
+    Returns None when nobody matches.
+    """
+    if platform is None and looks_like_phone(text):
+        candidates = [("phone", normalize_phone(text))]
+    else:
+        candidates = [(p, normalize_handle(text)) for p in ((platform,) if platform else HANDLE_PLATFORMS)]
+    fields = [f"{kind}:{value}" for kind, value in candidates]
+
+    # 1. One HMGET for every candidate field
+    try:
+        hits = await redis_client.hmget(LOOKUP_KEY, fields)
+    except RedisError:
+        hits = [None] * len(fields)
+
+    async with db_pool.acquire() as conn:
+        for (kind, value), field, telegram_id in zip(candidates, fields, hits):
+            if telegram_id is None:
+                continue
+            row = await db.fetchrow(conn, "user_full_profile", int(telegram_id))
+            if row and _matches(row, kind, value):
+                metrics.incr("lookup.redis_hit")
+                return kind, {"telegram_id": int(telegram_id), **dict(row)}
+            # The member changed that handle/phone since it was indexed
+            try:
+                await redis_client.hdel(LOOKUP_KEY, field)
+            except RedisError:
+                pass
+
+        # 2. Indexed Postgres lookup, then remember the answer
+        for kind, value in candidates:
+            query = "user_by_phone" if kind == "phone" else f"user_by_{kind}_handle"
+            row = await db.fetchrow(conn, query, value)
+            if row:
+                metrics.incr("lookup.db_hit")
+                try:
+                    await redis_client.hset(LOOKUP_KEY, f"{kind}:{value}", row["telegram_id"])
+                except RedisError:
+                    pass
+                return kind, dict(row)
+
+    metrics.incr("lookup.miss")
+    return None
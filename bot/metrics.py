@@ -0,0 +1,136 @@
+import functools
+import time
+from collections import deque
+
+from bot import tracing
+
+# How many recent samples each histogram keeps (older ones fall off the ring)
+SAMPLE_WINDOW = 2048
+
+
+class Histogram:
+    """Latency samples in a fixed-size ring buffer, plus lifetime count and total."""
+
+    def __init__(self, window: int = SAMPLE_WINDOW):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+
+    def percentiles(self, *points):
+        """Percentiles (0-100) over the samples currently in the window, in seconds."""
+        if not self.samples:
+            return [0.0 for _ in points]
+        ordered = sorted(self.samples)
+        last = len(ordered) - 1
+        return [ordered[min(last, int(round(p / 100 * last)))] for p in points]
+
+
+histograms = {}
+counters = {}
+# name -> zero-arg callable, read only when a snapshot is taken
+gauges = {}
+
+
+def observe(name: str, seconds: float):
+    histogram = histograms.get(name)
+    if histogram is None:
+        histogram = histograms[name] = Histogram()
+    histogram.observe(seconds)
+
+
+def incr(name: str, amount: int = 1):
+    counters[name] = counters.get(name, 0) + amount
+
+
+def register_gauge(name: str, func):
+    gauges[name] = func
+
+
+class timer:
+    """`with timer("db.query.user_profile"):` records how long the block took.
+
+    The same measurement is added as a span to the current update's trace.
+    """
+
+    __slots__ = ("name", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.started
+        observe(self.name, duration)
+        if exc_type is not None:
+            incr(f"{self.name}.errors")
+        # Also a span on the current update's trace (no-op when it isn't sampled)
+        tracing.record_span(self.name, self.started, duration, exc_type is not None)
+        return False
+
+
+def timed(name: str):
+    """Decorator for coroutines: `@timed("handler.myid")`."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with timer(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def snapshot() -> dict:
+    """Plain dict of every metric, used by /stats."""
+    latencies = {}
+    for name, histogram in sorted(histograms.items()):
+        p50, p95, p99 = histogram.percentiles(50, 95, 99)
+        latencies[name] = {
+            "count": histogram.count,
+            "avg": histogram.total / histogram.count if histogram.count else 0.0,
+            "p50": p50,
+            "p95": p95,
+            "p99": p99,
+        }
+
+    gauge_values = {}
+    for name, func in sorted(gauges.items()):
+        try:
+            gauge_values[name] = func()
+        except Exception:
+            continue
+
+    return {"latency": latencies, "counters": dict(sorted(counters.items())), "gauges": gauge_values}
+
+
+def _label(name: str) -> str:
+    return name.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def render_prometheus() -> str:
+    """Prometheus text exposition format (served on the webhook server's METRICS_PATH)."""
+    snap = snapshot()
+    lines = ["# TYPE nelius_latency_seconds summary"]
+    for name, h in snap["latency"].items():
+        label = _label(name)
+        for quantile, key in (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99")):
+            lines.append(f'nelius_latency_seconds{{name="{label}",quantile="{quantile}"}} {h[key]:.6f}')
+        lines.append(f'nelius_latency_seconds_count{{name="{label}"}} {h["count"]}')
+        lines.append(f'nelius_latency_seconds_sum{{name="{label}"}} {histograms[name].total:.6f}')
+
+    lines.append("# TYPE nelius_events_total counter")
+    for name, value in snap["counters"].items():
+        lines.append(f'nelius_events_total{{name="{_label(name)}"}} {value}')
+
+    lines.append("# TYPE nelius_gauge gauge")
+    for name, value in snap["gauges"].items():
+        lines.append(f'nelius_gauge{{name="{_label(name)}"}} {value}')
+
+    return "\n".join(lines) + "\n"
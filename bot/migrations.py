@@ -0,0 +1,209 @@
+import asyncio
+
+import asyncpg
+
+from config.settings import DB_MIGRATION_TIMEOUT
+
+# ------------------------
+# Versioned schema migrations.
+# Each entry runs once, in its own transaction, and is recorded in
+# schema_migrations. Never edit a migration that has shipped: add a new one.
+# ------------------------
+
+MIGRATIONS = [
+    (1, "baseline tables", """
+        CREATE TABLE IF NOT EXISTS users (
+            id SERIAL PRIMARY KEY,
+            telegram_id BIGINT UNIQUE,
+            social_id TEXT UNIQUE,
+            phone_number TEXT,
+            points INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            handles JSONB  -- All social media handles in a single JSONB field
+        );
+
+        CREATE TABLE IF NOT EXISTS events (
+            id SERIAL PRIMARY KEY,
+            title TEXT,
+            links JSONB,  -- Store all links in a JSONB column for flexibility
+            publicity_score INTEGER DEFAULT 0
+        );
+    """),
+    # Phone lookups (support, airtime rewards) without a sequential scan
+    (2, "users.phone_number index", """
+        CREATE INDEX IF NOT EXISTS users_phone_number_idx ON users (phone_number)
+        WHERE phone_number IS NOT NULL;
+    """),
+    # Events ranked by publicity (leaderboards, top events)
+    (3, "events.publicity_score index", """
+        CREATE INDEX IF NOT EXISTS events_publicity_score_idx ON events (publicity_score DESC, id DESC);
+    """),
+    # Containment lookups on handles, e.g. handles @> '{"x": "@nelius"}'
+    (4, "users.handles GIN index", """
+        CREATE INDEX IF NOT EXISTS users_handles_gin_idx ON users USING GIN (handles jsonb_path_ops);
+    """),
+    # Older deployments still have the one-row-per-handle table: fold it into
+    # users.handles (values already set on the user win), then drop it
+    (5, "fold social_handles into users.handles", """
+        DO $$
+        BEGIN
+            IF to_regclass('social_handles') IS NOT NULL THEN
+                UPDATE users u
+                SET handles = folded.handles || COALESCE(u.handles, '{}'::jsonb)
+                FROM (
+                    SELECT user_id, jsonb_object_agg(platform, handle) AS handles
+                    FROM social_handles
+                    WHERE platform IS NOT NULL AND handle IS NOT NULL
+                    GROUP BY user_id
+                ) folded
+                WHERE folded.user_id = u.id;
+
+                DROP TABLE social_handles;
+            END IF;
+        END
+        $$;
+    """),
+    # Resume points for bot/import_legacy_db.py, committed with each imported chunk
+    (6, "legacy import progress", """
+        CREATE TABLE IF NOT EXISTS legacy_import_progress (
+            source TEXT NOT NULL,
+            table_name TEXT NOT NULL,
+            last_id BIGINT NOT NULL DEFAULT 0,
+            imported INTEGER NOT NULL DEFAULT 0,
+            skipped INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (source, table_name)
+        );
+    """),
+    # Reverse lookups by normalized handle ("@Nelius" == "nelius") and by phone
+    # digits ("+234 810..." == "234810..."), see the user_by_* queries
+    (7, "normalized handle and phone lookup indexes", """
+        CREATE INDEX IF NOT EXISTS users_x_handle_idx ON users (lower(ltrim(handles ->> 'x', '@')));
+        CREATE INDEX IF NOT EXISTS users_instagram_handle_idx ON users (lower(ltrim(handles ->> 'instagram', '@')));
+        CREATE INDEX IF NOT EXISTS users_tiktok_handle_idx ON users (lower(ltrim(handles ->> 'tiktok', '@')));
+        CREATE INDEX IF NOT EXISTS users_phone_digits_idx ON users (regexp_replace(phone_number, '[^0-9]', '', 'g'));
+    """),
+    # Repost submissions (bot/reposts.py) and the ledger of every point they earned.
+    # One submission per post URL, and one per member, event and platform.
+    (8, "repost submissions and points ledger", """
+        CREATE TABLE IF NOT EXISTS repost_submissions (
+            id SERIAL PRIMARY KEY,
+            telegram_id BIGINT NOT NULL,
+            event_id INTEGER NOT NULL REFERENCES events (id) ON DELETE CASCADE,
+            platform TEXT NOT NULL,
+            url TEXT NOT NULL UNIQUE,
+            status TEXT NOT NULL DEFAULT 'pending',  -- pending | verified | rejected
+            reason TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            verified_at TIMESTAMP,
+            UNIQUE (telegram_id, event_id, platform)
+        );
+        CREATE INDEX IF NOT EXISTS repost_submissions_pending_idx ON repost_submissions (id)
+        WHERE status = 'pending';
+
+        -- submission_id is unique so a batch that is retried can't credit twice
+        CREATE TABLE IF NOT EXISTS points_ledger (
+            id SERIAL PRIMARY KEY,
+            telegram_id BIGINT NOT NULL,
+            points INTEGER NOT NULL,
+            reason TEXT NOT NULL,
+            submission_id INTEGER UNIQUE REFERENCES repost_submissions (id) ON DELETE SET NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE INDEX IF NOT EXISTS points_ledger_telegram_id_idx ON points_ledger (telegram_id);
+    """),
+    # Members leaderboard (top_members) without sorting the whole table
+    (9, "users.points index", """
+        CREATE INDEX IF NOT EXISTS users_points_idx ON users (points DESC, id);
+    """),
+    # Time-bounded campaigns. NULL bounds mean "since forever" / "until removed".
+    # An index predicate can't use now() (it isn't immutable), so "active" can't be
+    # a partial index by itself: instead ended events leave the table (the
+    # archive_events job) and the partial indexes below only cover bounded rows,
+    # which is what the archiver and the next-boundary lookup read.
+    # Repost submissions outlive their event in the archive, so they stop
+    # cascading from events.
+    (10, "event start/end and archive", """
+        ALTER TABLE events ADD COLUMN IF NOT EXISTS starts_at TIMESTAMPTZ;
+        ALTER TABLE events ADD COLUMN IF NOT EXISTS ends_at TIMESTAMPTZ;
+        CREATE INDEX IF NOT EXISTS events_starts_at_idx ON events (starts_at) WHERE starts_at IS NOT NULL;
+        CREATE INDEX IF NOT EXISTS events_ends_at_idx ON events (ends_at) WHERE ends_at IS NOT NULL;
+
+        CREATE TABLE IF NOT EXISTS events_archive (
+            id INTEGER PRIMARY KEY,
+            title TEXT,
+            links JSONB,
+            publicity_score INTEGER,
+            starts_at TIMESTAMPTZ,
+            ends_at TIMESTAMPTZ,
+            archived_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+        );
+
+        ALTER TABLE repost_submissions DROP CONSTRAINT IF EXISTS repost_submissions_event_id_fkey;
+    """),
+    # Inline event search (search_events): trigram GIN index for title ILIKE '%...%'
+    # and similarity() ranking. pg_trgm ships with Postgres (contrib).
+    (11, "events.title trigram index", """
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE INDEX IF NOT EXISTS events_title_trgm_idx ON events USING GIN (title gin_trgm_ops);
+    """),
+]
+
+LATEST_VERSION = max(version for version, _, _ in MIGRATIONS)
+
+# Arbitrary app-wide key for pg_advisory_lock, so only one replica migrates at a time
+MIGRATION_LOCK_ID = 4_815_162_342
+
+
+async def current_version(conn) -> int:
+    """Highest applied migration, 0 on a database that has never been migrated."""
+    try:
+        return await conn.fetchval("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+    except asyncpg.exceptions.UndefinedTableError:
+        return 0
+
+
+async def _lock(conn):
+    # Poll instead of pg_advisory_lock(): a blocking lock would hit the
+    # pool's command_timeout while another replica builds an index
+    while not await conn.fetchval("SELECT pg_try_advisory_lock($1)", MIGRATION_LOCK_ID):
+        print("⏳ Another instance is migrating the database, waiting...")
+        await asyncio.sleep(1)
+
+
+async def migrate(db_pool) -> bool:
+    """Apply pending migrations. Returns False (and does nothing else) when the schema is current."""
+    async with db_pool.acquire() as conn:
+        # Fast path for every boot after the first: one indexed read, no DDL, no lock
+        if await current_version(conn) >= LATEST_VERSION:
+            print("✅ Database schema is up to date.")
+            return False
+
+        await _lock(conn)
+        try:
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            # Re-read under the lock: another replica may have just finished
+            applied = {row["version"] for row in await conn.fetch("SELECT version FROM schema_migrations")}
+
+            for version, name, sql in MIGRATIONS:
+                if version in applied:
+                    continue
+                async with conn.transaction():
+                    await conn.execute(sql, timeout=DB_MIGRATION_TIMEOUT)
+                    await conn.execute(
+                        "INSERT INTO schema_migrations (version, name) VALUES ($1, $2)", version, name
+                    )
+                print(f"🗄️ Applied migration {version}: {name}")
+        finally:
+            await conn.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_ID)
+
+    # Pooled connections prepared the named queries against the old schema
+    # (or skipped them on a fresh database): start over with new ones
+    await db_pool.expire_connections()
+    return True
@@ -1,17 +1,23 @@
-import os
-import sqlite3
-import json
-from urllib.parse import urlparse
-from dotenv import load_dotenv
+import asyncio
+import asyncpg
+import functools
+import io
+from datetime import datetime
+from redis.exceptions import RedisError
 from telegram.ext import ContextTypes
 from telegram import Update, BotCommand, BotCommandScopeAllChatAdministrators, BotCommandScopeDefault, BotCommandScopeAllPrivateChats
-from config.settings import BLEEPRS_API_KEY, DATABASE_URL, DEV_IDS, REDIS_URL
-from bot.redis_client import redis_client as r
-from bot.bot_utils import export_table_to_csv
+from config.settings import (ADMIN_ID, BLEEPRS_API_KEY, DATABASE_URL, DEV_IDS, REDIS_URL,
+                             EVENT_IMPORT_MAX_BYTES, EVENT_IMPORT_MAX_ROWS)
+from bot.redis_client import redis_client as r, invalidate_cache
+from bot.bot_utils import export_table_to_csv, parse_event_args, parse_event_window, format_event_window
+from bot import db, metrics, profiler
+from bot.event_import import DocumentError, parse_event_document, import_events
+from bot.lookup import find_user
+from bot.reposts import reposts_enabled
+from bot.queries import HANDLE_PLATFORMS
+from bot.variables import WRITE_QUEUED_NOTE, CACHE_UNAVAILABLE_NOTE
 from rewards.airtime_rewards import rewards
 
-load_dotenv()
-ADMIN_ID = int(os.getenv("ADMIN_IDS", "0"))
 
 # --- Redis setup ---
 # r = redis.from_url(REDIS_URL, decode_responses=True)
@@ -19,6 +25,7 @@ ADMIN_ID = int(os.getenv("ADMIN_IDS", "0"))
 
 # --- Decorator for dev-only commands ---
 def dev_only(func):
+    @functools.wraps(func)
     async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
         user_id = update.effective_user.id
         if user_id not in DEV_IDS:
@@ -34,9 +41,14 @@ async def set_bot_commands(app, telegram_id=None):
         BotCommand("setig", "Set your Instagram handle"),
         BotCommand("settiktok", "Set your TikTok handle"),
         BotCommand("addphone", "Add your phone number"),
+        BotCommand("repost", "Submit a repost of an event to earn points"),
+        BotCommand("leaderboard", "See the top Nelius members"),
         BotCommand("jointelegramcommunity", "Join our Telegram community"),
         BotCommand("joinwhatsappcommunity", "Join our WhatsApp community"),
     ]
+    if not reposts_enabled():
+        # No verification provider: don't advertise a command that can't pay out
+        commands = [c for c in commands if c.command != "repost"]
     await app.bot.set_my_commands(commands, scope=BotCommandScopeDefault())
     
     # For all private chats (so users only see these commands in DM with bot)
@@ -81,70 +93,44 @@ async def addevent(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     if not args:
         await update.message.reply_text(
-            "Usage:\n/addevent <title> [link1] [link2] ...\n\n"
-            "Example:\n/addevent The God of All Flesh https://instagram.com/post https://x.com/post https://bsky.app/post"
+            "Usage:\n/addevent <title> [link1] [link2] ... [starts=<date>] [ends=<date>]\n\n"
+            "Example:\n/addevent The God of All Flesh https://instagram.com/post https://x.com/post https://bsky.app/post "
+            "ends=2026-11-01T18:00\n\n"
+            "Dates are UTC. Without ends= the event runs until removed."
         )
         return
 
-    # Separate links from title
-    title_parts = []
-    links_dict = {}
-
-    for arg in args:
-        if arg.startswith("http://") or arg.startswith("https://"):
-            # Parse the URL dynamically
-            parsed = urlparse(arg)
-            domain = parsed.netloc.lower() # e.g., 'www.instagram.com'
-            
-            # Strip 'www.' if it exists
-            if domain.startswith("www."):
-                domain = domain[4:]
-                
-            # Extract the core platform name (everything before the first dot)
-            # e.g., 'instagram.com' -> 'instagram', 'bsky.app' -> 'bsky'
-            base_platform = domain.split('.')[0] if '.' in domain else "link"
-            
-            platform_name = base_platform
-
-            # Just in case you add TWO links from the same platform (e.g., two X posts),
-            # this prevents the second one from overwriting the first in the dictionary!
-            counter = 1
-            while platform_name in links_dict:
-                platform_name = f"{base_platform}_{counter}"
-                counter += 1
-            
-            links_dict[platform_name] = arg
-        else:
-            title_parts.append(arg)
-
-    title = " ".join(title_parts)
+    # Separate the start/end dates, then links from title
+    try:
+        args, starts_at, ends_at = parse_event_window(args)
+    except ValueError as e:
+        await update.message.reply_text(f"❌ {e}")
+        return
+    title, links_dict = parse_event_args(args)
     
     if not title:
         await update.message.reply_text("❌ Please provide a title for the event.")
         return
 
-    # Convert the dictionary to a JSON string for asyncpg
-    links_json = json.dumps(links_dict)
-
     db_pool = context.bot_data['db_pool']
     
     # 1. Acquire connection using async context manager
     async with db_pool.acquire() as conn:
         # 2. Insert title and the JSONB links object, returning the new ID
-        event_id = await conn.fetchval(
-            """
-            INSERT INTO events (title, links)
-            VALUES ($1, $2::jsonb)
-            RETURNING id
-            """,
-            title, links_json
-        )
+        event_id = await db.fetchval(conn, "insert_event", title, links_dict, starts_at, ends_at)
+
+    # The cached list doesn't know about this event (or when it starts)
+    await invalidate_cache("events:list")
 
-    # Cache partial data for quick access
-    await r.hset(f"event:{event_id}", mapping={
-        "title": title,
-        "publicity_score": 0
-    })
+    # Cache partial data for quick access (the event is saved either way)
+    cache_note = ""
+    try:
+        await r.hset(f"event:{event_id}", mapping={
+            "title": title,
+            "publicity_score": 0
+        })
+    except RedisError:
+        cache_note = CACHE_UNAVAILABLE_NOTE
 
     # Build a dynamic confirmation message
     msg_lines = [
@@ -153,6 +139,8 @@ async def addevent(update: Update, context: ContextTypes.DEFAULT_TYPE):
         f"🎉 Title: {title}",
         f"🔗 Links attached: {len(links_dict)}"
     ]
+    if starts_at or ends_at:
+        msg_lines.insert(3, f"🗓️ Runs: {format_event_window(starts_at, ends_at)}")
     
     for plat, url in links_dict.items():
         # Capitalize the dynamic platform name so it looks nice (e.g., Bsky, X, Instagram)
@@ -161,7 +149,7 @@ async def addevent(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not links_dict:
         msg_lines.append("• No links provided.")
 
-    await update.message.reply_text("\n".join(msg_lines))
+    await update.message.reply_text("\n".join(msg_lines) + cache_note)
 
 @dev_only
 async def updateevent(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -169,8 +157,8 @@ async def updateevent(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     if not args:
         await update.message.reply_text(
-            "Usage:\n/updateevent <event_id> [title] [platform_link] ...\n\n"
-            "Example:\n/updateevent 5 The God of All Flesh https://instagram.com/post https://x.com/post"
+            "Usage:\n/updateevent <event_id> [title] [platform_link] ... [starts=<date>] [ends=<date>]\n\n"
+            "Example:\n/updateevent 5 The God of All Flesh https://instagram.com/post https://x.com/post ends=2026-11-01"
         )
         return
 
@@ -181,74 +169,40 @@ async def updateevent(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("⚠️ Event ID must be a number.")
         return
 
-    # Separate title from links
-    title_parts = []
-    links_dict = {}
-
-    for arg in args[1:]:
-        if arg.startswith("http://") or arg.startswith("https://"):
-            # Parse the URL dynamically
-            parsed = urlparse(arg)
-            domain = parsed.netloc.lower()
-            
-            if domain.startswith("www."):
-                domain = domain[4:]
-                
-            base_platform = domain.split('.')[0] if '.' in domain else "link"
-            platform_name = base_platform
-
-            counter = 1
-            while platform_name in links_dict:
-                platform_name = f"{base_platform}_{counter}"
-                counter += 1
-            
-            links_dict[platform_name] = arg
-        else:
-            title_parts.append(arg)
-
-    title = " ".join(title_parts) if title_parts else None
-
-    if not title and not links_dict:
-        await update.message.reply_text("⚠️ Nothing to update. Please provide a new title or links.")
+    # Separate the dates, then title from links
+    try:
+        rest, starts_at, ends_at = parse_event_window(args[1:])
+    except ValueError as e:
+        await update.message.reply_text(f"❌ {e}")
         return
+    title, links_dict = parse_event_args(rest)
+    title = title or None
 
-    # Build dynamic SQL for the update
-    updates = []
-    values = []
-    counter = 1 # Start at $1
-
-    if title:
-        updates.append(f"title = ${counter}")
-        values.append(title)
-        counter += 1
-        
-    if links_dict:
-        # Convert dictionary to JSON string
-        links_json = json.dumps(links_dict)
-        # The || operator merges the new JSON into the existing JSON!
-        # COALESCE ensures it doesn't fail if the existing links column is somehow NULL
-        updates.append(f"links = COALESCE(links, '{{}}'::jsonb) || ${counter}::jsonb")
-        values.append(links_json)
-        counter += 1
-
-    # Add the event_id as the final parameter for the WHERE clause
-    values.append(event_id)
-    sql = f"UPDATE events SET {', '.join(updates)} WHERE id = ${counter}"
+    if not title and not links_dict and not starts_at and not ends_at:
+        await update.message.reply_text("⚠️ Nothing to update. Please provide a new title or links.")
+        return
 
     db_pool = context.bot_data['db_pool']
     async with db_pool.acquire() as conn:
-        # Execute the update
-        result = await conn.execute(sql, *values)
+        # New links are merged into the existing JSON, a missing title keeps the old one
+        # (None leaves the links untouched; the pool's JSONB codec encodes the dict)
+        result = await db.execute(conn, "update_event", title, links_dict or None, event_id, starts_at, ends_at)
         
         # asyncpg execute returns a status string like "UPDATE 1". If it's "UPDATE 0", the ID doesn't exist.
         if result == "UPDATE 0":
             await update.message.reply_text(f"❌ Event ID {event_id} not found.")
             return
 
+    # Title and dates show in the events list
+    await invalidate_cache("events:list")
+
     # Update cache partially
+    cache_note = ""
     if title:
-        # Assuming your redis_client is imported. If you used 'r' before, change it to redis_client
-        await r.hset(f"event:{event_id}", mapping={"title": title})
+        try:
+            await r.hset(f"event:{event_id}", mapping={"title": title})
+        except RedisError:
+            cache_note = CACHE_UNAVAILABLE_NOTE
 
     # Build response message
     updated_items = []
@@ -258,13 +212,92 @@ async def updateevent(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Show exactly which platforms were updated
         platforms_updated = ", ".join([p.capitalize() for p in links_dict.keys()])
         updated_items.append(f"🔗 Links ({platforms_updated})")
+    if starts_at or ends_at:
+        updated_items.append("🗓️ Dates")
 
     await update.message.reply_text(
         f"✅ Event {event_id} successfully updated!\n"
         f"Updated: {', '.join(updated_items)}"
+        + cache_note
     )
 
 
+# --- /importevents ---
+# Many events at once from a CSV/JSON document (format in bot/event_import.py).
+# Send the file with /importevents as its caption, or reply /importevents to it.
+IMPORT_ERRORS_SHOWN = 20
+IMPORT_IDS_SHOWN = 20
+
+
+@dev_only
+async def importevents(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    message = update.message
+    document = message.document or (message.reply_to_message and message.reply_to_message.document)
+    if not document:
+        await message.reply_text(
+            "Usage: send a .csv or .json file with the caption /importevents "
+            "(or reply /importevents to one).\n\n"
+            "CSV columns: title, links, starts, ends, and id to update an existing event.\n"
+            "Example row: Launch week,https://x.com/nelius/status/1 https://instagram.com/p/2,2026-11-01,2026-11-08"
+        )
+        return
+
+    if document.file_size and document.file_size > EVENT_IMPORT_MAX_BYTES:
+        await message.reply_text(f"❌ That file is too big (max {EVENT_IMPORT_MAX_BYTES // 1024} KB).")
+        return
+
+    file = await document.get_file()
+    data = bytes(await file.download_as_bytearray())
+
+    # Parsing thousands of rows is CPU work: keep it off the event loop
+    try:
+        events, errors = await asyncio.to_thread(parse_event_document, document.file_name or "", data)
+    except DocumentError as e:
+        await message.reply_text(f"❌ {e}")
+        return
+
+    if len(events) > EVENT_IMPORT_MAX_ROWS:
+        await message.reply_text(f"❌ {len(events)} events in one file, the limit is {EVENT_IMPORT_MAX_ROWS}. Split it up.")
+        return
+    if not events:
+        await message.reply_text("❌ No valid rows to import.\n" + _format_row_errors(errors))
+        return
+
+    try:
+        new_ids, updated_ids, missing = await import_events(context.bot_data['db_pool'], events)
+    except db.DatabaseUnavailable:
+        await message.reply_text("⏳ The database is unavailable, nothing was imported. Try again shortly.")
+        return
+    except asyncpg.exceptions.PostgresError as e:
+        # One transaction: a failed batch writes nothing
+        await message.reply_text(f"❌ Import failed, nothing was written: {e}")
+        return
+
+    lines = [f"✅ Imported {len(new_ids)} new events, updated {len(updated_ids)}."]
+    if new_ids:
+        lines.append(_format_new_ids(new_ids))
+    errors = sorted(errors + missing)
+    if errors:
+        lines.append(f"\n⚠️ {len(errors)} rows skipped:")
+        lines.append(_format_row_errors(errors))
+    await message.reply_text("\n".join(lines))
+
+
+def _format_new_ids(ids: list) -> str:
+    # Other inserts can interleave with the batch, so its IDs needn't be contiguous
+    ids = sorted(ids)
+    if len(ids) <= IMPORT_IDS_SHOWN:
+        return f"🆕 IDs: {', '.join(map(str, ids))}"
+    return f"🆕 {len(ids)} IDs, first {ids[0]}, last {ids[-1]}"
+
+
+def _format_row_errors(errors: list) -> str:
+    shown = [f"• Row {line}: {error}" for line, error in errors[:IMPORT_ERRORS_SHOWN]]
+    if len(errors) > IMPORT_ERRORS_SHOWN:
+        shown.append(f"… and {len(errors) - IMPORT_ERRORS_SHOWN} more")
+    return "\n".join(shown)
+
+
 @dev_only
 async def updatepub(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if len(context.args) < 2:
@@ -276,18 +309,20 @@ async def updatepub(update: Update, context: ContextTypes.DEFAULT_TYPE):
     score = int(context.args[1]) 
     db_pool = context.bot_data['db_pool']
 
-    async with db_pool.acquire() as conn:
-        await conn.execute(
-            "UPDATE events SET publicity_score = $1 WHERE id = $2",
-            score, eid
-        )
+    status = await db.write(db_pool, "set_publicity_score", score, eid)
 
     # Update cache (Add 'await' if you are using an async Redis client!)
-    if await r.exists(f"event:{eid}"): 
-        await r.hset(f"event:{eid}", "publicity_score", score)
+    cache_note = ""
+    try:
+        if await r.exists(f"event:{eid}"): 
+            await r.hset(f"event:{eid}", "publicity_score", score)
+    except RedisError:
+        cache_note = CACHE_UNAVAILABLE_NOTE
 
     await update.message.reply_text(
         f"✅ Updated publicity score for event {eid} to {score}."
+        + (WRITE_QUEUED_NOTE if status == "JOURNALED" else "")
+        + cache_note
     )
 
 
@@ -304,18 +339,18 @@ async def allocate(update: Update, context: ContextTypes.DEFAULT_TYPE):
     db_pool = context.bot_data['db_pool']
     
     async with db_pool.acquire() as conn:
-        # Use $1, $2
-        await conn.execute(
-            "UPDATE users SET points = points + $1 WHERE social_id = $2",
-            pts, str(uid)
-        )
+        await db.execute(conn, "allocate_points", pts, str(uid))
 
     # Update cache
     user_key = f"user:{uid}"
-    if await r.exists(user_key):
-        await r.hincrby(user_key, "points", pts)
+    cache_note = ""
+    try:
+        if await r.exists(user_key):
+            await r.hincrby(user_key, "points", pts)
+    except RedisError:
+        cache_note = CACHE_UNAVAILABLE_NOTE
 
-    await update.message.reply_text(f"✅ Allocated {pts} points to user {uid}.")
+    await update.message.reply_text(f"✅ Allocated {pts} points to user {uid}." + cache_note)
 
 
 @dev_only
@@ -329,7 +364,7 @@ async def removeevent(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     async with db_pool.acquire() as conn:
         # fetchrow replaces fetchone()
-        row = await conn.fetchrow("SELECT title FROM events WHERE id = $1", eid)
+        row = await db.fetchrow(conn, "event_title", eid)
 
         if not row:
             await update.message.reply_text(f"⚠️ No event found with ID {eid}.")
@@ -338,7 +373,7 @@ async def removeevent(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Access column by name instead of index!
         title = row['title'] 
 
-        await conn.execute("DELETE FROM events WHERE id = $1", eid)
+        await db.execute(conn, "delete_event", eid)
 
     await update.message.reply_text(
         f"🗑️ Event '{title}' (ID: {eid}) removed successfully."
@@ -354,9 +389,10 @@ async def airtimereward(update: Update, context: ContextTypes.DEFAULT_TYPE):
     phone = context.args[0]
     amount = int(context.args[1])
 
-    # Call the Bleeprs airtime client
+    # Call the Bleeprs airtime client. It uses `requests` (blocking), so it runs
+    # on a worker thread instead of stalling every other user's update.
     client = rewards.BleeprsAirtimeClient(BLEEPRS_API_KEY)
-    result = client.purchase_airtime(phone, amount)
+    result = await asyncio.to_thread(client.purchase_airtime, phone, amount)
 
     if 'error' in result:
         await update.message.reply_text(f"Failed to share airtime: {result['error']}")
@@ -364,6 +400,14 @@ async def airtimereward(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"Successfully shared ₦{amount} airtime to {phone}")
 
 
+# Every table bot/migrations.py creates (social_handles was folded into users
+# by migration 5). Also the SQL-injection guard: the name goes into the query.
+DUMPABLE_TABLES = (
+    "users", "events", "events_archive", "repost_submissions", "points_ledger",
+    "legacy_import_progress", "schema_migrations",
+)
+
+
 @dev_only
 async def dump_db(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.effective_user.id != ADMIN_ID:
@@ -373,18 +417,17 @@ async def dump_db(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not context.args:
         await update.message.reply_text(
             "Usage: /dump_db <table_name>\n"
-            "Available tables: users, events, social_handles"
+            f"Available tables: {', '.join(DUMPABLE_TABLES)}"
         )
         return
 
     table_name = context.args[0].strip()
 
     # Validate table name to prevent SQL injection
-    allowed_tables = {"users", "events", "social_handles"}
-    if table_name not in allowed_tables:
+    if table_name not in DUMPABLE_TABLES:
         await update.message.reply_text(
             f"❌ Table '{table_name}' is not allowed.\n"
-            f"Allowed tables: {', '.join(allowed_tables)}"
+            f"Allowed tables: {', '.join(DUMPABLE_TABLES)}"
         )
         return
 
@@ -402,3 +445,104 @@ async def dump_db(update: Update, context: ContextTypes.DEFAULT_TYPE):
     except Exception as e:
         await update.message.reply_text(f"Error: {e}")
 
+
+@dev_only
+async def stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show pool usage, acquire waits and per-query latency."""
+    snap = metrics.snapshot()
+
+    lines = ["📊 <b>Bot stats</b>", ""]
+
+    if snap["gauges"]:
+        lines.append("<b>Gauges</b>")
+        for name, value in snap["gauges"].items():
+            lines.append(f"• {name}: {value}")
+        lines.append("")
+
+    if snap["counters"]:
+        lines.append("<b>Counters</b>")
+        for name, value in snap["counters"].items():
+            lines.append(f"• {name}: {value}")
+        lines.append("")
+
+    if snap["latency"]:
+        lines.append("<b>Latency (ms)</b> count · p50 / p95 / p99")
+        for name, h in snap["latency"].items():
+            lines.append(
+                f"• {name}: {h['count']} · "
+                f"{h['p50'] * 1000:.1f} / {h['p95'] * 1000:.1f} / {h['p99'] * 1000:.1f}"
+            )
+
+    if len(lines) == 2:
+        lines.append("No metrics recorded yet.")
+
+    await update.message.reply_text("\n".join(lines), parse_mode="HTML")
+
+
+@dev_only
+async def profile_loop(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/profiler [seconds]: sample the event loop and send back a flamegraph file."""
+    try:
+        seconds = float(context.args[0]) if context.args else 30.0
+    except ValueError:
+        await update.message.reply_text("Usage: /profiler [seconds]")
+        return
+    if seconds <= 0:
+        await update.message.reply_text("Usage: /profiler [seconds]")
+        return
+    if profiler.active_session is not None:
+        await update.message.reply_text("⏳ A profiling session is already running.")
+        return
+
+    chat_id = update.effective_chat.id
+    seconds = min(seconds, profiler.PROFILER_MAX_SECONDS)
+    await update.message.reply_text(f"🔬 Profiling for {seconds:g}s…")
+
+    async def run_and_send():
+        try:
+            session = await profiler.profile_for(seconds)
+        except RuntimeError as e:
+            await context.bot.send_message(chat_id, f"❌ {e}")
+            return
+
+        await context.bot.send_document(
+            chat_id,
+            document=io.BytesIO(session.collapsed()),
+            filename=f"profile_{datetime.now():%Y%m%d_%H%M%S}.folded",
+            caption="Collapsed stacks: open in speedscope.app or pipe into flamegraph.pl",
+        )
+        await context.bot.send_message(chat_id, session.summary(), parse_mode="HTML")
+
+    # Don't hold this update (and the dev's per-user lock) for the whole session
+    context.application.create_task(run_and_send(), update=update)
+
+
+@dev_only
+async def whois(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/whois [x|instagram|tiktok] <@handle | phone>: find the member behind a handle or number."""
+    args = context.args or []
+    platform = args[0].lower() if len(args) == 2 else None
+    if not args or len(args) > 2 or (platform and platform not in HANDLE_PLATFORMS):
+        await update.message.reply_text(
+            "Usage: /whois <@handle | phone>\n"
+            "or /whois <x|instagram|tiktok> <@handle>"
+        )
+        return
+
+    found = await find_user(context.bot_data['db_pool'], args[-1], platform)
+    if not found:
+        await update.message.reply_text(f"🔍 No member found for {args[-1]}.")
+        return
+
+    kind, row = found
+    handles = row["handles"] or {}
+    lines = [
+        f"🔍 Matched by {kind}",
+        f"🆔 Telegram ID: {row['telegram_id']}",
+        f"👤 Social ID: {row['social_id']}",
+        f"🏆 Points: {row['points']}",
+        f"📞 Phone: {row['phone_number'] or '—'}",
+    ]
+    for plat, handle in handles.items():
+        lines.append(f"• {plat.capitalize()}: {handle}")
+    await update.message.reply_text("\n".join(lines))
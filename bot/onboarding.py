@@ -8,7 +8,12 @@ from telegram.ext import (
     ContextTypes
 )
 
-from bot.redis_client import cache_user_profile
+from redis.exceptions import RedisError
+
+from bot import db
+from bot.lookup import index_handle, index_phone
+from bot.redis_client import cache_user_profile, get_user_snapshot, save_user_snapshot
+from bot.variables import STALE_NOTE, DB_UNAVAILABLE_MSG, WRITE_QUEUED_NOTE
 from bot.assign_social_id import assign_social_id
 
 # Define conversation states
@@ -28,45 +33,71 @@ MAIN_MENU = ReplyKeyboardMarkup(
 )
 
 
+def _queued_note(context: ContextTypes.DEFAULT_TYPE, status: str) -> str:
+    """WRITE_QUEUED_NOTE the first time a step of this onboarding was journaled."""
+    if status != "JOURNALED" or context.user_data.get("onboarding_queued"):
+        return ""
+    context.user_data["onboarding_queued"] = True
+    return WRITE_QUEUED_NOTE
+
+
 async def start_onboarding(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Entry point for /start."""
     user_id = update.effective_user.id # int8 / BIGINT
     db_pool = context.bot_data['db_pool']
+    context.user_data.pop("onboarding_queued", None)
 
-    async with db_pool.acquire() as conn:
-        # fetchrow returns a dictionary-like Record, or None
-        row = await conn.fetchrow("SELECT social_id, points FROM users WHERE telegram_id=$1", user_id)
+    try:
+        async with db_pool.acquire() as conn:
+            # fetchrow returns a dictionary-like Record, or None
+            row = await db.fetchrow(conn, "user_profile", user_id)
+    except db.DatabaseUnavailable:
+        # Without the database we can't tell new members from returning ones;
+        # returning members still get their (possibly stale) snapshot
+        snapshot = await get_user_snapshot(user_id)
+        if not snapshot:
+            await update.message.reply_text(DB_UNAVAILABLE_MSG)
+            return ConversationHandler.END
+        msg = f"👋 Welcome back!\nYour Social ID: {snapshot['social_id']}\n🏆 Points: {snapshot['points']}"
+        await update.message.reply_text(msg + STALE_NOTE, reply_markup=MAIN_MENU)
+        return ConversationHandler.END
 
-        if not row:
-            # --- NEW USER FLOW ---
+    if not row:
+        # --- NEW USER FLOW ---
+        try:
             social_id = await assign_social_id(user_id) # Assuming this is a sync function you defined
-            
-            await conn.execute(
-                "INSERT INTO users (telegram_id, social_id) VALUES ($1, $2)",
-                user_id, str(social_id)
-            )
-            
-            # Initiate the step-by-step onboarding
-            await update.message.reply_text(
-                f"👋 Welcome to Nelius DAO!\nYour Social ID: {social_id}\n\n"
-                "To get started, please reply with your phone number including country code but *without the + sign* (e.g. 234810...).",
-                reply_markup=ReplyKeyboardRemove()
-            )
-            return PHONE_ENTRY
-
-        else:
-            # --- EXISTING USER FLOW ---
-            # Access the row using dictionary keys
-            social_id = row['social_id']
-            points = row['points']
-            
-            # NOTE: If cache_user_profile uses async Redis, add an 'await' here!
-            await cache_user_profile(user_id, social_id, points) 
-            msg = f"👋 Welcome back!\nYour Social ID: {social_id}\n🏆 Points: {points}"
-            
-            await update.message.reply_text(msg, reply_markup=MAIN_MENU)
+        except RedisError:
+            # The Social ID pool lives in Redis; no ID means no account yet
+            await update.message.reply_text("⏳ Sign-ups are briefly unavailable. Please try /start again in a minute!")
             return ConversationHandler.END
 
+        # Journaled and applied later if Postgres goes away right now
+        status = await db.write(db_pool, "insert_user", user_id, str(social_id))
+        await save_user_snapshot(user_id, social_id=social_id, points=0)
+
+        # Initiate the step-by-step onboarding
+        await update.message.reply_text(
+            f"👋 Welcome to Nelius DAO!\nYour Social ID: {social_id}"
+            + _queued_note(context, status) + "\n\n"
+            "To get started, please reply with your phone number including country code but *without the + sign* (e.g. 234810...).",
+            reply_markup=ReplyKeyboardRemove()
+        )
+        return PHONE_ENTRY
+
+    else:
+        # --- EXISTING USER FLOW ---
+        # Access the row using dictionary keys
+        social_id = row['social_id']
+        points = row['points']
+
+        # NOTE: If cache_user_profile uses async Redis, add an 'await' here!
+        await cache_user_profile(user_id, social_id, points)
+        await save_user_snapshot(user_id, social_id=social_id, points=points)
+        msg = f"👋 Welcome back!\nYour Social ID: {social_id}\n🏆 Points: {points}"
+
+        await update.message.reply_text(msg, reply_markup=MAIN_MENU)
+        return ConversationHandler.END
+
 
 async def save_phone_onboarding(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Save phone and ask for optional X handle."""
@@ -74,11 +105,11 @@ async def save_phone_onboarding(update: Update, context: ContextTypes.DEFAULT_TY
     user_id = update.effective_user.id
     db_pool = context.bot_data['db_pool']
     
-    async with db_pool.acquire() as conn:
-        await conn.execute("UPDATE users SET phone_number = $1 WHERE telegram_id = $2", phone, user_id)
+    status = await db.write(db_pool, "set_phone", phone, user_id)
+    await index_phone(user_id, phone)
     
     await update.message.reply_text(
-        "✅ Phone saved!\n\n"
+        "✅ Phone saved!" + _queued_note(context, status) + "\n\n"
         "Next, please enter your X (Twitter) handle (e.g., @username).\nTap 'Skip' if you want to add it later.",
         reply_markup=SKIP_MARKUP
     )
@@ -90,20 +121,17 @@ async def save_x_handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
     telegram_id = update.effective_user.id
     db_pool = context.bot_data['db_pool']
     
+    status = None
     if text.lower() != "skip":
         if not text.startswith("@"):
             text = "@" + text
             
-        async with db_pool.acquire() as conn:
-            # Merge the new handle into the JSON object
-            await conn.execute("""
-                UPDATE users 
-                SET handles = COALESCE(handles, '{}'::jsonb) || jsonb_build_object('x', $1::text)
-                WHERE telegram_id = $2
-            """, text, telegram_id)
+        # Merge the new handle into the JSON object
+        status = await db.write(db_pool, "set_handle", "x", text, telegram_id)
+        await index_handle(telegram_id, "x", text)
     
     await update.message.reply_text(
-        "✅ X handle saved!\n\n"
+        "✅ X handle saved!" + _queued_note(context, status) + "\n\n"
         "Please enter your Instagram handle (e.g., @username), or tap 'Skip' if you want to add it later.",
         reply_markup=SKIP_MARKUP
     )
@@ -116,19 +144,16 @@ async def save_ig_handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
     telegram_id = update.effective_user.id
     db_pool = context.bot_data['db_pool']
     
+    status = None
     if text.lower() != "skip":
         if not text.startswith("@"):
             text = "@" + text
             
-        async with db_pool.acquire() as conn:
-            await conn.execute("""
-                UPDATE users 
-                SET handles = COALESCE(handles, '{}'::jsonb) || jsonb_build_object('instagram', $1::text)
-                WHERE telegram_id = $2
-            """, text, telegram_id)
+        status = await db.write(db_pool, "set_handle", "instagram", text, telegram_id)
+        await index_handle(telegram_id, "instagram", text)
         
     await update.message.reply_text(
-        "✅ Got it!\n\n"
+        "✅ Got it!" + _queued_note(context, status) + "\n\n"
         "Finally, enter your TikTok handle (e.g., @username), or tap 'Skip'.",
         reply_markup=SKIP_MARKUP
     )
@@ -141,30 +166,27 @@ async def finish_onboarding(update: Update, context: ContextTypes.DEFAULT_TYPE):
     telegram_id = update.effective_user.id
     db_pool = context.bot_data['db_pool']
     
-    async with db_pool.acquire() as conn:
-        if text.lower() != "skip":
-            if not text.startswith("@"):
-                text = "@" + text
-                
-            await conn.execute("""
-                UPDATE users 
-                SET handles = COALESCE(handles, '{}'::jsonb) || jsonb_build_object('tiktok', $1::text)
-                WHERE telegram_id = $2
-            """, text, telegram_id)
-            
-        # Fetch the final profile data for Redis caching
-        row = await conn.fetchrow(
-            "SELECT social_id, points FROM users WHERE telegram_id = $1", 
-            telegram_id
-        )
-        social_id = row['social_id'] if row else "unknown"
-        points = row['points'] if row else 0
+    status = None
+    if text.lower() != "skip":
+        if not text.startswith("@"):
+            text = "@" + text
+
+        status = await db.write(db_pool, "set_handle", "tiktok", text, telegram_id)
+        await index_handle(telegram_id, "tiktok", text)
+
+    # Fetch the final profile data for Redis caching (skipped while Postgres is down)
+    try:
+        async with db_pool.acquire() as conn:
+            row = await db.fetchrow(conn, "user_profile", telegram_id)
+    except db.DatabaseUnavailable:
+        row = None
 
     # Cache the profile
-    await cache_user_profile(telegram_id, social_id, points)
+    if row:
+        await cache_user_profile(telegram_id, row['social_id'], row['points'])
     
     await update.message.reply_text(
-        "🎉 Setup complete! You are fully onboarded and ready to earn points.",
+        "🎉 Setup complete! You are fully onboarded and ready to earn points." + _queued_note(context, status),
         reply_markup=MAIN_MENU 
     )
     return ConversationHandler.END
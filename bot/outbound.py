@@ -0,0 +1,92 @@
+import hashlib
+from collections import OrderedDict
+
+from redis.exceptions import RedisError
+from telegram.error import BadRequest
+
+from bot import metrics
+from bot.redis_client import redis_client
+from bot.serialization import dumps
+from config.settings import EDIT_FINGERPRINT_TTL
+
+# ------------------------
+# Outbound Bot API calls from callback handlers.
+#
+# A callback query needs exactly one answerCallbackQuery; handlers that
+# call each other (events_list_callback -> events) used to answer twice.
+# editMessageText with the text and keyboard the message already shows is
+# rejected by Telegram ("message is not modified") after a full round trip,
+# so what each message shows is fingerprinted in Redis (shared by every
+# replica, short TTL) and identical edits are skipped. Without Redis we
+# just send the edit and let Telegram's BadRequest tell us.
+# ------------------------
+
+EDIT_KEY = "nelius:edit:{}"
+
+# A callback query is delivered to one process and answered within seconds,
+# so answered ids can stay local; only recent ones matter
+LOCAL_CACHE_LIMIT = 10_000
+
+_answered = OrderedDict()    # callback query id -> True
+
+
+def _remember(cache: OrderedDict, key, value):
+    cache[key] = value
+    cache.move_to_end(key)
+    if len(cache) > LOCAL_CACHE_LIMIT:
+        cache.popitem(last=False)
+
+
+async def answer_once(query, *args, **kwargs) -> bool:
+    """query.answer(), unless this callback query was already answered. False if skipped."""
+    if query.id in _answered:
+        metrics.incr("telegram.answer_deduped")
+        return False
+    _remember(_answered, query.id, True)
+    await query.answer(*args, **kwargs)
+    return True
+
+
+def _message_key(query):
+    # Messages sent through inline mode have no chat/message id, only their own id
+    if query.inline_message_id:
+        return EDIT_KEY.format(query.inline_message_id)
+    if query.message:
+        return EDIT_KEY.format(f"{query.message.chat.id}:{query.message.message_id}")
+    return None
+
+
+def _fingerprint(text: str, kwargs: dict) -> str:
+    # Stable across processes (hash() is salted per interpreter)
+    markup = kwargs.get("reply_markup")
+    content = dumps([text, kwargs.get("parse_mode"), markup.to_dict() if markup else None])
+    return hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+
+
+async def edit_message(query, text: str, **kwargs) -> bool:
+    """query.edit_message_text(), skipped when the message already shows exactly this. False if skipped."""
+    key = _message_key(query)
+    fingerprint = _fingerprint(text, kwargs)
+    if key is not None:
+        try:
+            current = await redis_client.get(key)
+        except RedisError:
+            current = None
+        if current == fingerprint:
+            metrics.incr("telegram.edit_skipped")
+            return False
+
+    try:
+        await query.edit_message_text(text, **kwargs)
+    except BadRequest as e:
+        # Fingerprint expired or Redis was down: Telegram is the source of truth
+        if "message is not modified" not in str(e).lower():
+            raise
+        metrics.incr("telegram.edit_not_modified")
+
+    if key is not None:
+        try:
+            await redis_client.setex(key, EDIT_FINGERPRINT_TTL, fingerprint)
+        except RedisError:
+            pass
+    return True
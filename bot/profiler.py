@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from bot.metrics import Histogram
+from config.settings import PROFILER_INTERVAL_MS, PROFILER_MAX_SECONDS, SLOW_CALLBACK_MS
+
+# ------------------------
+# On-demand sampling profiler for the event loop (/profiler <seconds>)
+#
+# Nothing here runs until a dev starts a session: no thread, no hooks, no
+# debug mode. While a session is on, a side thread samples the loop thread's
+# stack every PROFILER_INTERVAL_MS and tags it with the asyncio task that was
+# running, a probe coroutine measures loop lag, and asyncio's debug mode
+# reports callbacks slower than SLOW_CALLBACK_MS.
+#
+# The output is in "collapsed stack" format (one `frame;frame;frame count`
+# line per unique stack), which flamegraph.pl, speedscope and inferno read.
+# ------------------------
+
+# Only one session at a time (sampling twice would double the overhead)
+active_session = None
+
+# Task names like "Task-1234" or PTB's per-update names would split the flamegraph
+_TASK_ID = re.compile(r"\d+")
+
+
+class _SlowCallbackHandler(logging.Handler):
+    """Collects asyncio's "Executing <Handle ...> took 0.250 seconds" warnings."""
+
+    def __init__(self, session):
+        super().__init__(logging.WARNING)
+        self.session = session
+
+    def emit(self, record):
+        message = record.getMessage()
+        if message.startswith("Executing"):
+            self.session.slow_callbacks.append(message)
+
+
+class ProfileSession:
+    def __init__(self, seconds: float, interval_ms: float = PROFILER_INTERVAL_MS,
+                 slow_callback_ms: float = SLOW_CALLBACK_MS):
+        self.seconds = seconds
+        self.interval = interval_ms / 1000
+        self.slow_callback = slow_callback_ms / 1000
+        self.stacks = Counter()
+        self.samples = 0
+        self.lag = Histogram(window=int(seconds / self.interval) + 1)
+        self.max_lag = 0.0
+        self.slow_callbacks = []
+        self._stop = threading.Event()
+
+    def _sample(self, loop, loop_thread_id):
+        """Side thread: snapshot the loop thread's stack until stopped."""
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(loop_thread_id)
+            if frame is None:
+                continue
+            task = asyncio.current_task(loop)
+
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                filename = code.co_filename
+                # asyncio's own scheduling frames sit under every task, cut them off
+                if code.co_name == "_run" and filename.endswith(os.path.join("asyncio", "events.py")):
+                    break
+                if filename.startswith(root):
+                    filename = os.path.relpath(filename, root)
+                else:
+                    filename = os.path.basename(filename)
+                frames.append(f"{filename}:{code.co_name}")
+                frame = frame.f_back
+            frames.reverse()
+
+            if task is not None:
+                frames.insert(0, f"task:{_TASK_ID.sub('N', task.get_name())}")
+            elif frames and frames[-1].endswith(":select"):
+                # Waiting in the selector: the loop had nothing to do
+                frames = ["<idle>"]
+            self.stacks[";".join(frames)] += 1
+            self.samples += 1
+
+    async def _probe_lag(self):
+        """A sleep that should take `interval`; anything beyond that is loop lag."""
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+            self.lag.observe(lag)
+            self.max_lag = max(self.max_lag, lag)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        sampler = threading.Thread(
+            target=self._sample, args=(loop, threading.get_ident()),
+            name="nelius-profiler", daemon=True,
+        )
+
+        # Debug mode only for the session; it makes every callback a bit slower
+        was_debug, was_threshold = loop.get_debug(), loop.slow_callback_duration
+        handler = _SlowCallbackHandler(self)
+        asyncio_logger = logging.getLogger("asyncio")
+        asyncio_logger.addHandler(handler)
+        loop.slow_callback_duration = self.slow_callback
+        loop.set_debug(True)
+
+        sampler.start()
+        probe = asyncio.create_task(self._probe_lag(), name="nelius-profiler-lag")
+        try:
+            await asyncio.sleep(self.seconds)
+        finally:
+            self._stop.set()
+            await probe
+            await asyncio.to_thread(sampler.join)
+            loop.set_debug(was_debug)
+            loop.slow_callback_duration = was_threshold
+            asyncio_logger.removeHandler(handler)
+
+    def collapsed(self) -> bytes:
+        """The samples in collapsed stack format, most frequent stack first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common()).encode()
+
+    def summary(self) -> str:
+        idle = self.stacks.get("<idle>", 0)
+        p50, p99 = self.lag.percentiles(50, 99)
+        lines = [
+            f"🔬 <b>Profile: {self.seconds:g}s</b>",
+            f"• Samples: {self.samples} every {self.interval * 1000:g} ms "
+            f"({idle / max(self.samples, 1) * 100:.0f}% idle)",
+            f"• Loop lag p50 / p99 / max: {p50 * 1000:.1f} / {p99 * 1000:.1f} / {self.max_lag * 1000:.1f} ms",
+            f"• Callbacks over {self.slow_callback * 1000:g} ms: {len(self.slow_callbacks)}",
+        ]
+        # Telegram messages are capped at 4096 characters, the first few are enough
+        for message in self.slow_callbacks[:5]:
+            lines.append(f"<code>{message[:300].replace('<', '&lt;').replace('>', '&gt;')}</code>")
+        return "\n".join(lines)
+
+
+async def profile_for(seconds: float) -> ProfileSession:
+    """Profile the running loop for `seconds` and return the finished session."""
+    global active_session
+    if active_session is not None:
+        raise RuntimeError("A profiling session is already running.")
+
+    seconds = min(seconds, PROFILER_MAX_SECONDS)
+    active_session = ProfileSession(seconds)
+    print(f"🔬 Profiling the event loop for {seconds:g}s")
+    try:
+        await active_session.run()
+        return active_session
+    finally:
+        active_session = None
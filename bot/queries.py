@@ -0,0 +1,213 @@
+# ------------------------
+# Named SQL used by the handlers.
+# Every statement here is prepared once per pooled connection (see bot/db.py),
+# so handlers call them by name instead of re-sending the SQL text.
+# ------------------------
+
+QUERIES = {
+    # --- users ---
+    "user_profile": "SELECT social_id, points FROM users WHERE telegram_id = $1",
+    "user_full_profile": """
+        SELECT social_id, points, phone_number, handles
+        FROM users
+        WHERE telegram_id = $1
+    """,
+    "user_phone": "SELECT phone_number FROM users WHERE telegram_id = $1",
+    "insert_user": "INSERT INTO users (telegram_id, social_id) VALUES ($1, $2)",
+    "set_phone": "UPDATE users SET phone_number = $1 WHERE telegram_id = $2",
+    # Merge one platform handle into the JSONB object
+    "set_handle": """
+        UPDATE users
+        SET handles = COALESCE(handles, '{}'::jsonb) || jsonb_build_object($1::text, $2::text)
+        WHERE telegram_id = $3
+    """,
+    "allocate_points": "UPDATE users SET points = points + $1 WHERE social_id = $2",
+
+    # --- events ---
+    # Members only see running events: started (or no start) and not ended yet
+    "events_list": """
+        SELECT id, title, publicity_score
+        FROM events
+        WHERE (starts_at IS NULL OR starts_at <= now()) AND (ends_at IS NULL OR ends_at > now())
+        ORDER BY id DESC
+    """,
+    "event_detail": """
+        SELECT title, publicity_score, links
+        FROM events
+        WHERE id = $1
+          AND (starts_at IS NULL OR starts_at <= now()) AND (ends_at IS NULL OR ends_at > now())
+    """,
+    "event_title": "SELECT title FROM events WHERE id = $1",
+    "insert_event": """
+        INSERT INTO events (title, links, starts_at, ends_at)
+        VALUES ($1, $2::jsonb, $3, $4)
+        RETURNING id
+    """,
+    # NULL title/links/bounds leave the column as it is; new links merge into the old ones
+    "update_event": """
+        UPDATE events
+        SET title = COALESCE($1, title),
+            links = CASE WHEN $2::jsonb IS NULL THEN links
+                         ELSE COALESCE(links, '{}'::jsonb) || $2::jsonb END,
+            starts_at = COALESCE($4, starts_at),
+            ends_at = COALESCE($5, ends_at)
+        WHERE id = $3
+    """,
+    "set_publicity_score": "UPDATE events SET publicity_score = $1 WHERE id = $2",
+    "delete_event": "DELETE FROM events WHERE id = $1",
+}
+
+# --- reverse lookups (dev /whois) ---
+# One query per platform, so each can use its own expression index (migration 7).
+# The WHERE expressions must match the indexed ones exactly.
+HANDLE_PLATFORMS = ("x", "instagram", "tiktok")
+
+for _platform in HANDLE_PLATFORMS:
+    QUERIES[f"user_by_{_platform}_handle"] = f"""
+        SELECT telegram_id, social_id, points, phone_number, handles
+        FROM users
+        WHERE lower(ltrim(handles ->> '{_platform}', '@')) = $1
+    """
+
+QUERIES["user_by_phone"] = """
+    SELECT telegram_id, social_id, points, phone_number, handles
+    FROM users
+    WHERE regexp_replace(phone_number, '[^0-9]', '', 'g') = $1
+"""
+
+# --- repost verification (bot/reposts.py) ---
+# No row back means the URL, or this member's repost for that event and
+# platform, was already submitted
+QUERIES["insert_repost"] = """
+    INSERT INTO repost_submissions (telegram_id, event_id, platform, url)
+    VALUES ($1, $2, $3, $4)
+    ON CONFLICT DO NOTHING
+    RETURNING id
+"""
+QUERIES["pending_reposts"] = """
+    SELECT id, telegram_id, event_id, platform, url
+    FROM repost_submissions
+    WHERE status = 'pending'
+    ORDER BY id
+"""
+# One statement per batch: ledger rows (skipping submissions already credited),
+# then member points and event publicity from exactly the new ledger rows.
+# $1 submission ids, $2 telegram ids, $3 points each, $4 publicity per repost
+QUERIES["credit_reposts"] = """
+    WITH credited AS (
+        INSERT INTO points_ledger (telegram_id, points, reason, submission_id)
+        SELECT telegram_id, points, 'repost', submission_id
+        FROM unnest($1::int[], $2::bigint[], $3::int[]) AS c(submission_id, telegram_id, points)
+        ON CONFLICT (submission_id) DO NOTHING
+        RETURNING telegram_id, points, submission_id
+    ), member_points AS (
+        UPDATE users u
+        SET points = u.points + c.total
+        FROM (SELECT telegram_id, SUM(points) AS total FROM credited GROUP BY telegram_id) c
+        WHERE u.telegram_id = c.telegram_id
+    ), event_publicity AS (
+        UPDATE events e
+        SET publicity_score = e.publicity_score + b.boost
+        FROM (
+            SELECT s.event_id, COUNT(*) * $4::int AS boost
+            FROM credited c JOIN repost_submissions s ON s.id = c.submission_id
+            GROUP BY s.event_id
+        ) b
+        WHERE e.id = b.event_id
+    )
+    UPDATE repost_submissions
+    SET status = 'verified', reason = NULL, verified_at = CURRENT_TIMESTAMP
+    WHERE id = ANY($1::int[])
+"""
+QUERIES["reject_reposts"] = """
+    UPDATE repost_submissions s
+    SET status = 'rejected', reason = r.reason, verified_at = CURRENT_TIMESTAMP
+    FROM unnest($1::int[], $2::text[]) AS r(id, reason)
+    WHERE s.id = r.id AND s.status = 'pending'
+"""
+
+# --- engagement (bot/engagement.py) ---
+# Adds each event's engagement delta in one statement: $1 event ids, $2 deltas
+QUERIES["add_publicity_scores"] = """
+    UPDATE events e
+    SET publicity_score = e.publicity_score + d.delta
+    FROM unnest($1::int[], $2::int[]) AS d(id, delta)
+    WHERE e.id = d.id
+"""
+
+# --- scheduled jobs (bot/jobs.py) ---
+QUERIES["user_profiles"] = """
+    SELECT telegram_id, social_id, points
+    FROM users
+    WHERE telegram_id = ANY($1::bigint[])
+"""
+# Uses users_points_idx (migration 9)
+QUERIES["top_members"] = """
+    SELECT social_id, points
+    FROM users
+    ORDER BY points DESC, id
+    LIMIT $1
+"""
+QUERIES["member_totals"] = """
+    SELECT COUNT(*) AS members, COALESCE(SUM(points), 0) AS points
+    FROM users
+"""
+QUERIES["event_ids"] = "SELECT id FROM events"
+
+# --- event expiry (bot/jobs.py archive_events, bot/events_cache.py) ---
+# When the active list next changes on its own: the soonest future start or end.
+# Each MIN() is one probe of a partial index (migration 10).
+QUERIES["next_event_boundary"] = """
+    SELECT LEAST(
+        (SELECT MIN(starts_at) FROM events WHERE starts_at > now()),
+        (SELECT MIN(ends_at) FROM events WHERE ends_at > now())
+    )
+"""
+# Move up to $1 ended events into events_archive in one statement
+QUERIES["archive_expired_events"] = """
+    WITH expired AS (
+        DELETE FROM events
+        WHERE id IN (SELECT id FROM events WHERE ends_at <= now() ORDER BY ends_at LIMIT $1)
+        RETURNING id, title, links, publicity_score, starts_at, ends_at
+    )
+    INSERT INTO events_archive (id, title, links, publicity_score, starts_at, ends_at)
+    SELECT id, title, links, publicity_score, starts_at, ends_at FROM expired
+    ON CONFLICT (id) DO NOTHING
+    RETURNING id
+"""
+
+# --- bulk event import (dev /importevents, bot/event_import.py) ---
+# One statement per batch. Links arrive as JSON text ($2) and are cast here.
+QUERIES["insert_events"] = """
+    INSERT INTO events (title, links, starts_at, ends_at)
+    SELECT e.title, e.links::jsonb, e.starts_at, e.ends_at
+    FROM unnest($1::text[], $2::text[], $3::timestamptz[], $4::timestamptz[])
+         WITH ORDINALITY AS e(title, links, starts_at, ends_at, n)
+    ORDER BY e.n
+    RETURNING id
+"""
+# Same rules as update_event: NULL keeps the column, new links merge into the old ones
+QUERIES["update_events"] = """
+    UPDATE events ev
+    SET title = COALESCE(u.title, ev.title),
+        links = CASE WHEN u.links IS NULL THEN ev.links
+                     ELSE COALESCE(ev.links, '{}'::jsonb) || u.links::jsonb END,
+        starts_at = COALESCE(u.starts_at, ev.starts_at),
+        ends_at = COALESCE(u.ends_at, ev.ends_at)
+    FROM unnest($1::int[], $2::text[], $3::text[], $4::timestamptz[], $5::timestamptz[])
+         AS u(id, title, links, starts_at, ends_at)
+    WHERE ev.id = u.id
+    RETURNING ev.id
+"""
+
+# --- inline event search (bot/event_search.py) ---
+# $1 ILIKE pattern ('%launch%'), $2 the search text, $3 limit. Running events
+# only; the pattern uses events_title_trgm_idx (migration 11).
+QUERIES["search_events"] = """
+    SELECT id, title, publicity_score, links
+    FROM events
+    WHERE title ILIKE $1
+      AND (starts_at IS NULL OR starts_at <= now()) AND (ends_at IS NULL OR ends_at > now())
+    ORDER BY similarity(title, $2) DESC, publicity_score DESC, id DESC
+    LIMIT $3
+"""
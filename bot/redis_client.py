@@ -1,40 +1,299 @@
-import json
-import os
+import asyncio
+import time
+from collections import OrderedDict
+
 import redis.asyncio as redis  # <-- Changed to async module
-from dotenv import load_dotenv
+from redis.exceptions import ConnectionError as RedisConnectionError, RedisError, TimeoutError as RedisTimeoutError
+
+from bot import metrics
+from bot.circuit import CircuitBreaker
+from bot.serialization import dumps, loads
+from config.settings import (REDIS_URL, REDIS_SOCKET_TIMEOUT, REDIS_BREAKER_FAILURES, REDIS_BREAKER_RESET,
+                             REDIS_LOCAL_CACHE_TTL, DB_SNAPSHOT_TTL, HOT_PROFILES_WARM_INTERVAL)
+
+# Opens after REDIS_BREAKER_FAILURES connection errors/timeouts in a row
+redis_breaker = CircuitBreaker("redis", REDIS_BREAKER_FAILURES, REDIS_BREAKER_RESET)
+
+
+class RedisUnavailable(RedisConnectionError):
+    """Raised without touching the network while the Redis circuit is open.
+
+    Subclasses redis' ConnectionError, so existing `except` clauses still apply.
+    """
+
+
+class InstrumentedRedis(redis.Redis):
+    """Async Redis client that times every command as redis.<command>.
+
+    Every command also goes through redis_breaker: while Redis is down we fail
+    fast instead of queueing up behind socket timeouts.
+    """
+
+    async def execute_command(self, *args, **options):
+        if not redis_breaker.allow():
+            raise RedisUnavailable("Redis circuit is open")
+        try:
+            with metrics.timer(f"redis.{str(args[0]).lower()}"):
+                result = await super().execute_command(*args, **options)
+        except (RedisConnectionError, RedisTimeoutError, OSError):
+            redis_breaker.record_failure()
+            raise
+        except RedisError:
+            # Redis answered (e.g. WRONGTYPE), so it is up
+            redis_breaker.record_success()
+            raise
+        redis_breaker.record_success()
+        return result
+
+
+class RedisBackend:
+    """Stand-in for the Redis client that forwards to the active backend.
+
+    Modules import `redis_client` once at import time, so swapping the real
+    client for bot.fakes.FakeRedis (benchmarks, load tests) has to happen
+    behind this object. The real client is only created on first use, so
+    importing this module never connects.
+    """
+
+    def __init__(self):
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            # Asynchronous connection pool. Short socket timeouts so a dead
+            # Redis costs one timeout per call, not a hung connection.
+            self._client = InstrumentedRedis.from_url(
+                REDIS_URL,
+                decode_responses=True,
+                socket_timeout=REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+                health_check_interval=30,
+            )
+        return self._client
+
+    def use(self, client):
+        self._client = client
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+redis_client = RedisBackend()
+
+
+def use_redis_backend(client):
+    """Point every module's `redis_client` at another backend, e.g. FakeRedis()."""
+    redis_client.use(client)
+
+
+# ------------------------
+# Fallbacks while Redis is unreachable
+# ------------------------
+
+# In-process copy of recently cached values: key -> (expires_at, value).
+# Only read when Redis fails; kept short-lived so it can't drift far.
+local_cache = OrderedDict()
+LOCAL_CACHE_LIMIT = 10_000
+
+# Cache writes that failed: key -> (expires_at, value). Only the latest write
+# per key matters, and they are replayed once the breaker closes again.
+pending_writes = OrderedDict()
+PENDING_WRITES_LIMIT = 10_000
+
+
+def _local_set(key: str, ttl: int, value: str):
+    local_cache[key] = (time.monotonic() + min(ttl, REDIS_LOCAL_CACHE_TTL), value)
+    local_cache.move_to_end(key)
+    if len(local_cache) > LOCAL_CACHE_LIMIT:
+        local_cache.popitem(last=False)
+
+
+def _local_get(key: str):
+    entry = local_cache.get(key)
+    if entry is None:
+        return None
+    if entry[0] <= time.monotonic():
+        del local_cache[key]
+        return None
+    return entry[1]
+
 
-load_dotenv()
+async def _cache_get(key: str):
+    try:
+        return await redis_client.get(key)
+    except RedisError:
+        metrics.incr("redis.fallback.reads")
+        return _local_get(key)
 
-REDIS_URL = os.getenv("REDIS_URL")
 
-if not REDIS_URL:
-    raise ValueError("Missing REDIS_URL in environment variables")
+async def _cache_set(key: str, ttl: int, value: str):
+    _local_set(key, ttl, value)
+    try:
+        await redis_client.setex(key, ttl, value)
+    except RedisError:
+        metrics.incr("redis.fallback.writes")
+        pending_writes[key] = (time.monotonic() + ttl, value)
+        pending_writes.move_to_end(key)
+        if len(pending_writes) > PENDING_WRITES_LIMIT:
+            pending_writes.popitem(last=False)
 
-# Asynchronous connection pool
-redis_client = redis.from_url(REDIS_URL, decode_responses=True)
+
+async def replay_pending_writes():
+    """Write the cache entries queued during the outage (those not expired yet)."""
+    replayed = 0
+    while pending_writes:
+        key, (expires_at, value) = next(iter(pending_writes.items()))
+        ttl = int(expires_at - time.monotonic())
+        try:
+            if ttl > 0:
+                await redis_client.setex(key, ttl, value)
+                replayed += 1
+        except RedisError:
+            # Down again; the next recovery picks up from here
+            break
+        # Only drop it if no newer write for the key arrived meanwhile
+        if pending_writes.get(key) == (expires_at, value):
+            del pending_writes[key]
+    if replayed:
+        print(f"♻️ Replayed {replayed} cache writes queued while Redis was down")
+
+
+async def invalidate_cache(*keys: str):
+    """Drop cached values everywhere: Redis, the local copy and queued writes."""
+    for key in keys:
+        local_cache.pop(key, None)
+        pending_writes.pop(key, None)
+    try:
+        await redis_client.delete(*keys)
+    except RedisError:
+        metrics.incr("redis.fallback.writes")
+
+
+def _schedule_replay():
+    if pending_writes:
+        asyncio.get_running_loop().create_task(replay_pending_writes())
+
+
+redis_breaker.on_close(_schedule_replay)
 
 # ------------------------
 # Helper Functions
+# (never raise on Redis trouble: a miss sends the caller to Postgres)
 # ------------------------
 
 async def cache_user_profile(user_id: int, social_id: str, points: int):
     """Save user profile to Redis cache."""
-    await redis_client.setex(
-        f"user:{user_id}", 
-        3600, 
-        json.dumps({"social_id": social_id, "points": points})
+    await _cache_set(
+        f"user:{user_id}",
+        3600,
+        dumps({"social_id": social_id, "points": points})
     )
 
 async def get_cached_user_profile(user_id: int):
     """Retrieve cached user profile, return None if not found."""
-    cached = await redis_client.get(f"user:{user_id}")
-    return json.loads(cached) if cached else None
+    cached = await _cache_get(f"user:{user_id}")
+    return loads(cached) if cached else None
+
+# Members who opened their profile recently (telegram_id -> last seen), so the
+# profile warming job knows whose cache to keep hot
+HOT_USERS_KEY = "nelius:hot_users"
 
-async def cache_events_list(events: list):
-    """Cache events list for 10 minutes."""
-    await redis_client.setex("events:list", 600, json.dumps(events))
+
+# user_id -> when this process last recorded them (monotonic). The warm job only
+# looks every HOT_PROFILES_WARM_INTERVAL, so a fresher score than that changes
+# nothing: one ZADD per member per interval instead of one per myid/profile tap.
+_hot_marked = OrderedDict()
+
+
+async def mark_hot_user(user_id: int):
+    now = time.monotonic()
+    last = _hot_marked.get(user_id)
+    if last is not None and now - last < HOT_PROFILES_WARM_INTERVAL:
+        return
+    _hot_marked[user_id] = now
+    _hot_marked.move_to_end(user_id)
+    if len(_hot_marked) > LOCAL_CACHE_LIMIT:
+        _hot_marked.popitem(last=False)
+
+    try:
+        await redis_client.zadd(HOT_USERS_KEY, {user_id: time.time()})
+    except RedisError:
+        pass
+
+async def get_hot_users(limit: int) -> list:
+    """The `limit` most recently active members."""
+    try:
+        return [int(user_id) for user_id in await redis_client.zrevrange(HOT_USERS_KEY, 0, limit - 1)]
+    except RedisError:
+        return []
+
+async def cache_events_list(events: list, ttl: int = 600):
+    """Cache events list for 10 minutes, or `ttl` seconds (up to the next event start/end)."""
+    await _cache_set("events:list", ttl, dumps(events))
 
 async def get_cached_events_list():
     """Retrieve cached events list."""
-    cached = await redis_client.get("events:list")
-    return json.loads(cached) if cached else None
+    cached = await _cache_get("events:list")
+    return loads(cached) if cached else None
+
+async def cache_leaderboard(leaderboard: dict):
+    """Cache the leaderboard ({"members": [...], "totals": {...}}) for 15 minutes."""
+    await _cache_set("leaderboard", 900, dumps(leaderboard))
+
+async def get_cached_leaderboard():
+    cached = await _cache_get("leaderboard")
+    return loads(cached) if cached else None
+
+# ------------------------
+# Read snapshots for degraded mode
+# Long-lived copies of what handlers read from Postgres, served (marked as
+# possibly stale) while the database is unavailable.
+# ------------------------
+
+SNAPSHOT_PREFIX = "nelius:snapshot:"
+
+
+async def save_user_snapshot(user_id: int, **fields):
+    """Merge profile fields (social_id, points, phone_number, handles) into the user's snapshot."""
+    key = f"{SNAPSHOT_PREFIX}user:{user_id}"
+    if "handles" in fields:
+        fields["handles"] = dumps(fields["handles"] or {})
+    if fields.get("phone_number") is None:
+        fields.pop("phone_number", None)
+    try:
+        await redis_client.hset(key, mapping=fields)
+        await redis_client.expire(key, DB_SNAPSHOT_TTL)
+    except RedisError:
+        metrics.incr("redis.fallback.writes")
+
+
+async def get_user_snapshot(user_id: int):
+    try:
+        snapshot = await redis_client.hgetall(f"{SNAPSHOT_PREFIX}user:{user_id}")
+    except RedisError:
+        return None
+    if not snapshot or "social_id" not in snapshot:
+        return None
+    snapshot["points"] = int(snapshot.get("points", 0))
+    snapshot["handles"] = loads(snapshot["handles"]) if "handles" in snapshot else None
+    return snapshot
+
+
+async def save_events_snapshot(events: list):
+    await _cache_set(f"{SNAPSHOT_PREFIX}events", DB_SNAPSHOT_TTL, dumps(events))
+
+
+async def get_events_snapshot():
+    cached = await _cache_get(f"{SNAPSHOT_PREFIX}events")
+    return loads(cached) if cached else None
+
+
+async def save_event_snapshot(event_id: int, title: str, score: int, links: dict):
+    await _cache_set(f"{SNAPSHOT_PREFIX}event:{event_id}", DB_SNAPSHOT_TTL,
+                     dumps({"title": title, "score": score, "links": links}))
+
+
+async def get_event_snapshot(event_id: int):
+    cached = await _cache_get(f"{SNAPSHOT_PREFIX}event:{event_id}")
+    return loads(cached) if cached else None
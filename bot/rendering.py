@@ -0,0 +1,112 @@
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, InlineQueryResultArticle, InputTextMessageContent
+
+from bot.variables import emoji_map
+
+# ------------------------
+# Message rendering shared by the handlers (no I/O, so it stays synchronous
+# and can be benchmarked on its own)
+# ------------------------
+
+
+def sort_events(events_data: list) -> list:
+    """🔥 Sort by score (highest first)."""
+    return sorted(events_data, key=lambda x: x["score"], reverse=True)
+
+
+def render_events_list(events_data: list):
+    """Return (msg, reply_markup) for the events list. Expects events already sorted."""
+    if not events_data:
+        return "📭 No active events yet.", None
+
+    msg = "🎉 *Nelius Events*\nTap an event below to view boost links."
+    keyboard = [
+        [
+            InlineKeyboardButton(
+                f"{e['title']} — ⭐ {e['score']}",
+                callback_data=f"event_{e['id']}"
+            )
+        ]
+        for e in events_data
+    ]
+    return msg, InlineKeyboardMarkup(keyboard)
+
+
+def render_event_detail(title: str, score: int, links_dict: dict, event_id: int = None):
+    """Return (msg, reply_markup) for one event with a button per post link."""
+    # Update the message text to be platform-agnostic
+    msg = (
+        f"🎪 *{title}*\n"
+        f"⭐ Publicity Score: *{score}*\n\n"
+        f"Use the buttons below to visit the event posts.\n"
+        f"Repost them any time you want to boost this event!"
+    )
+    # Callers pass event_id only while reposts can be verified (reposts_enabled)
+    if event_id is not None:
+        msg += f"\nThen send `/repost {event_id} <link to your repost>` to earn points."
+
+    keyboard = []
+
+    # Dynamically generate a button for every link in the database!
+    for platform, url in links_dict.items():
+        # Get the emoji if we know it, otherwise use a generic link emoji
+        emoji = emoji_map.get(platform.lower(), "🔗")
+        btn_text = f"{emoji} {platform.capitalize()} Post"
+
+        keyboard.append([InlineKeyboardButton(btn_text, url=url)])
+
+    # Back button
+    keyboard.append([InlineKeyboardButton("⬅️ Back to Events", callback_data="events_list")])
+
+    return msg, InlineKeyboardMarkup(keyboard)
+
+
+def render_search_results(events_data: list, repost_hint: bool = False) -> list:
+    """Inline search results: one article per event, sending its detail message."""
+    results = []
+    for e in events_data:
+        msg, reply_markup = render_event_detail(e['title'], e['score'], e['links'] or {},
+                                                e['id'] if repost_hint else None)
+        results.append(InlineQueryResultArticle(
+            id=str(e['id']),
+            title=e['title'],
+            description=f"⭐ Publicity Score: {e['score']}",
+            input_message_content=InputTextMessageContent(msg, parse_mode="Markdown"),
+            reply_markup=reply_markup,
+        ))
+    return results
+
+
+def render_profile(social_id: str, points: int, phone_number, handles_dict: dict) -> str:
+    """HTML profile message for /profile and the "👤 My Profile" button."""
+    msg_lines = [
+        f"👤 <b>Nelius Profile</b>",
+        f"🪪 Social ID: <code>{social_id}</code>",
+        f"🏆 Points: {points}",
+        f"📞 Phone: {phone_number or '❌ Not set'}",
+        "",
+        f"📱 <b>Social Handles</b>"
+    ]
+
+    # Dynamically generate handle lines based on whatever is saved
+    if not handles_dict:
+        msg_lines.append("❌ No handles set yet.")
+    else:
+        for platform, handle in handles_dict.items():
+            emoji = emoji_map.get(platform.lower(), "🔗")
+            msg_lines.append(f"{emoji} {platform.capitalize()}: {handle}")
+
+    return "\n".join(msg_lines)
+
+
+def render_leaderboard(members: list, totals: dict) -> str:
+    """HTML leaderboard: top members by points, plus community totals."""
+    medals = {1: "🥇", 2: "🥈", 3: "🥉"}
+    msg_lines = ["🏆 <b>Nelius Leaderboard</b>", ""]
+
+    if not members:
+        msg_lines.append("No points earned yet. Be the first!")
+    for rank, member in enumerate(members, start=1):
+        msg_lines.append(f"{medals.get(rank, f'{rank}.')} <code>{member['social_id']}</code> — {member['points']}")
+
+    msg_lines += ["", f"👥 {totals['members']} members · {totals['points']} points earned"]
+    return "\n".join(msg_lines)
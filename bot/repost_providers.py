@@ -0,0 +1,110 @@
+import asyncio
+
+from bot.bot_utils import normalize_repost_url
+from bot.lookup import normalize_handle
+from config.settings import DEV_MODE
+
+# ------------------------
+# Repost verification providers.
+# A provider answers one question: is this URL really a repost of the event,
+# made by the member who submitted it? bot/reposts.py has already checked the
+# platform, the member's handle and (when the URL carries one) the author
+# before asking. Providers only fetch the post; RepostProvider.verify() then
+# checks it came from the member and shares one of the event's posts, so no
+# provider can credit a repost without those two checks.
+# ------------------------
+
+
+class RepostProvider:
+    """Interface for repost checks. Subclasses implement fetch_post()."""
+
+    name = "base"
+
+    async def fetch_post(self, submission: dict):
+        """The post behind submission["url"] as {"author": handle, "links": [urls]}, or None.
+
+        `links` are the posts it reposts, quotes or links to. `submission` has
+        id, telegram_id, event_id, platform, url, handle (the member's handle on
+        that platform) and event_links (the event's {platform: url} posts).
+        Raise on transient trouble (timeouts, API errors): the worker retries.
+        """
+        raise NotImplementedError
+
+    async def verify(self, submission: dict):
+        """Return (verified, reason) for a submission."""
+        post = await self.fetch_post(submission)
+        if post is None:
+            return False, "We couldn't find this repost."
+
+        author, handle = post.get("author"), submission.get("handle")
+        if not author or not handle or normalize_handle(author) != normalize_handle(handle):
+            return False, "That post isn't from your account."
+        event_posts = {normalize_repost_url(url) for url in (submission.get("event_links") or {}).values()}
+        if not event_posts & {normalize_repost_url(url) for url in post.get("links") or []}:
+            return False, "That post doesn't share the event's post."
+        return True, None
+
+    async def close(self):
+        pass
+
+
+class StubProvider(RepostProvider):
+    """Local provider: no API calls, for development and tests.
+
+    Only knows the posts in `posts` ({url: {"author": ..., "links": [...]}}),
+    every other URL is rejected as not found. With approve_unknown (what
+    DEV_MODE gets) unknown URLs are treated as a repost of the event by the
+    member instead. `latency` simulates a slow platform API, `failures`
+    ({url: n}) raises n times before answering.
+    """
+
+    name = "stub"
+
+    def __init__(self, posts: dict = None, approve_unknown: bool = False, latency: float = 0.0,
+                 failures: dict = None):
+        self.posts = posts or {}
+        self.approve_unknown = approve_unknown
+        self.latency = latency
+        self.failures = dict(failures or {})
+        self.calls = 0
+
+    async def fetch_post(self, submission: dict):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        url = submission["url"]
+        if self.failures.get(url):
+            self.failures[url] -= 1
+            raise ConnectionError(f"stub failure for {url}")
+        if url in self.posts:
+            return self.posts[url]
+        if self.approve_unknown:
+            return {"author": submission.get("handle"), "links": list((submission.get("event_links") or {}).values())}
+        return None
+
+
+# REPOST_PROVIDER picks one of these; platform API providers register here
+PROVIDERS = {
+    StubProvider.name: StubProvider,
+}
+
+
+def create_provider(name: str):
+    """The configured provider, or None (and why) when reposts can't be verified.
+
+    Without one the bot still starts: the pipeline stays off and /repost says
+    verification is unavailable.
+    """
+    if not name:
+        print("⚠️ REPOST_PROVIDER is not set: repost verification is off")
+        return None
+    if name == StubProvider.name:
+        if not DEV_MODE:
+            print("⚠️ REPOST_PROVIDER=stub can't check real posts and only runs with DEV_MODE=1: "
+                  "repost verification is off")
+            return None
+        return StubProvider(approve_unknown=True)
+    if name not in PROVIDERS:
+        print(f"⚠️ Unknown REPOST_PROVIDER '{name}' (known: {', '.join(PROVIDERS)}): repost verification is off")
+        return None
+    return PROVIDERS[name]()
@@ -0,0 +1,341 @@
+import asyncio
+from urllib.parse import urlparse
+
+import asyncpg
+from telegram import Update
+from telegram.error import TelegramError
+from telegram.ext import ContextTypes
+
+from bot import db, metrics
+from bot.bot_utils import link_platform, normalize_repost_url
+from bot.lanes import current_lane, BACKGROUND
+from bot.lookup import normalize_handle
+from bot.redis_client import invalidate_cache
+from bot.repost_providers import create_provider
+from bot.variables import DB_UNAVAILABLE_MSG, REPOSTS_UNAVAILABLE_MSG
+from config.settings import (REPOST_PROVIDER, REPOST_VERIFY_WORKERS, REPOST_VERIFY_TIMEOUT, REPOST_VERIFY_ATTEMPTS,
+                             REPOST_POINTS, REPOST_PUBLICITY_BOOST, REPOST_CREDIT_BATCH, REPOST_CREDIT_INTERVAL)
+
+# ------------------------
+# Repost verification pipeline
+#
+#   /repost <event_id> <url>
+#     -> local checks (platform, event links, member's handle, post author)
+#     -> repost_submissions row (unique URL = dedupe), status 'pending'
+#     -> worker pool asks the provider (bot/repost_providers.py) for the post,
+#        which must be the member's own and share one of the event's posts
+#     -> verified/rejected results are applied in batches: one transaction
+#        writes the points ledger, member points and event publicity
+#
+# Submissions still pending at shutdown stay 'pending' in Postgres and are
+# queued again at the next boot.
+# ------------------------
+
+# Link domains -> the platform names used in users.handles
+PLATFORM_ALIASES = {"x": "x", "twitter": "x", "instagram": "instagram", "tiktok": "tiktok", "vm": "tiktok"}
+PLATFORM_NAMES = {"x": "X", "instagram": "Instagram", "tiktok": "TikTok"}
+SET_HANDLE_COMMANDS = {"x": "/setx", "instagram": "/setig", "tiktok": "/settiktok"}
+
+provider = None
+_queue = None
+_workers = []
+_credit_task = None
+_credit_ready = None
+_db_pool = None
+_bot = None
+# Set by stop_repost_pipeline(): wait_for() can swallow a cancel that lands
+# just as what it waits on finishes (Python < 3.12), so loops check this too
+_stopping = False
+
+# Results waiting for the next crediting batch
+_verified = []   # submissions
+_rejected = []   # (submission, reason)
+
+
+def post_author(platform: str, url: str):
+    """Normalized author handle when the URL carries one, else None (e.g. Instagram)."""
+    parts = urlparse(url).path.strip("/").split("/")
+    if platform == "x" and len(parts) >= 3 and parts[1] == "status":
+        return normalize_handle(parts[0])
+    if platform == "tiktok" and parts[0].startswith("@"):
+        return normalize_handle(parts[0])
+    return None
+
+
+def reposts_enabled() -> bool:
+    """True once the pipeline runs with a real provider (see create_provider)."""
+    return provider is not None
+
+
+def event_platforms(links: dict) -> set:
+    return {PLATFORM_ALIASES.get(link_platform(url)) for url in (links or {}).values()} - {None}
+
+
+# ------------------------
+# Submission
+# ------------------------
+
+async def repost(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/repost <event_id> <link to your repost>"""
+    if not reposts_enabled():
+        await update.message.reply_text(REPOSTS_UNAVAILABLE_MSG)
+        return
+
+    args = context.args or []
+    if len(args) != 2 or not args[0].isdigit() or not args[1].startswith(("http://", "https://")):
+        await update.message.reply_text(
+            "Usage: /repost <event_id> <link to your repost>\n"
+            "e.g. /repost 12 https://x.com/yourhandle/status/123"
+        )
+        return
+
+    event_id = int(args[0])
+    url = normalize_repost_url(args[1])
+    platform = PLATFORM_ALIASES.get(link_platform(url))
+    if platform is None:
+        await update.message.reply_text("❌ Only X, Instagram and TikTok reposts can be verified.")
+        return
+
+    telegram_id = update.effective_user.id
+    db_pool = context.bot_data['db_pool']
+
+    try:
+        async with db_pool.acquire() as conn:
+            event = await db.fetchrow(conn, "event_detail", event_id)
+            user = await db.fetchrow(conn, "user_full_profile", telegram_id)
+
+            if not event:
+                await update.message.reply_text(f"⚠️ No event found with ID {event_id}.")
+                return
+            if not user:
+                await update.message.reply_text("👋 Please use /start to join before submitting reposts.")
+                return
+            if platform not in event_platforms(event['links']):
+                await update.message.reply_text(f"❌ This event has no {PLATFORM_NAMES[platform]} post to repost.")
+                return
+
+            handle = (user['handles'] or {}).get(platform)
+            if not handle:
+                await update.message.reply_text(
+                    f"❌ Set your {PLATFORM_NAMES[platform]} handle first with {SET_HANDLE_COMMANDS[platform]}."
+                )
+                return
+
+            author = post_author(platform, url)
+            if author is not None and author != normalize_handle(handle):
+                await update.message.reply_text(f"❌ That post isn't from your {PLATFORM_NAMES[platform]} account ({handle}).")
+                return
+
+            submission_id = await db.fetchval(conn, "insert_repost", telegram_id, event_id, platform, url)
+    except db.DatabaseUnavailable:
+        await update.message.reply_text(DB_UNAVAILABLE_MSG)
+        return
+
+    if submission_id is None:
+        metrics.incr("reposts.duplicate")
+        await update.message.reply_text("♻️ This repost (or your repost of this event there) was already submitted.")
+        return
+
+    metrics.incr("reposts.submitted")
+    submit({
+        "id": submission_id,
+        "telegram_id": telegram_id,
+        "event_id": event_id,
+        "platform": platform,
+        "url": url,
+        "handle": handle,
+        "event_links": event['links'] or {},
+        "event_title": event['title'],
+    })
+    await update.message.reply_text("📨 Repost received! We'll verify it and credit your points shortly.")
+
+
+def submit(submission: dict):
+    """Queue a submission for verification (no-op until the pipeline is started)."""
+    if _queue is not None:
+        _queue.put_nowait(submission)
+
+
+# ------------------------
+# Verification workers
+# ------------------------
+
+async def _with_details(submission: dict) -> dict:
+    # Submissions re-queued at boot only have their row, not handle and links
+    if "handle" in submission:
+        return submission
+    async with _db_pool.acquire() as conn:
+        user = await db.fetchrow(conn, "user_full_profile", submission["telegram_id"])
+        event = await db.fetchrow(conn, "event_detail", submission["event_id"])
+    return {
+        **submission,
+        "handle": ((user and user['handles']) or {}).get(submission["platform"]),
+        "event_links": (event and event['links']) or {},
+        "event_title": event and event['title'],
+    }
+
+
+async def _verify(submission: dict):
+    for attempt in range(1, REPOST_VERIFY_ATTEMPTS + 1):
+        try:
+            submission = await _with_details(submission)
+            with metrics.timer("reposts.verify"):
+                verified, reason = await asyncio.wait_for(provider.verify(submission), REPOST_VERIFY_TIMEOUT)
+            break
+        except Exception as e:
+            metrics.incr("reposts.verify_errors")
+            if attempt == REPOST_VERIFY_ATTEMPTS:
+                # Left 'pending': the next boot queues it again
+                print(f"⚠️ Could not verify repost {submission['id']}: {e!r}")
+                return
+            await asyncio.sleep(2 ** attempt)
+
+    if verified:
+        _verified.append(submission)
+    else:
+        _rejected.append((submission, reason or "We couldn't find this repost."))
+    if len(_verified) + len(_rejected) >= REPOST_CREDIT_BATCH:
+        _credit_ready.set()
+
+
+async def _worker():
+    # Verification is background work: keep its DB use off the interactive lane
+    current_lane.set(BACKGROUND)
+    while True:
+        submission = await _queue.get()
+        try:
+            await _verify(submission)
+        finally:
+            _queue.task_done()
+        if _stopping:
+            return
+
+
+# ------------------------
+# Batched crediting
+# ------------------------
+
+async def flush_credits() -> int:
+    """Apply every verified/rejected result gathered so far in one transaction."""
+    global _verified, _rejected
+    if not _verified and not _rejected:
+        return 0
+    verified, rejected = _verified, _rejected
+    _verified, _rejected = [], []
+
+    try:
+        async with _db_pool.acquire() as conn:
+            async with conn.transaction():
+                if verified:
+                    await db.execute(
+                        conn, "credit_reposts",
+                        [s["id"] for s in verified],
+                        [s["telegram_id"] for s in verified],
+                        [REPOST_POINTS] * len(verified),
+                        REPOST_PUBLICITY_BOOST,
+                    )
+                if rejected:
+                    await db.execute(
+                        conn, "reject_reposts",
+                        [s["id"] for s, _ in rejected],
+                        [reason for _, reason in rejected],
+                    )
+    except db.DatabaseUnavailable as e:
+        # Keep them for the next batch
+        _verified[:0] = verified
+        _rejected[:0] = rejected
+        print(f"⏳ Repost crediting postponed, database unavailable: {e}")
+        return 0
+    except asyncpg.exceptions.PostgresError as e:
+        # Rows stay 'pending' and are verified again at the next boot
+        print(f"⚠️ Repost crediting batch failed: {e!r}")
+        return 0
+
+    metrics.incr("reposts.verified", len(verified))
+    metrics.incr("reposts.rejected", len(rejected))
+    if verified:
+        print(f"🔁 Credited {len(verified)} reposts ({len(rejected)} rejected)")
+
+    # Cached profiles and the events list now show old points/scores
+    await invalidate_cache("events:list", *{f"user:{s['telegram_id']}" for s in verified})
+
+    for s in verified:
+        await _notify(s["telegram_id"], f"✅ Your repost{_for_event(s)} was verified: +{REPOST_POINTS} points!")
+    for s, reason in rejected:
+        await _notify(s["telegram_id"], f"❌ Your repost{_for_event(s)} couldn't be verified: {reason}")
+    return len(verified) + len(rejected)
+
+
+def _for_event(submission: dict) -> str:
+    title = submission.get("event_title")
+    return f" for '{title}'" if title else ""
+
+
+async def _notify(telegram_id: int, text: str):
+    try:
+        await _bot.send_message(telegram_id, text)
+    except TelegramError as e:
+        # Blocked the bot, deleted account... the points are credited anyway
+        print(f"⚠️ Could not notify {telegram_id}: {e}")
+
+
+async def _credit_loop():
+    current_lane.set(BACKGROUND)
+    while True:
+        try:
+            await asyncio.wait_for(_credit_ready.wait(), timeout=REPOST_CREDIT_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        if _stopping:
+            return
+        _credit_ready.clear()
+        try:
+            await flush_credits()
+        except Exception as e:
+            print(f"⚠️ Repost crediting failed: {e!r}")
+
+
+# ------------------------
+# Lifecycle
+# ------------------------
+
+async def start_repost_pipeline(app, repost_provider=None):
+    """Start the workers and the crediting loop, and queue submissions left pending."""
+    global provider, _queue, _workers, _credit_task, _credit_ready, _db_pool, _bot, _stopping
+    provider = repost_provider or create_provider(REPOST_PROVIDER)
+    if provider is None:
+        # Not configured: /repost answers REPOSTS_UNAVAILABLE_MSG, nothing to run
+        return
+    _db_pool = app.bot_data['db_pool']
+    _bot = app.bot
+    _stopping = False
+    _queue = asyncio.Queue()
+    _credit_ready = asyncio.Event()
+    _workers = [asyncio.create_task(_worker()) for _ in range(REPOST_VERIFY_WORKERS)]
+    _credit_task = asyncio.create_task(_credit_loop())
+    metrics.register_gauge("reposts.queued", _queue.qsize)
+
+    try:
+        async with _db_pool.acquire() as conn:
+            pending = await db.fetch(conn, "pending_reposts")
+    except db.DatabaseUnavailable:
+        pending = []
+    for row in pending:
+        submit(dict(row))
+    print(f"🔁 Repost verification running ({provider.name} provider, "
+          f"{REPOST_VERIFY_WORKERS} workers, {len(pending)} pending)")
+
+
+async def stop_repost_pipeline():
+    """Stop verifying and credit what was already verified (registered as a shutdown flush)."""
+    global _queue, provider, _stopping
+    if _queue is None:
+        return
+    _stopping = True
+    for task in [*_workers, _credit_task]:
+        task.cancel()
+    await asyncio.gather(*_workers, _credit_task, return_exceptions=True)
+    _queue = None
+    await flush_credits()
+    await provider.close()
+    provider = None
@@ -0,0 +1,119 @@
+import asyncio
+import random
+import time
+
+from redis.exceptions import RedisError
+
+from bot import metrics
+from bot.lanes import current_lane, BACKGROUND
+from bot.redis_client import redis_client
+
+# ------------------------
+# Lightweight asyncio job scheduler (PTB's JobQueue needs the APScheduler extra).
+#
+# Every replica runs the same timers; a Redis "SET NX PX" claim per job and
+# period makes sure only one of them does the work. The claim is not
+# released after the run: it expires just before the next period, so a
+# replica whose timer fires a few seconds later skips instead of repeating.
+# ------------------------
+
+LOCK_PREFIX = "nelius:jobs:lock:"
+
+
+class ScheduledJob:
+    """`func(app)` every `interval` seconds, +/- `jitter` (a fraction of interval).
+
+    `budget` caps one run (defaults to half the interval); a run over budget
+    is cancelled and counted as a timeout.
+    """
+
+    def __init__(self, name: str, interval: float, func, budget: float = None,
+                 jitter: float = 0.1, run_at_start: bool = False):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.budget = budget or interval / 2
+        self.jitter = jitter
+        self.run_at_start = run_at_start
+        self.last_success = None
+        metrics.register_gauge(f"job.{name}.seconds_since_success", self._since_success)
+
+    def _since_success(self):
+        return -1 if self.last_success is None else round(time.monotonic() - self.last_success)
+
+    def next_delay(self) -> float:
+        return self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    async def _claim(self) -> bool:
+        # Expires a little before the next period so clock drift can't skip one
+        ttl_ms = int(self.interval * (1 - self.jitter) * 1000 * 0.9)
+        try:
+            return bool(await redis_client.set(f"{LOCK_PREFIX}{self.name}", "1", nx=True, px=max(ttl_ms, 1)))
+        except RedisError:
+            # Without Redis we can't tell who runs it; everything here needs Redis anyway
+            return False
+
+    async def run_once(self, app) -> bool:
+        """Claim the period and run the job inside its budget. False if skipped or failed."""
+        if not await self._claim():
+            metrics.incr(f"job.{self.name}.skipped")
+            return False
+
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.func(app), timeout=self.budget)
+        except asyncio.TimeoutError:
+            metrics.incr(f"job.{self.name}.timeouts")
+            print(f"⏱️ Job {self.name} went over its {self.budget:g}s budget")
+            return False
+        except Exception as e:
+            metrics.incr(f"job.{self.name}.errors")
+            print(f"⚠️ Job {self.name} failed: {e!r}")
+            return False
+        finally:
+            metrics.observe(f"job.{self.name}", time.perf_counter() - started)
+
+        metrics.incr(f"job.{self.name}.runs")
+        self.last_success = time.monotonic()
+        return True
+
+    async def loop(self, app):
+        # Jobs read Postgres through the lane pool: keep them off the interactive slice
+        current_lane.set(BACKGROUND)
+        if not self.run_at_start:
+            await asyncio.sleep(self.next_delay())
+        while True:
+            await self.run_once(app)
+            # wait_for() can swallow a cancel that lands just as the job
+            # finishes (Python < 3.12): don't sleep out a whole interval then
+            if _stopping.is_set():
+                return
+            await asyncio.sleep(self.next_delay())
+
+
+jobs = []
+_tasks = []
+_stopping = asyncio.Event()
+
+
+def schedule(name: str, interval: float, func, **kwargs) -> ScheduledJob:
+    """Register a job; it starts with start_scheduler()."""
+    job = ScheduledJob(name, interval, func, **kwargs)
+    jobs.append(job)
+    return job
+
+
+def start_scheduler(app):
+    _stopping.clear()
+    for job in jobs:
+        _tasks.append(asyncio.create_task(job.loop(app), name=f"job:{job.name}"))
+    print(f"⏰ Scheduler running {len(jobs)} jobs: {', '.join(job.name for job in jobs)}")
+
+
+async def stop_scheduler():
+    """Cancel every job loop, including runs in progress (registered as a shutdown flush)."""
+    _stopping.set()
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
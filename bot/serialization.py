@@ -0,0 +1,22 @@
+# ------------------------
+# One JSON serializer for Postgres JSONB columns and Redis cache payloads.
+# orjson is used when installed (several times faster), stdlib json otherwise.
+# ------------------------
+
+try:
+    import orjson
+
+    def dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    loads = orjson.loads
+    SERIALIZER = "orjson"
+
+except ImportError:
+    import json
+
+    def dumps(obj) -> str:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+    loads = json.loads
+    SERIALIZER = "json"
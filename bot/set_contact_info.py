@@ -1,9 +1,12 @@
 import redis.asyncio as aioredis
-from dotenv import load_dotenv
 from telegram import Update, ReplyKeyboardMarkup, ReplyKeyboardRemove
 from telegram.ext import ContextTypes, ConversationHandler
 
-load_dotenv()
+from bot import db
+from bot.lookup import index_phone
+from bot.redis_client import get_user_snapshot
+from bot.variables import WRITE_QUEUED_NOTE
+
 PHONE_NUMBER = range(1)
 
 async def add_or_update_phone(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -12,13 +15,15 @@ async def add_or_update_phone(update: Update, context: ContextTypes.DEFAULT_TYPE
     
     db_pool = context.bot_data['db_pool']
 
-    async with db_pool.acquire() as conn:
-        # fetchval() directly returns the single value of the first column (or None)
-        # This completely replaces cursor.execute() + cursor.fetchone()[0]
-        saved_phone = await conn.fetchval(
-            "SELECT phone_number FROM users WHERE telegram_id = $1",
-            user_id
-        )
+    try:
+        async with db_pool.acquire() as conn:
+            # fetchval() directly returns the single value of the first column (or None)
+            # This completely replaces cursor.execute() + cursor.fetchone()[0]
+            saved_phone = await db.fetchval(conn, "user_phone", user_id)
+    except db.DatabaseUnavailable:
+        # The new number is journaled by save_phone; show the last one we know of
+        snapshot = await get_user_snapshot(user_id)
+        saved_phone = snapshot.get('phone_number') if snapshot else None
 
     if saved_phone:
         msg = f"📞 You already have a phone number saved: *{saved_phone}*.\n\nSend a *new number* (without +) to update it:"
@@ -47,15 +52,12 @@ async def save_phone(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     db_pool = context.bot_data['db_pool']
     
-    async with db_pool.acquire() as conn:
-        # Replaced %s with $1, $2 and removed conn.commit()
-        await conn.execute(
-            "UPDATE users SET phone_number = $1 WHERE telegram_id = $2",
-            phone_number, user_id
-        )
+    status = await db.write(db_pool, "set_phone", phone_number, user_id)
+    await index_phone(user_id, phone_number)
 
     await update.message.reply_text(
         f"✅ Your phone number {phone_number} has been saved for giveaways🎉!"
+        + (WRITE_QUEUED_NOTE if status == "JOURNALED" else "")
     )
     return ConversationHandler.END
 
@@ -1,6 +1,14 @@
 from telegram import Update, ReplyKeyboardMarkup
 from telegram.ext import ContextTypes
 
+from bot import db
+from bot.lookup import index_handle
+from bot.variables import WRITE_QUEUED_NOTE
+
+
+def _queued_note(status: str) -> str:
+    return WRITE_QUEUED_NOTE if status == "JOURNALED" else ""
+
 
 async def setx(update: Update, context: ContextTypes.DEFAULT_TYPE):
     args = context.args
@@ -15,14 +23,10 @@ async def setx(update: Update, context: ContextTypes.DEFAULT_TYPE):
     telegram_id = update.effective_user.id
     db_pool = context.bot_data['db_pool']
 
-    async with db_pool.acquire() as conn:
-        await conn.execute("""
-            UPDATE users 
-            SET handles = COALESCE(handles, '{}'::jsonb) || jsonb_build_object('x', $1::text)
-            WHERE telegram_id = $2
-        """, handle, telegram_id)
+    status = await db.write(db_pool, "set_handle", "x", handle, telegram_id)
+    await index_handle(telegram_id, "x", handle)
 
-    await update.message.reply_text(f"✅ X handle updated to {handle}!")
+    await update.message.reply_text(f"✅ X handle updated to {handle}!" + _queued_note(status))
 
 
 async def setig(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -38,14 +42,10 @@ async def setig(update: Update, context: ContextTypes.DEFAULT_TYPE):
     telegram_id = update.effective_user.id
     db_pool = context.bot_data['db_pool']
 
-    async with db_pool.acquire() as conn:
-        await conn.execute("""
-            UPDATE users 
-            SET handles = COALESCE(handles, '{}'::jsonb) || jsonb_build_object('instagram', $1::text)
-            WHERE telegram_id = $2
-        """, handle, telegram_id)
+    status = await db.write(db_pool, "set_handle", "instagram", handle, telegram_id)
+    await index_handle(telegram_id, "instagram", handle)
 
-    await update.message.reply_text(f"✅ Instagram handle updated to {handle}!")
+    await update.message.reply_text(f"✅ Instagram handle updated to {handle}!" + _queued_note(status))
 
 
 async def settiktok(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -61,11 +61,7 @@ async def settiktok(update: Update, context: ContextTypes.DEFAULT_TYPE):
     telegram_id = update.effective_user.id
     db_pool = context.bot_data['db_pool']
 
-    async with db_pool.acquire() as conn:
-        await conn.execute("""
-            UPDATE users 
-            SET handles = COALESCE(handles, '{}'::jsonb) || jsonb_build_object('tiktok', $1::text)
-            WHERE telegram_id = $2
-        """, handle, telegram_id)
+    status = await db.write(db_pool, "set_handle", "tiktok", handle, telegram_id)
+    await index_handle(telegram_id, "tiktok", handle)
 
-    await update.message.reply_text(f"✅ TikTok handle updated to {handle}!")
\ No newline at end of file
+    await update.message.reply_text(f"✅ TikTok handle updated to {handle}!" + _queued_note(status))
\ No newline at end of file
@@ -0,0 +1,124 @@
+import asyncio
+import signal
+import time
+
+from telegram import Update
+
+from bot import webhook
+from bot.redis_client import redis_client
+from bot.serialization import loads
+from bot.watchdog import stop_watchdog
+from config.settings import SHUTDOWN_DRAIN_TIMEOUT, close_db_pool
+
+# ------------------------
+# Graceful shutdown (Render sends SIGTERM on every deploy)
+#
+#   1. stop accepting webhooks: Telegram gets a 503 and redelivers to the new
+#      instance, so nothing is lost and dedup keeps it from running twice
+#   2. drain updates already accepted, up to SHUTDOWN_DRAIN_TIMEOUT; whatever
+#      hasn't started by then is parked in Redis for the next instance
+#   3. flush write-behind buffers (see register_flush)
+#   4. stop the application, close the Postgres pool and Redis
+# ------------------------
+
+# Updates accepted but not started when the drain deadline hit
+UNPROCESSED_UPDATES_KEY = "nelius:shutdown:unprocessed_updates"
+
+# (name, zero-arg coroutine function), flushed in registration order
+_flushers = []
+
+
+def register_flush(name: str, flush):
+    """Run `await flush()` during shutdown, after the update queue has drained."""
+    _flushers.append((name, flush))
+
+
+def install_signal_handlers(stop_signal: asyncio.Event):
+    """SIGTERM/SIGINT set `stop_signal` instead of killing the process mid-update."""
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop_signal.set)
+        except NotImplementedError:
+            # Windows: fall back to KeyboardInterrupt for Ctrl+C
+            pass
+
+
+async def _drain(app, deadline: float) -> bool:
+    processor = app.update_processor
+    while app.update_queue.qsize() or getattr(processor, "pending", processor.current_concurrent_updates):
+        if time.monotonic() >= deadline:
+            return False
+        await asyncio.sleep(0.05)
+    return True
+
+
+async def _park_unprocessed_updates(app) -> int:
+    """Move updates nobody picked up yet from the queue into Redis."""
+    parked = []
+    while not app.update_queue.empty():
+        update = app.update_queue.get_nowait()
+        app.update_queue.task_done()
+        if isinstance(update, Update):
+            parked.append(update.to_json())
+    if parked:
+        try:
+            await redis_client.rpush(UNPROCESSED_UPDATES_KEY, *parked)
+        except Exception as e:
+            print(f"⚠️ Could not park {len(parked)} unprocessed updates: {e}")
+            return 0
+    return len(parked)
+
+
+async def restore_unprocessed_updates(app) -> int:
+    """At boot: queue the updates a previous instance accepted but never ran."""
+    restored = 0
+    try:
+        while True:
+            data = await redis_client.lpop(UNPROCESSED_UPDATES_KEY)
+            if data is None:
+                break
+            await app.update_queue.put(Update.de_json(loads(data), app.bot))
+            restored += 1
+    except Exception as e:
+        print(f"⚠️ Could not restore unprocessed updates: {e}")
+    if restored:
+        print(f"📥 Restored {restored} updates left over by the previous instance")
+    return restored
+
+
+async def graceful_shutdown(app, webhook_runner, db_pool):
+    deadline = time.monotonic() + SHUTDOWN_DRAIN_TIMEOUT
+    print("\n🛑 Shutting down gracefully...")
+
+    # 1. No new updates
+    webhook.stop_accepting()
+    await webhook_runner.cleanup()
+
+    # 2. Let what we already accepted finish
+    if await _drain(app, deadline):
+        print("✅ All in-flight updates handled")
+    else:
+        parked = await _park_unprocessed_updates(app)
+        print(f"⏱️ Drain deadline hit: parked {parked} queued updates for the next instance, "
+              f"{app.update_processor.current_concurrent_updates} still running")
+
+    # 3. Write-behind buffers
+    for name, flush in _flushers:
+        remaining = max(1.0, deadline - time.monotonic())
+        try:
+            await asyncio.wait_for(flush(), timeout=remaining)
+        except Exception as e:
+            print(f"⚠️ Flushing {name} failed: {e!r}")
+
+    # 4. Close everything, the pool and Redis last since handlers use them
+    await stop_watchdog()
+    await app.stop()
+    await app.shutdown()
+    try:
+        await asyncio.wait_for(close_db_pool(db_pool), timeout=10)
+    except asyncio.TimeoutError:
+        # A connection that never came back: don't let it block the exit
+        db_pool.terminate()
+    await redis_client.aclose()
+    print("✅ Shutdown complete.")
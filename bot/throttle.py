@@ -0,0 +1,138 @@
+import time
+from telegram import Update
+
+from bot.bot_utils import command_name
+from bot.redis_client import redis_client, RedisUnavailable
+from bot.variables import menu_buttons
+from config.settings import DEV_IDS, RATE_LIMITS, TAP_COALESCE_WINDOW
+
+THROTTLE_KEY_PREFIX = "nelius:throttle:"
+
+# GCRA (generic cell rate algorithm) in one round trip.
+# Stores a single "theoretical arrival time" per user+command and returns
+# 0 if the request is allowed, otherwise how many ms until it would be.
+GCRA_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local allow_at = tat - tolerance
+if now < allow_at then return allow_at - now end
+local new_tat = tat + interval
+redis.call('SET', KEYS[1], new_tat, 'PX', math.ceil(new_tat - now))
+return 0
+"""
+# Registered per backend (the real client or a fake), see _gcra()
+_gcra_script = None
+_gcra_client = None
+
+# Local caches so spam is dropped without touching Redis:
+# (user_id, command) -> monotonic time the user may try again
+blocked_until = {}
+# (user_id, tap fingerprint) -> monotonic time of the last identical tap
+last_taps = {}
+LOCAL_CACHE_LIMIT = 10_000
+
+
+def _gcra():
+    global _gcra_script, _gcra_client
+    if _gcra_client is not redis_client.client:
+        _gcra_client = redis_client.client
+        _gcra_script = _gcra_client.register_script(GCRA_SCRIPT)
+    return _gcra_script
+
+
+def throttle_command(update: Update) -> str:
+    """Map an update onto the budget it spends: a command, a menu button or a callback."""
+    command = command_name(update)
+    if command:
+        return command
+
+    if update.callback_query:
+        data = update.callback_query.data or ""
+        return "event_detail" if data.startswith("event_") else data or "callback"
+
+    # Inline search fires on every keystroke: its own, larger budget
+    if update.inline_query:
+        return "inline"
+
+    text = update.effective_message.text if update.effective_message else None
+    for label, command in menu_buttons.items():
+        if text and label in text:
+            return command
+    return "default"
+
+
+def _tap_fingerprint(update: Update):
+    """Identity of a button tap for coalescing; None for anything else."""
+    # Only inline buttons and the menu keyboard are taps. Typed text never is:
+    # answering "skip" to two onboarding questions in a row is two replies.
+    if update.callback_query:
+        return f"cb:{update.callback_query.data}"
+    text = update.effective_message.text if update.effective_message else None
+    if text in menu_buttons:
+        return f"menu:{menu_buttons[text]}"
+    return None
+
+
+def _prune(cache: dict, now: float, max_age: float):
+    """Keep the local caches bounded; old entries are useless anyway."""
+    if len(cache) < LOCAL_CACHE_LIMIT:
+        return
+    for key in [k for k, v in cache.items() if now - v > max_age]:
+        del cache[key]
+
+
+async def should_throttle(update: object) -> bool:
+    """True if the update must be dropped: a repeated tap or a user over their budget."""
+    if not isinstance(update, Update) or not update.effective_user:
+        return False
+
+    user_id = update.effective_user.id
+    if user_id in DEV_IDS:
+        return False
+
+    now = time.monotonic()
+
+    # 1. Collapse identical taps inside the coalesce window into one response
+    fingerprint = _tap_fingerprint(update)
+    if fingerprint:
+        tap_key = (user_id, fingerprint)
+        last = last_taps.get(tap_key)
+        last_taps[tap_key] = now
+        _prune(last_taps, now, TAP_COALESCE_WINDOW)
+        if last is not None and now - last < TAP_COALESCE_WINDOW:
+            return True
+
+    # 2. Per-command budget
+    command = throttle_command(update)
+    requests, period = RATE_LIMITS.get(command, RATE_LIMITS["default"])
+    if command not in RATE_LIMITS:
+        command = "default"
+
+    block_key = (user_id, command)
+    if blocked_until.get(block_key, 0) > now:
+        return True
+
+    try:
+        interval_ms = period * 1000 / requests
+        wait_ms = await _gcra()(
+            keys=[f"{THROTTLE_KEY_PREFIX}{command}:{user_id}"],
+            args=[interval_ms, period * 1000 - interval_ms],
+        )
+    except RedisUnavailable:
+        # Circuit open: the local caches above still catch the worst spam
+        return False
+    except Exception as e:
+        # Fail open: Redis trouble must not lock real users out
+        print(f"⚠️ Rate limit check failed for {user_id}: {e}")
+        return False
+
+    if wait_ms:
+        blocked_until[block_key] = now + int(wait_ms) / 1000
+        _prune(blocked_until, now, 0)
+        return True
+
+    return False
@@ -0,0 +1,114 @@
+import asyncio
+import contextvars
+import random
+import sys
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+from bot.serialization import dumps
+from config.settings import TRACE_SAMPLE_RATE, TRACE_SLOW_MS, TRACE_LOG_PATH
+
+# The trace of the update currently being handled (None when not sampled)
+current_trace = contextvars.ContextVar("current_trace", default=None)
+
+# Slow traces waiting to be written. Traces finish on the event loop, but the
+# write happens in a worker thread (asyncio.to_thread): one flush task at a time
+# drains whatever piled up meanwhile. Bounded, so a stuck disk drops the oldest
+# traces instead of growing memory.
+TRACE_BUFFER_LIMIT = 10_000
+_buffer = deque(maxlen=TRACE_BUFFER_LIMIT)
+_flush_task = None
+
+
+class Trace:
+    """Spans recorded while one update is handled. Offsets are relative to the start."""
+
+    __slots__ = ("trace_id", "attributes", "started", "spans")
+
+    def __init__(self, **attributes):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.attributes = attributes
+        self.started = time.perf_counter()
+        self.spans = []
+
+    def add_span(self, name: str, started: float, duration: float, error: bool = False):
+        self.spans.append((name, started - self.started, duration, error))
+
+    def to_dict(self, duration: float) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            **self.attributes,
+            "duration_ms": round(duration * 1000, 2),
+            "spans": [
+                {
+                    "name": name,
+                    "start_ms": round(offset * 1000, 2),
+                    "duration_ms": round(span_duration * 1000, 2),
+                    **({"error": True} if error else {}),
+                }
+                for name, offset, span_duration, error in self.spans
+            ],
+        }
+
+
+def record_span(name: str, started: float, duration: float, error: bool = False):
+    """Attach a finished span to the current trace, if this update is sampled."""
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add_span(name, started, duration, error)
+
+
+def _append_lines(lines: list):
+    """Blocking write of a batch of JSON lines; runs in a worker thread."""
+    text = "".join(line + "\n" for line in lines)
+    if TRACE_LOG_PATH:
+        with open(TRACE_LOG_PATH, "a", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+
+async def flush_traces():
+    """Write out every buffered trace (also called on shutdown)."""
+    while _buffer:
+        lines = list(_buffer)
+        _buffer.clear()
+        try:
+            await asyncio.to_thread(_append_lines, lines)
+        except OSError as e:
+            print(f"⚠️ Dropped {len(lines)} traces: {e}")
+
+
+def write_trace(record: dict):
+    global _flush_task
+    _buffer.append(dumps(record))
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # No event loop (scripts): nothing to block, write right away
+        _append_lines(list(_buffer))
+        _buffer.clear()
+        return
+    if _flush_task is None or _flush_task.done():
+        _flush_task = loop.create_task(flush_traces())
+
+
+@contextmanager
+def trace_update(**attributes):
+    """Trace everything awaited inside the block; slow traces are written as JSON lines."""
+    if random.random() >= TRACE_SAMPLE_RATE:
+        yield None
+        return
+
+    trace = Trace(**attributes)
+    token = current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        current_trace.reset(token)
+        duration = time.perf_counter() - trace.started
+        if duration * 1000 >= TRACE_SLOW_MS:
+            write_trace(trace.to_dict(duration))
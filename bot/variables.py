@@ -8,6 +8,24 @@ emoji_map = {
             "bsky": "🦋"
         }
 
+# Main menu button text -> the command it behaves like (used for per-command budgets)
+menu_buttons = {
+            "🪪 My ID": "myid",
+            "🏆 My Points": "mypoints",
+            "🎉 Events": "events",
+            "👤 My Profile": "profile",
+        }
+
+# Degraded mode (Postgres unavailable): appended to answers served from snapshots,
+# and sent when there is nothing to serve. Plain text, safe in Markdown and HTML.
+STALE_NOTE = "\n\n⚠️ Possibly out of date: our database is briefly unavailable."
+DB_UNAVAILABLE_MSG = "⏳ Nelius is briefly unavailable. Please try again in a minute!"
+WRITE_QUEUED_NOTE = "\n\n🕒 Our database is briefly unavailable, your change will be applied shortly."
+# /repost while no verification provider is configured (REPOST_PROVIDER)
+REPOSTS_UNAVAILABLE_MSG = "🚧 Repost verification isn't available yet. Keep sharing, points for reposts are coming soon!"
+# Dev commands: the change is saved, but Redis (cache) couldn't be updated
+CACHE_UNAVAILABLE_NOTE = "\n\n⚠️ Cache unavailable: saved, but the cached copy may be stale until it expires."
+
 fruits = [
     "apple", "apricot", "avocado", "banana", "berry", "blackberry", "blueberry", "cantaloupe",
     "cherry", "coconut", "cranberry", "date", "dragonfruit", "fig", "grape", "guava",
@@ -0,0 +1,146 @@
+import asyncio
+import functools
+import importlib
+import sys
+import threading
+import time
+import traceback
+
+from bot import metrics
+from config.settings import LOOP_WATCHDOG_INTERVAL_MS, LOOP_BLOCK_THRESHOLD_MS
+
+# ------------------------
+# Event loop watchdog
+#
+# A heartbeat coroutine ticks every LOOP_WATCHDOG_INTERVAL_MS and records how
+# late each tick was as `loop.lag`. A side thread watches the heartbeat: when
+# it stops for longer than LOOP_BLOCK_THRESHOLD_MS, something is holding the
+# loop (sync I/O, a CPU-heavy loop, ...) and the thread prints the loop
+# thread's stack at that moment, i.e. the offending code.
+# ------------------------
+
+_interval = LOOP_WATCHDOG_INTERVAL_MS / 1000
+_threshold = LOOP_BLOCK_THRESHOLD_MS / 1000
+
+_last_beat = 0.0
+_heartbeat_task = None
+_watch_thread = None
+_stop = threading.Event()
+
+
+async def _heartbeat():
+    global _last_beat
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(_interval)
+        metrics.observe("loop.lag", max(0.0, time.perf_counter() - started - _interval))
+        _last_beat = time.monotonic()
+
+
+def _watch(loop, loop_thread_id):
+    reported_beat = None
+    while not _stop.wait(_interval):
+        beat = _last_beat
+        stalled = time.monotonic() - beat
+        # Report each stall once, when it first crosses the threshold
+        if stalled < _threshold or beat == reported_beat:
+            continue
+        reported_beat = beat
+
+        frame = sys._current_frames().get(loop_thread_id)
+        task = asyncio.current_task(loop)
+        stack = "".join(traceback.format_stack(frame)[-12:]) if frame is not None else "  <no frame>\n"
+
+        metrics.incr("loop.blocked")
+        print(
+            f"🐢 Event loop blocked for {stalled * 1000:.0f} ms+"
+            f" (task: {task.get_name() if task else 'none'}):\n{stack}"
+        )
+
+
+def start_watchdog():
+    """Start the heartbeat and the watcher thread. Call from inside the running loop."""
+    global _heartbeat_task, _watch_thread, _last_beat
+    if _heartbeat_task is not None:
+        return
+
+    loop = asyncio.get_running_loop()
+    _last_beat = time.monotonic()
+    _stop.clear()
+    _heartbeat_task = loop.create_task(_heartbeat(), name="nelius-watchdog")
+    _watch_thread = threading.Thread(
+        target=_watch, args=(loop, threading.get_ident()), name="nelius-watchdog", daemon=True
+    )
+    _watch_thread.start()
+    print(f"🐕 Loop watchdog on (reporting blocks over {LOOP_BLOCK_THRESHOLD_MS:g} ms)")
+
+
+async def stop_watchdog():
+    global _heartbeat_task, _watch_thread
+    if _heartbeat_task is None:
+        return
+    _stop.set()
+    _heartbeat_task.cancel()
+    try:
+        await _heartbeat_task
+    except asyncio.CancelledError:
+        pass
+    await asyncio.to_thread(_watch_thread.join)
+    _heartbeat_task = _watch_thread = None
+
+
+# ------------------------
+# Strict mode (load tests, local runs): known blocking calls raise when they
+# are made on a thread that is running an event loop. Code moved off the loop
+# with asyncio.to_thread() runs on a worker thread and is still allowed.
+# ------------------------
+
+class BlockingCallError(RuntimeError):
+    """A known blocking call was made from inside the event loop."""
+
+
+# (module, attribute path) of calls that must never run on the loop thread
+BLOCKING_CALLS = [
+    ("time", "sleep"),
+    ("requests.sessions", "Session.request"),
+    ("urllib.request", "urlopen"),
+    ("sqlite3", "connect"),
+    ("dotenv", "load_dotenv"),
+]
+
+# (owner, attribute, original) for everything strict mode patched
+_patched = []
+
+
+def _guard(name, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if asyncio._get_running_loop() is not None:
+            metrics.incr("loop.blocking_calls")
+            raise BlockingCallError(f"{name}() called inside the event loop; use asyncio.to_thread()")
+        return func(*args, **kwargs)
+    return wrapper
+
+
+def enable_strict_mode():
+    """Make every call in BLOCKING_CALLS raise BlockingCallError on the loop thread."""
+    if _patched:
+        return
+    for module_name, path in BLOCKING_CALLS:
+        try:
+            owner = importlib.import_module(module_name)
+        except ImportError:
+            continue
+        *parents, attribute = path.split(".")
+        for parent in parents:
+            owner = getattr(owner, parent)
+        original = getattr(owner, attribute)
+        _patched.append((owner, attribute, original))
+        setattr(owner, attribute, _guard(f"{module_name}.{path}", original))
+    print(f"🚨 Strict mode: {len(_patched)} blocking calls are forbidden on the event loop")
+
+
+def disable_strict_mode():
+    while _patched:
+        owner, attribute, original = _patched.pop()
+        setattr(owner, attribute, original)
@@ -0,0 +1,60 @@
+from aiohttp import web
+from telegram import Update
+
+from bot import metrics
+from config.settings import METRICS_PATH
+
+# Cleared on shutdown: new POSTs get a 503 so Telegram redelivers them to the
+# next instance instead of us accepting work we won't finish
+accepting_updates = True
+
+
+def stop_accepting():
+    global accepting_updates
+    accepting_updates = False
+
+
+def build_webhook_app(app, url_path: str) -> web.Application:
+    """aiohttp app that feeds Telegram webhook POSTs into the PTB update queue.
+
+    Replaces `app.updater.start_webhook()` so the same server can also expose
+    /<METRICS_PATH> for Prometheus.
+    """
+
+    async def receive_update(request: web.Request):
+        if not accepting_updates:
+            return web.Response(status=503, headers={"Retry-After": "1"})
+
+        try:
+            data = await request.json()
+        except ValueError:
+            return web.Response(status=400)
+        # Valid JSON but not an Update (a list, a missing update_id...)
+        if not isinstance(data, dict):
+            return web.Response(status=400)
+        try:
+            update = Update.de_json(data, app.bot)
+        except Exception as e:
+            metrics.incr("webhook.rejected")
+            print(f"⚠️ Rejected a webhook body that isn't an Update: {e!r}")
+            return web.Response(status=400)
+
+        metrics.incr("webhook.updates")
+        await app.update_queue.put(update)
+        return web.Response()
+
+    async def prometheus(request: web.Request):
+        return web.Response(text=metrics.render_prometheus(), content_type="text/plain")
+
+    web_app = web.Application()
+    web_app.router.add_post(f"/{url_path}", receive_update)
+    if METRICS_PATH:
+        web_app.router.add_get(f"/{METRICS_PATH.strip('/')}", prometheus)
+    return web_app
+
+
+async def start_webhook_server(app, port: int, url_path: str) -> web.AppRunner:
+    runner = web.AppRunner(build_webhook_app(app, url_path), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "0.0.0.0", port).start()
+    return runner
@@ -7,13 +7,51 @@ load_dotenv()
 # --- Config ---
 DATABASE_URL = os.getenv("DATABASE_URL")
 DEV_IDS = [int(x) for x in os.getenv("DEV_IDS", "").split(",") if x]
+ADMIN_ID = int(os.getenv("ADMIN_IDS", "0"))
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Redis resilience: per-call socket timeout, consecutive failures that open
+# the circuit, seconds before a half-open probe, and how long the in-process
+# copy of cached values may be served while Redis is down
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 1.0))
+REDIS_BREAKER_FAILURES = int(os.getenv("REDIS_BREAKER_FAILURES", 3))
+REDIS_BREAKER_RESET = float(os.getenv("REDIS_BREAKER_RESET", 5))
+REDIS_LOCAL_CACHE_TTL = int(os.getenv("REDIS_LOCAL_CACHE_TTL", 60))
+
+# Postgres pool. Keep DB_POOL_MAX_SIZE x instances under the managed Postgres
+# connection limit (leave a few for migrations and manual psql sessions).
+# At least 2: one is always kept for interactive handlers (see LanePool).
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", 2))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", 10))
+DB_POOL_MAX_QUERIES = int(os.getenv("DB_POOL_MAX_QUERIES", 50000))
+DB_POOL_MAX_INACTIVE_LIFETIME = float(os.getenv("DB_POOL_MAX_INACTIVE_LIFETIME", 300))
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 100))
+# Postgres resilience: seconds to wait for a pooled connection and for any
+# query, consecutive failures that mark the database unhealthy, seconds
+# before a half-open probe, and how long Redis keeps read snapshots
+DB_ACQUIRE_TIMEOUT = float(os.getenv("DB_ACQUIRE_TIMEOUT", 3))
+DB_COMMAND_TIMEOUT = float(os.getenv("DB_COMMAND_TIMEOUT", 5))
+DB_BREAKER_FAILURES = int(os.getenv("DB_BREAKER_FAILURES", 3))
+DB_BREAKER_RESET = float(os.getenv("DB_BREAKER_RESET", 10))
+DB_SNAPSHOT_TTL = int(os.getenv("DB_SNAPSHOT_TTL", 7 * 24 * 3600))
+# Per-statement timeout for schema migrations (index builds outlast DB_COMMAND_TIMEOUT)
+DB_MIGRATION_TIMEOUT = float(os.getenv("DB_MIGRATION_TIMEOUT", 600))
 
 # Telegram Bot Info
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_COMMUNITY_LINK = os.getenv("TELEGRAM_COMMUNITY_LINK")
 WHATSAPP_COMMUNITY_LINK = os.getenv("WHATSAPP_COMMUNITY_LINK")
 
+# Bot API HTTP client, shared by every outbound call: most connections open at
+# once, how many stay open between calls (keep-alive) and for how many seconds,
+# and how long a call may wait for a free connection
+TELEGRAM_POOL_SIZE = int(os.getenv("TELEGRAM_POOL_SIZE", 256))
+TELEGRAM_KEEPALIVE_CONNECTIONS = int(os.getenv("TELEGRAM_KEEPALIVE_CONNECTIONS", 64))
+TELEGRAM_KEEPALIVE_EXPIRY = float(os.getenv("TELEGRAM_KEEPALIVE_EXPIRY", 30))
+TELEGRAM_POOL_TIMEOUT = float(os.getenv("TELEGRAM_POOL_TIMEOUT", 3.0))
+# How long (seconds) Redis remembers what each callback message shows, so
+# identical re-renders skip editMessageText on every replica
+EDIT_FINGERPRINT_TTL = int(os.getenv("EDIT_FINGERPRINT_TTL", 60))
+
 # Rewards
 BLEEPRS_API_KEY = os.getenv("BLEEPRS_API_KEY")
 PHONEVERIFY_API_KEY = os.getenv("PHONEVERIFY_API_KEY")
@@ -21,32 +59,104 @@ PHONEVERIFY_API_KEY = os.getenv("PHONEVERIFY_API_KEY")
 # Web Hook
 WEBHOOK_URL = f"https://{os.getenv('RENDER_EXTERNAL_HOSTNAME')}/{TELEGRAM_BOT_TOKEN}"
 PORT = int(os.getenv("PORT", 8080))
+# Seconds a deploy's SIGTERM gives in-flight updates and buffer flushes
+# (keep it under the platform's kill timeout, 30s on Render)
+SHUTDOWN_DRAIN_TIMEOUT = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", 20))
+# Serve Prometheus metrics on the webhook server at /<METRICS_PATH> (disabled when unset)
+METRICS_PATH = os.getenv("METRICS_PATH")
 
+# Per-update tracing: fraction of updates traced, and the threshold above which
+# a traced update is written out as a JSON line (to TRACE_LOG_PATH, or stdout)
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 0.1))
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", 1000))
+TRACE_LOG_PATH = os.getenv("TRACE_LOG_PATH")
+
+# On-demand profiler (/profiler): stack sampling interval, longest allowed
+# session, and the callback duration reported as slow
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", 5))
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", 120))
+SLOW_CALLBACK_MS = float(os.getenv("SLOW_CALLBACK_MS", 100))
+
+# Loop watchdog: heartbeat interval, and how long the loop may be held before
+# the blocking stack is printed. STRICT_BLOCKING_CALLS=1 makes known sync
+# calls (time.sleep, requests, sqlite3, ...) raise inside the loop.
+LOOP_WATCHDOG_INTERVAL_MS = float(os.getenv("LOOP_WATCHDOG_INTERVAL_MS", 100))
+LOOP_BLOCK_THRESHOLD_MS = float(os.getenv("LOOP_BLOCK_THRESHOLD_MS", 250))
+STRICT_BLOCKING_CALLS = os.getenv("STRICT_BLOCKING_CALLS", "0") == "1"
+
+# Local development: enables test doubles that must never run in production
+# (e.g. REPOST_PROVIDER=stub, which approves every repost)
+DEV_MODE = os.getenv("DEV_MODE", "0") == "1"
+
+# Repost verification: provider name (see bot/repost_providers.py; without
+# one /repost is switched off), worker count, per-check timeout and attempts,
+# rewards per verified repost, and how verified reposts are batched into one
+# crediting transaction
+REPOST_PROVIDER = os.getenv("REPOST_PROVIDER", "")
+REPOST_VERIFY_WORKERS = int(os.getenv("REPOST_VERIFY_WORKERS", 4))
+REPOST_VERIFY_TIMEOUT = float(os.getenv("REPOST_VERIFY_TIMEOUT", 10))
+REPOST_VERIFY_ATTEMPTS = int(os.getenv("REPOST_VERIFY_ATTEMPTS", 3))
+REPOST_POINTS = int(os.getenv("REPOST_POINTS", 10))
+REPOST_PUBLICITY_BOOST = int(os.getenv("REPOST_PUBLICITY_BOOST", 1))
+REPOST_CREDIT_BATCH = int(os.getenv("REPOST_CREDIT_BATCH", 100))
+REPOST_CREDIT_INTERVAL = float(os.getenv("REPOST_CREDIT_INTERVAL", 2.0))
+
+# Engagement scoring: publicity points per event detail view and per new unique
+# viewer, folded into events.publicity_score every
+# ENGAGEMENT_FOLD_INTERVAL seconds (at most ENGAGEMENT_FOLD_BATCH events a pass)
+ENGAGEMENT_VIEW_POINTS = int(os.getenv("ENGAGEMENT_VIEW_POINTS", 1))
+ENGAGEMENT_VIEWER_POINTS = int(os.getenv("ENGAGEMENT_VIEWER_POINTS", 3))
+ENGAGEMENT_FOLD_INTERVAL = float(os.getenv("ENGAGEMENT_FOLD_INTERVAL", 60))
+ENGAGEMENT_FOLD_BATCH = int(os.getenv("ENGAGEMENT_FOLD_BATCH", 500))
+
+# Background jobs (bot/jobs.py): seconds between runs of each job, how many
+# recently active members get their profile cache warmed, leaderboard size,
+# how many ended events one archive statement moves to events_archive
+EVENTS_WARM_INTERVAL = float(os.getenv("EVENTS_WARM_INTERVAL", 300))
+HOT_PROFILES_WARM_INTERVAL = float(os.getenv("HOT_PROFILES_WARM_INTERVAL", 900))
+HOT_PROFILES_LIMIT = int(os.getenv("HOT_PROFILES_LIMIT", 500))
+EVENTS_ARCHIVE_INTERVAL = float(os.getenv("EVENTS_ARCHIVE_INTERVAL", 300))
+EVENTS_ARCHIVE_BATCH = int(os.getenv("EVENTS_ARCHIVE_BATCH", 500))
+LEADERBOARD_REFRESH_INTERVAL = float(os.getenv("LEADERBOARD_REFRESH_INTERVAL", 300))
+LEADERBOARD_SIZE = int(os.getenv("LEADERBOARD_SIZE", 10))
+REDIS_COMPACT_INTERVAL = float(os.getenv("REDIS_COMPACT_INTERVAL", 3600))
+BOT_COMMANDS_REFRESH_INTERVAL = float(os.getenv("BOT_COMMANDS_REFRESH_INTERVAL", 24 * 3600))
+
+# Inline event search (@bot <text>): results per answer, how long a search
+# stays cached (Redis and Telegram's own cache), how long to wait for the
+# next keystroke before querying Postgres, longest query kept
+EVENT_SEARCH_LIMIT = int(os.getenv("EVENT_SEARCH_LIMIT", 20))
+EVENT_SEARCH_CACHE_TTL = int(os.getenv("EVENT_SEARCH_CACHE_TTL", 30))
+EVENT_SEARCH_DEBOUNCE = float(os.getenv("EVENT_SEARCH_DEBOUNCE", 0.35))
+EVENT_SEARCH_MAX_QUERY = int(os.getenv("EVENT_SEARCH_MAX_QUERY", 64))
+
+# Dev /importevents: largest document accepted, and most events in one import
+EVENT_IMPORT_MAX_BYTES = int(os.getenv("EVENT_IMPORT_MAX_BYTES", 2 * 1024 * 1024))
+EVENT_IMPORT_MAX_ROWS = int(os.getenv("EVENT_IMPORT_MAX_ROWS", 5000))
+
+# Priority lanes (interactive taps vs. heavy dev/bulk jobs)
+INTERACTIVE_LANE_CONCURRENCY = int(os.getenv("INTERACTIVE_LANE_CONCURRENCY", 64))
+BACKGROUND_LANE_CONCURRENCY = int(os.getenv("BACKGROUND_LANE_CONCURRENCY", 2))
+BACKGROUND_LANE_DB_CONNECTIONS = int(os.getenv("BACKGROUND_LANE_DB_CONNECTIONS", 2))
+
+# Webhook redelivery protection (seconds an update_id is remembered)
+UPDATE_DEDUP_TTL = int(os.getenv("UPDATE_DEDUP_TTL", 3600))
+
+# Flood control: comma separated "<command>=<requests>/<seconds>" budgets per user.
+# "default" applies to anything without its own budget.
+RATE_LIMITS = {
+    name.strip(): (int(budget.split("/")[0]), float(budget.split("/")[1]))
+    for name, budget in (
+        item.split("=") for item in os.getenv(
+            "RATE_LIMITS",
+            "default=30/60,events=6/30,profile=6/30,event_detail=20/60,start=5/60,inline=120/60"
+        ).split(",") if item
+    )
+}
+RATE_LIMITS.setdefault("default", (30, 60.0))
+# Identical taps from the same user inside this window are answered once
+TAP_COALESCE_WINDOW = float(os.getenv("TAP_COALESCE_WINDOW", 1.0))
 
-async def init_db_pool(db_pool):
-    """Run this exactly once when your app/bot starts to create tables."""
-    # Note: We now pass db_pool in as an argument!
-    async with db_pool.acquire() as conn:
-        # Put your table creation queries here, for example:
-        await conn.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id SERIAL PRIMARY KEY,
-            telegram_id BIGINT UNIQUE,
-            social_id TEXT UNIQUE,
-            phone_number TEXT,
-            points INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            handles JSONB  -- New column to store all social media handles in a single JSONB field
-        );
-
-        CREATE TABLE IF NOT EXISTS events (
-            id SERIAL PRIMARY KEY,
-            title TEXT,
-            links JSONB,  -- Store all links in a JSONB column for flexibility
-            publicity_score INTEGER DEFAULT 0
-        );
-        """)
-        print("✅ Database tables verified/initialized.")
 
 async def close_db_pool(db_pool):
     """Run this when your app shuts down."""
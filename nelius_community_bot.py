@@ -1,27 +1,45 @@
 import asyncio
 import asyncpg
+import logging
 import os
-import json
-from dotenv import load_dotenv
 from telegram import (Update, KeyboardButton, ReplyKeyboardMarkup, 
                     ReplyKeyboardRemove, InlineKeyboardButton, InlineKeyboardMarkup)
 from telegram.ext import (Application, MessageHandler, CommandHandler, ConversationHandler,
-                          CallbackQueryHandler, ContextTypes, filters)
+                          CallbackQueryHandler, InlineQueryHandler, ContextTypes, filters)
 
-from bot.redis_client import cache_user_profile, get_cached_user_profile, cache_events_list, get_cached_events_list
-from config.settings import DATABASE_URL, TELEGRAM_BOT_TOKEN, TELEGRAM_COMMUNITY_LINK, WHATSAPP_COMMUNITY_LINK, WEBHOOK_URL, PORT, init_db_pool, close_db_pool
+from bot.redis_client import (cache_user_profile, get_cached_user_profile, get_cached_events_list,
+                              save_user_snapshot, get_user_snapshot, get_events_snapshot,
+                              save_event_snapshot, get_event_snapshot, replay_pending_writes, mark_hot_user)
+from config.settings import DATABASE_URL, TELEGRAM_BOT_TOKEN, TELEGRAM_COMMUNITY_LINK, WHATSAPP_COMMUNITY_LINK, WEBHOOK_URL, PORT, STRICT_BLOCKING_CALLS, REPOST_PROVIDER, close_db_pool
 from bot.generate_and_load_ids import load_to_redis  # import your Social ID loader
-from bot.variables import emoji_map
+from bot.variables import emoji_map, STALE_NOTE, DB_UNAVAILABLE_MSG
+from bot.rendering import sort_events, render_events_list, render_event_detail, render_profile
+from bot.lanes import LaneUpdateProcessor, LanePool
+from bot.migrations import migrate
+from bot.events_cache import refresh_events_cache
+from bot.engagement import record_view, fold_engagement
+from bot.leaderboard import leaderboard
+from bot.event_search import inline_search
+from bot.scheduler import start_scheduler, stop_scheduler
+from bot.jobs import register_jobs
+from bot.reposts import repost, reposts_enabled, start_repost_pipeline, stop_repost_pipeline
+from bot.repost_providers import create_provider
+from bot import db, metrics, tracing
+from bot.instrumentation import create_bot_request, instrument_handlers
+from bot.outbound import answer_once, edit_message
+from bot.webhook import start_webhook_server
+from bot.watchdog import start_watchdog, enable_strict_mode
+from bot.shutdown import install_signal_handlers, register_flush, restore_unprocessed_updates, graceful_shutdown
 
 from bot.onboarding import (start_onboarding, PHONE_ENTRY, X_ENTRY, IG_ENTRY, TIKTOK_ENTRY, MAIN_MENU,
                         save_phone_onboarding, save_x_handle, save_ig_handle, finish_onboarding, cancel_onboarding)  # import onboarding handlers
 from bot.assign_social_id import assign_social_id  # import your Social ID assignment function
-from bot.nelius_dev import (set_bot_commands, refresh_bot_commands, addevent, updateevent, removeevent,
-                        updatepub, allocate, dump_db, airtimereward)  # import dev-only commands
+from bot.nelius_dev import (set_bot_commands, refresh_bot_commands, addevent, updateevent, removeevent, importevents,
+                        updatepub, allocate, dump_db, airtimereward, stats,
+                        profile_loop, whois)  # import dev-only commands
 from bot.set_social_media_handles import setx, setig, settiktok  # import social media handle setter
 from bot.set_contact_info import PHONE_NUMBER, add_or_update_phone, save_phone, cancel # import phone number handlers
 
-load_dotenv()
 
 # Connect to Redis
 # redis_client = redis.from_url(REDIS_URL, decode_responses=True)
@@ -71,136 +89,123 @@ load_dotenv()
 #     await update.message.reply_text(msg, reply_markup=MAIN_MENU)
 
 
-async def myid(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def _load_user_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """(social_id, points, stale) for myid/mypoints: cache, then Postgres, then the snapshot.
+
+    Replies itself and returns None when there is nothing to show.
+    """
     user_id = update.effective_user.id
+    # The warm_hot_profiles job keeps these members' profiles cached (one Redis
+    # write per member per warm interval, not per request)
+    await mark_hot_user(user_id)
 
-    # Reminder: if get_cached_user_profile is an async Redis call, make sure to add 'await'
-    profile = await get_cached_user_profile(user_id) 
-    
-    
-    if not profile:
-        db_pool = context.bot_data.get('db_pool')
-        if not db_pool:
-            await update.message.reply_text("⏳ System is booting up... Please try again in a moment!")
-            print("⚠️ DEBUG: 'db_pool' is missing in mypoints.")
-            return
+    profile = await get_cached_user_profile(user_id)
+    if profile:
+        return profile["social_id"], profile["points"], False
+
+    db_pool = context.bot_data.get('db_pool')
+    if not db_pool:
+        await update.message.reply_text("⏳ System is booting up... Please try again in a moment!")
+        print("⚠️ DEBUG: 'db_pool' is missing in bot_data.")
+        return None
+
+    try:
         async with db_pool.acquire() as conn:
-            row = await conn.fetchrow(
-                "SELECT social_id, points FROM users WHERE telegram_id = $1", 
-                user_id
-            )
-            
-        if not row:
-            await update.message.reply_text("⚠️ You are not registered yet. Use /start to join Nelius.")
-            return
-            
-        # Access by column name from the asyncpg Record object
-        social_id = row['social_id']
-        points = row['points']
-        
-        await cache_user_profile(user_id, social_id, points)
-    else:
-        social_id = profile["social_id"]
+            row = await db.fetchrow(conn, "user_profile", user_id)
+    except db.DatabaseUnavailable:
+        snapshot = await get_user_snapshot(user_id)
+        if not snapshot:
+            await update.message.reply_text(DB_UNAVAILABLE_MSG)
+            return None
+        return snapshot["social_id"], snapshot["points"], True
 
-    await update.message.reply_text(f"🪪 Your Nelius Social ID: {social_id}")
+    if not row:
+        await update.message.reply_text("⚠️ You are not registered yet. Use /start to join Nelius.")
+        return None
 
+    # Access by column name from the asyncpg Record object
+    social_id = row['social_id']
+    points = row['points']
 
-async def mypoints(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_id = update.effective_user.id
-    
-    # Reminder: if get_cached_user_profile is an async Redis call, make sure to add 'await'
-    profile = await get_cached_user_profile(user_id)
+    await cache_user_profile(user_id, social_id, points)
+    await save_user_snapshot(user_id, social_id=social_id, points=points)
+    return social_id, points, False
 
-    if not profile:
-        db_pool = context.bot_data.get('db_pool')
-        if not db_pool:
-            await update.message.reply_text("⏳ System is booting up... Please try again in a moment!")
-            print("⚠️ DEBUG: 'db_pool' is missing in mypoints.")
-            return
-        async with db_pool.acquire() as conn:
-            row = await conn.fetchrow(
-                "SELECT social_id, points FROM users WHERE telegram_id = $1", 
-                user_id
-            )
-            
-        if not row:
-            await update.message.reply_text("⚠️ You are not registered yet. Use /start to join Nelius.")
-            return
-            
-        # Access by column name
-        social_id = row['social_id']
-        points = row['points']
-        
-        await cache_user_profile(user_id, social_id, points)
-    else:
-        points = profile["points"]
 
-    await update.message.reply_text(f"🏆 Your Nelius Points: {points}")
+async def myid(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    loaded = await _load_user_profile(update, context)
+    if not loaded:
+        return
+    social_id, _, stale = loaded
+
+    await update.message.reply_text(f"🪪 Your Nelius Social ID: {social_id}" + (STALE_NOTE if stale else ""))
+
+
+async def mypoints(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    loaded = await _load_user_profile(update, context)
+    if not loaded:
+        return
+    _, points, stale = loaded
+
+    await update.message.reply_text(f"🏆 Your Nelius Points: {points}" + (STALE_NOTE if stale else ""))
 
 
 async def events(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Reminder: if get_cached_events_list is an async Redis call, make sure to add 'await'
     events_data = await get_cached_events_list()
+    stale = False
 
     if not events_data:
         db_pool = context.bot_data.get('db_pool')
-        
-        async with db_pool.acquire() as conn:
-            # fetch() replaces fetchall() and returns a list of Record objects
-            rows = await conn.fetch(
-                "SELECT id, title, publicity_score FROM events ORDER BY id DESC"
-            )
-
-        # Build the list by accessing the Record dictionary keys
-        events_data = [
-            {"id": row['id'], "title": row['title'], "score": row['publicity_score']} for row in rows
-        ]
-        
-        # 🔥 Sort by score (highest first)
-        events_data.sort(key=lambda x: x["score"], reverse=True)
 
-        await cache_events_list(events_data)
+        try:
+            async with db_pool.acquire() as conn:
+                # Sorted by score, and cached (list + snapshot) on the way
+                events_data = await refresh_events_cache(conn)
+        except db.DatabaseUnavailable:
+            events_data = await get_events_snapshot()
+            if events_data is None:
+                await _reply_or_edit(update, DB_UNAVAILABLE_MSG)
+                return
+            stale = True
 
     else:
         # If cached, also ensure sorted
-        events_data = sorted(events_data, key=lambda x: x["score"], reverse=True)
+        events_data = sort_events(events_data)
 
-    if not events_data:
-        msg = "📭 No active events yet."
-        keyboard = None
-    else:
-        msg = "🎉 *Nelius Events*\nTap an event below to view boost links."
-        keyboard = [
-            [
-                InlineKeyboardButton(
-                    f"{e['title']} — ⭐ {e['score']}",
-                    callback_data=f"event_{e['id']}"
-                )
-            ]
-            for e in events_data
-        ]
+    msg, reply_markup = render_events_list(events_data)
+    if stale:
+        msg += STALE_NOTE
 
     if update.message:
         # Called via /events command
         await update.message.reply_text(
             msg,
             parse_mode="Markdown",
-            reply_markup=InlineKeyboardMarkup(keyboard) if keyboard else None
+            reply_markup=reply_markup
         )
     elif update.callback_query:
-        # Called via Back button or other callback
+        # Called via Back button or other callback (answered already by events_list_callback)
         query = update.callback_query
-        await query.answer()
-        await query.edit_message_text(
+        await answer_once(query)
+        await edit_message(
+            query,
             msg,
             parse_mode="Markdown",
-            reply_markup=InlineKeyboardMarkup(keyboard) if keyboard else None
+            reply_markup=reply_markup
         )
 
 
+async def _reply_or_edit(update: Update, text: str):
+    if update.message:
+        await update.message.reply_text(text)
+    elif update.callback_query:
+        await edit_message(update.callback_query, text)
+
+
 async def event_detail_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
-    await query.answer()
+    await answer_once(query)
 
     data = query.data
     if not data.startswith("event_"):
@@ -210,59 +215,38 @@ async def event_detail_callback(update: Update, context: ContextTypes.DEFAULT_TY
     db_pool = context.bot_data.get('db_pool')
 
     # Fetch event info using the new 'links' JSONB column
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            "SELECT title, publicity_score, links FROM events WHERE id = $1",
-            event_id
-        )
+    try:
+        async with db_pool.acquire() as conn:
+            row = await db.fetchrow(conn, "event_detail", event_id)
+    except db.DatabaseUnavailable:
+        snapshot = await get_event_snapshot(event_id)
+        if not snapshot:
+            await edit_message(query, DB_UNAVAILABLE_MSG)
+            return
+        msg, reply_markup = render_event_detail(snapshot['title'], snapshot['score'], snapshot['links'],
+                                                event_id if reposts_enabled() else None)
+        await record_view(event_id, update.effective_user.id)
+        await edit_message(query, msg + STALE_NOTE, parse_mode="Markdown", reply_markup=reply_markup)
+        return
 
     if not row:
-        await query.edit_message_text("❌ Event not found.")
+        await edit_message(query, "❌ Event not found.")
         return
 
-    # Extract explicitly by column name
-    title = row['title']
-    score = row['publicity_score']
-    
-    # asyncpg returns JSONB as a string by default, so we parse it back into a dictionary
-    raw_links = row['links']
-    links_dict = json.loads(raw_links) if raw_links else {}
-
-    # Update the message text to be platform-agnostic
-    msg = (
-        f"🎪 *{title}*\n"
-        f"⭐ Publicity Score: *{score}*\n\n"
-        f"Use the buttons below to visit the event posts.\n"
-        f"Repost them any time you want to boost this event!"
-    )
-
-    keyboard = []
-    
-    # A handy map to give popular platforms their recognizable emojis
-    emoji_map = {
-        "instagram": "📸",
-        "x": "🐦",
-        "tiktok": "🎵",
-        "youtube": "▶️",
-        "linkedin": "💼",
-        "facebook": "📘"
-    }
-
-    # Dynamically generate a button for every link in the database!
-    for platform, url in links_dict.items():
-        # Get the emoji if we know it, otherwise use a generic link emoji
-        emoji = emoji_map.get(platform.lower(), "🔗")
-        btn_text = f"{emoji} {platform.capitalize()} Post"
-        
-        keyboard.append([InlineKeyboardButton(btn_text, url=url)])
-
-    # Back button
-    keyboard.append([InlineKeyboardButton("⬅️ Back to Events", callback_data="events_list")])
-
-    await query.edit_message_text(
-        msg, 
-        parse_mode="Markdown", 
-        reply_markup=InlineKeyboardMarkup(keyboard)
+    # Extract explicitly by column name (the pool's JSONB codec hands us a dict for links)
+    links = row['links'] or {}
+    # The /repost hint only while reposts can be verified
+    msg, reply_markup = render_event_detail(row['title'], row['publicity_score'], links,
+                                            event_id if reposts_enabled() else None)
+    await save_event_snapshot(event_id, row['title'], row['publicity_score'], links)
+    # Feeds the engagement-driven publicity score (bot/engagement.py)
+    await record_view(event_id, update.effective_user.id)
+
+    await edit_message(
+        query,
+        msg,
+        parse_mode="Markdown",
+        reply_markup=reply_markup
     )
 
 
@@ -270,7 +254,7 @@ async def events_list_callback(update: Update, context: ContextTypes.DEFAULT_TYP
     """Directly show events inline, used for initial events list and back button."""
     query = getattr(update, "callback_query", None)
     if query:
-        await query.answer()
+        await answer_once(query)
     
     # This just calls your already-refactored events() function!
     await events(update, context)
@@ -279,48 +263,31 @@ async def events_list_callback(update: Update, context: ContextTypes.DEFAULT_TYP
 async def profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
     telegram_id = update.effective_user.id
     db_pool = context.bot_data.get('db_pool')
+    await mark_hot_user(telegram_id)
 
     # Fetch all user data in one clean, fast query (no JOINs needed!)
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow("""
-            SELECT social_id, points, phone_number, handles
-            FROM users
-            WHERE telegram_id = $1
-        """, telegram_id)
+    try:
+        async with db_pool.acquire() as conn:
+            row = await db.fetchrow(conn, "user_full_profile", telegram_id)
+    except db.DatabaseUnavailable:
+        snapshot = await get_user_snapshot(telegram_id)
+        if not snapshot:
+            await update.message.reply_text(DB_UNAVAILABLE_MSG)
+            return
+        msg = render_profile(snapshot['social_id'], snapshot['points'], snapshot.get('phone_number'),
+                             snapshot['handles'] or {})
+        await update.message.reply_text(msg + STALE_NOTE, parse_mode="HTML")
+        return
 
     if not row:
         await update.message.reply_text("⚠️ You don't have a profile yet. Use /start first.")
         return
 
-    # Extract basic info
-    social_id = row['social_id']
-    points = row['points']
-    phone_number = row['phone_number'] or "❌ Not set"
-
-    # Extract handles safely from the JSONB column
-    raw_handles = row['handles']
-    handles_dict = json.loads(raw_handles) if raw_handles else {}
-
-    # Build the message dynamically
-    msg_lines = [
-        f"👤 <b>Nelius Profile</b>",
-        f"🪪 Social ID: <code>{social_id}</code>",
-        f"🏆 Points: {points}",
-        f"📞 Phone: {phone_number}",
-        "",
-        f"📱 <b>Social Handles</b>"
-    ]
-
-    # Dynamically generate handle lines based on whatever is saved
-    if not handles_dict:
-        msg_lines.append("❌ No handles set yet.")
-    else:
-        for platform, handle in handles_dict.items():
-            emoji = emoji_map.get(platform.lower(), "🔗")
-            msg_lines.append(f"{emoji} {platform.capitalize()}: {handle}")
-
-    # Join the lines with line breaks and send
-    await update.message.reply_text("\n".join(msg_lines), parse_mode="HTML")
+    # Build the message from the row (handles come back from the JSONB column as a dict)
+    msg = render_profile(row['social_id'], row['points'], row['phone_number'], row['handles'] or {})
+    await save_user_snapshot(telegram_id, social_id=row['social_id'], points=row['points'],
+                             phone_number=row['phone_number'], handles=row['handles'])
+    await update.message.reply_text(msg, parse_mode="HTML")
 
 
 async def join_telegram_community(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -337,14 +304,19 @@ async def join_whatsapp_community(update: Update, context: ContextTypes.DEFAULT_
 async def handle_buttons(update: Update, context: ContextTypes.DEFAULT_TYPE):
     text = update.message.text
 
+    # Timed under the command's own name so /stats shows menu taps per button
     if text == "🪪 My ID":
-        await myid(update, context)
+        with metrics.timer("handler.myid"):
+            await myid(update, context)
     elif text == "🏆 My Points":
-        await mypoints(update, context)
+        with metrics.timer("handler.mypoints"):
+            await mypoints(update, context)
     elif text == "🎉 Events":
-        await events(update, context)
+        with metrics.timer("handler.events"):
+            await events(update, context)
     elif text == "👤 My Profile":
-        await profile(update, context)
+        with metrics.timer("handler.profile"):
+            await profile(update, context)
 
 
 # ------------------------
@@ -448,17 +420,31 @@ async def handle_buttons(update: Update, context: ContextTypes.DEFAULT_TYPE):
 #         pass # Expected behavior when stopping the bot
 
 # ------------------------
-# Main Entry Point
+# Application
 # ------------------------
-async def main():
-    await load_to_redis()
-    db_pool = await asyncpg.create_pool(DATABASE_URL)
-
-    # 2. Build the Application
-    app = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+def build_application(db_pool, request=None):
+    """Build the Application with every handler registered.
+
+    `request` lets the load-test harness swap in a stubbed Bot API.
+    """
+    # Updates run concurrently in priority lanes: menu taps and callbacks never
+    # queue behind dev commands like /dump_db or /airtimereward.
+    app = (
+        Application.builder()
+        .token(TELEGRAM_BOT_TOKEN)
+        .concurrent_updates(LaneUpdateProcessor())
+        # Every Bot API call is timed as telegram.<method> (see /stats)
+        .request(request or create_bot_request())
+        # Webhooks are served by our own aiohttp server (bot/webhook.py)
+        .updater(None)
+        .build()
+    )
     
     # Store the db_pool so your handlers can access it!
-    app.bot_data['db_pool'] = db_pool
+    # LanePool caps how many connections the background lane may hold.
+    app.bot_data['db_pool'] = LanePool(db_pool)
+    # Writes journaled while Postgres was down are replayed as soon as it is back
+    db.db_breaker.on_close(lambda: db.schedule_journal_replay(app.bot_data['db_pool']))
 
     # ======================================================================
     # Button interactions (LIFTED ABOVE THE CONVERSATIONS AS A GLOBAL ESCAPE)
@@ -498,22 +484,58 @@ async def main():
     app.add_handler(CommandHandler("setx", setx))
     app.add_handler(CommandHandler("setig", setig))
     app.add_handler(CommandHandler("settiktok", settiktok))
+    app.add_handler(CommandHandler("repost", repost))
+    app.add_handler(CommandHandler("leaderboard", leaderboard))
     app.add_handler(CommandHandler("jointelegramcommunity", join_telegram_community))
     app.add_handler(CommandHandler("joinwhatsappcommunity", join_whatsapp_community))
     
     # Dev commands (from nelius_dev.py)
     app.add_handler(CommandHandler("addevent", addevent))
     app.add_handler(CommandHandler("updateevent", updateevent))
+    app.add_handler(CommandHandler("importevents", importevents))
+    # /importevents as the caption of the uploaded file
+    app.add_handler(MessageHandler(filters.Document.ALL & filters.CaptionRegex(r"^/importevents(@\w+)?(\s|$)"),
+                                   importevents))
     app.add_handler(CommandHandler("removeevent", removeevent))
     app.add_handler(CommandHandler("updatepub", updatepub))
     app.add_handler(CommandHandler("allocate", allocate))
     app.add_handler(CommandHandler("refreshbotcommands", refresh_bot_commands))
     app.add_handler(CommandHandler("dump_db", dump_db))
     app.add_handler(CommandHandler("airtimereward", airtimereward))
+    app.add_handler(CommandHandler("stats", stats))
+    app.add_handler(CommandHandler("profiler", profile_loop))
+    app.add_handler(CommandHandler("whois", whois))
 
     app.add_handler(CallbackQueryHandler(event_detail_callback, pattern=r"^event_\d+$"))
     app.add_handler(CallbackQueryHandler(events_list_callback, pattern=r"^events_list$"))
 
+    # "@NeliusBot <text>" event search (inline mode must be on in @BotFather: /setinline)
+    app.add_handler(InlineQueryHandler(inline_search))
+
+    # Latency histograms for every handler registered above (handler.<name>)
+    instrument_handlers(app)
+    return app
+
+
+# ------------------------
+# Main Entry Point
+# ------------------------
+async def main():
+    # Repost verifier (None when not configured: /repost then says it's unavailable)
+    repost_provider = create_provider(REPOST_PROVIDER)
+
+    await load_to_redis()
+    # Pool sizing, timeouts and prepared named queries all live in bot/db.py
+    db_pool = await db.create_db_pool()
+    # Versioned schema migrations (a no-op once the database is current)
+    await migrate(db_pool)
+
+    # 2. Build the Application
+    app = build_application(db_pool)
+
+    # Apply writes a previous instance journaled during a Postgres outage
+    await db.replay_journal(app.bot_data['db_pool'])
+
     print("🚀 Nelius DAO Bot is running...")
 
 # === WEBHOOK SETUP ===
@@ -530,29 +552,49 @@ async def main():
 
     await app.initialize()
     await app.start()
+
+    # Report anything that holds the event loop (sync I/O in a handler stalls every user)
+    if STRICT_BLOCKING_CALLS:
+        enable_strict_mode()
+    start_watchdog()
     
-    # 3. start_webhook handles BOTH opening the server and telling Telegram the correct URL
-    await app.updater.start_webhook(
-        listen="0.0.0.0",
-        port=port,
-        url_path=TELEGRAM_BOT_TOKEN,
-        webhook_url=webhook_url, 
-    )
+    # 3. Open our webhook server (also serves /<METRICS_PATH> if set), then tell Telegram the URL
+    webhook_runner = await start_webhook_server(app, port=port, url_path=TELEGRAM_BOT_TOKEN)
+    await app.bot.set_webhook(webhook_url)
 
     print(f"Webhook server running at {webhook_url}[:-15]... Waiting for updates...")
 
+    # Verify /repost submissions in the background, crediting them in batches
+    if repost_provider:
+        await start_repost_pipeline(app, repost_provider)
+
+    # Cache warming, leaderboard, engagement folding and Redis compaction (bot/jobs.py)
+    register_jobs()
+    start_scheduler(app)
+
+    # Updates a previous instance accepted but had no time to run
+    await restore_unprocessed_updates(app)
+
+    # Write-behind buffers flushed on shutdown, once the update queue has drained
+    register_flush("cache writes", replay_pending_writes)
+    register_flush("repost credits", stop_repost_pipeline)
+    register_flush("scheduled jobs", stop_scheduler)
+    register_flush("engagement counters", lambda: fold_engagement(app.bot_data['db_pool']))
+    register_flush("write journal", lambda: db.replay_journal(app.bot_data['db_pool']))
+    register_flush("traces", tracing.flush_traces)
+
     # === SAFE RENDER SHUTDOWN ===
+    # SIGTERM (every deploy) and SIGINT just set this; the rest happens below
     stop_signal = asyncio.Event()
+    install_signal_handlers(stop_signal)
     try:
         await stop_signal.wait()
     except (KeyboardInterrupt, asyncio.CancelledError):
         pass  # Render triggered a restart
     finally:
-        print("\n🛑 Shutting down gracefully...")
-        await app.updater.stop()
-        await app.stop()
-        await app.shutdown()
-        print("✅ Shutdown complete.")
+        await graceful_shutdown(app, webhook_runner, db_pool)
 
 if __name__ == "__main__":
+    # Configure logging once, here, instead of at import time in library modules
+    logging.basicConfig(level=logging.INFO)
     asyncio.run(main())
\ No newline at end of file
@@ -9,7 +9,6 @@ from urllib.parse import urlencode
 
 from config.settings import BLEEPRS_API_KEY, PHONEVERIFY_API_KEY
 
-logging.basicConfig(level=logging.INFO)
 log = logging.getLogger(__name__).info
 
 
@@ -0,0 +1,54 @@
+# ------------------------
+# Shared test setup: every test runs against the in-memory fakes (bot/fakes.py),
+# never a live Redis, Postgres or Bot API. Tests are plain functions that drive
+# coroutines with asyncio.run(), so no pytest plugin is needed.
+# ------------------------
+
+import os
+import sys
+from datetime import datetime, timezone
+
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123:test")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from telegram import CallbackQuery, Chat, Message, Update, User
+
+from bot import db, watchdog
+from bot.circuit import CLOSED
+from bot.fakes import FakeRedis
+from bot.redis_client import use_redis_backend, redis_breaker
+
+
+@pytest.fixture(autouse=True, scope="session")
+def strict_blocking_calls():
+    """Strict mode for the whole run, as in load tests: a blocking call on the loop fails its test."""
+    watchdog.enable_strict_mode()
+    yield
+    watchdog.disable_strict_mode()
+
+
+@pytest.fixture(autouse=True)
+def fake_redis():
+    """A fresh FakeRedis behind redis_client, with both circuit breakers closed."""
+    redis = FakeRedis()
+    use_redis_backend(redis)
+    for breaker in (redis_breaker, db.db_breaker):
+        breaker.state = CLOSED
+        breaker.failures = 0
+    yield redis
+
+
+def make_message(update_id: int, user_id: int, text: str) -> Update:
+    user = User(id=user_id, first_name="Member", is_bot=False)
+    chat = Chat(id=user_id, type=Chat.PRIVATE)
+    message = Message(message_id=update_id, date=datetime.now(timezone.utc), chat=chat, from_user=user, text=text)
+    return Update(update_id=update_id, message=message)
+
+
+def make_callback(update_id: int, user_id: int, data: str) -> Update:
+    user = User(id=user_id, first_name="Member", is_bot=False)
+    chat = Chat(id=user_id, type=Chat.PRIVATE)
+    message = Message(message_id=update_id, date=datetime.now(timezone.utc), chat=chat, text="🎉 Nelius Events")
+    query = CallbackQuery(id=str(update_id), from_user=user, chat_instance="1", data=data, message=message)
+    return Update(update_id=update_id, callback_query=query)
@@ -0,0 +1,57 @@
+import asyncio
+
+from bot import db, engagement
+from bot.fakes import FakePool
+from config.settings import ENGAGEMENT_VIEW_POINTS, ENGAGEMENT_VIEWER_POINTS
+
+
+def _views(*viewers, event_id=1):
+    async def main():
+        for user_id in viewers:
+            await engagement.record_view(event_id, user_id)
+
+    asyncio.run(main())
+
+
+def _fold(pool):
+    return asyncio.run(engagement.fold_engagement(pool))
+
+
+def test_views_and_new_unique_viewers_become_publicity(fake_redis):
+    pool = FakePool.seeded(users=0, events=2)
+    before = pool.db.events[1]["publicity_score"]
+
+    _views(7, 7, 8)
+    assert _fold(pool) == 1
+    score = before + 3 * ENGAGEMENT_VIEW_POINTS + 2 * ENGAGEMENT_VIEWER_POINTS
+    assert pool.db.events[1]["publicity_score"] == score
+
+    # Viewers already folded only bring their views, a new one counts once
+    _views(7, 8, 9)
+    assert _fold(pool) == 1
+    assert pool.db.events[1]["publicity_score"] == score + 3 * ENGAGEMENT_VIEW_POINTS + ENGAGEMENT_VIEWER_POINTS
+    assert asyncio.run(fake_redis.hget(engagement.FOLDED_VIEWERS_KEY, "1")) == "3"
+
+    # Nothing new: nothing to fold
+    assert _fold(pool) == 0
+
+
+def test_counters_are_restored_when_postgres_fails_and_folded_once_later(monkeypatch, fake_redis):
+    pool = FakePool.seeded(users=0, events=1)
+    before = pool.db.events[1]["publicity_score"]
+    _views(7, 8)
+
+    async def refused(conn, name):
+        raise ConnectionRefusedError("connection refused")
+
+    monkeypatch.setattr(db, "_statement", refused)
+    assert _fold(pool) == 0
+    assert pool.db.events[1]["publicity_score"] == before
+    assert asyncio.run(fake_redis.smembers(engagement.DIRTY_KEY)) == {"1"}
+    assert asyncio.run(fake_redis.get(engagement.VIEWS_KEY.format(1))) == "2"
+    # Viewers weren't marked as folded, so they still count next time
+    assert asyncio.run(fake_redis.hget(engagement.FOLDED_VIEWERS_KEY, "1")) is None
+
+    monkeypatch.undo()
+    assert _fold(pool) == 1
+    assert pool.db.events[1]["publicity_score"] == before + 2 * ENGAGEMENT_VIEW_POINTS + 2 * ENGAGEMENT_VIEWER_POINTS
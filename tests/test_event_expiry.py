@@ -0,0 +1,70 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from bot import db, jobs
+from bot.events_cache import EVENTS_LIST_TTL, refresh_events_cache
+from bot.fakes import FakePool
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _refresh(pool):
+    async def main():
+        async with pool.acquire() as conn:
+            return await refresh_events_cache(conn)
+
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize("ended", [7, 6])
+def test_ended_events_are_archived_in_batches(monkeypatch, ended):
+    monkeypatch.setattr(jobs, "EVENTS_ARCHIVE_BATCH", 3)
+    calls = []
+    fetch = db.fetch
+
+    async def counting_fetch(conn, name, *args):
+        calls.append(name)
+        return await fetch(conn, name, *args)
+
+    monkeypatch.setattr(db, "fetch", counting_fetch)
+    pool = FakePool.seeded(users=0, events=0)
+    for i in range(ended):
+        pool.db.add_event(f"Ended {i}", ends_at=_now() - timedelta(hours=i + 1))
+    running = pool.db.add_event("Running", ends_at=_now() + timedelta(days=1))["id"]
+    forever = pool.db.add_event("No end")["id"]
+
+    asyncio.run(jobs.archive_events(SimpleNamespace(bot_data={'db_pool': pool})))
+    assert set(pool.db.events) == {running, forever}
+    assert len(pool.db.events_archive) == ended
+    # Full batches go round again; a short (or empty) one ends the run
+    assert calls == ["archive_expired_events"] * (ended // 3 + 1)
+
+
+def test_cached_list_expires_at_the_next_start_or_end(fake_redis):
+    pool = FakePool.seeded(users=0, events=0)
+    pool.db.add_event("Ends soon", ends_at=_now() + timedelta(seconds=90))
+    upcoming = pool.db.add_event("Starts soon", starts_at=_now() + timedelta(seconds=30))["id"]
+
+    events = _refresh(pool)
+    assert [event["title"] for event in events] == ["Ends soon"]
+    assert 29 <= asyncio.run(fake_redis.ttl("events:list")) <= 30
+
+    # Once it has started, the next boundary is the other event's end
+    pool.db.events[upcoming]["starts_at"] = _now() - timedelta(seconds=1)
+    _refresh(pool)
+    assert 89 <= asyncio.run(fake_redis.ttl("events:list")) <= 90
+
+
+def test_without_a_boundary_soon_the_usual_ttl_applies(fake_redis):
+    pool = FakePool.seeded(users=0, events=2)
+    _refresh(pool)
+    assert asyncio.run(fake_redis.ttl("events:list")) in (EVENTS_LIST_TTL - 1, EVENTS_LIST_TTL)
+
+    pool.db.add_event("Next month", starts_at=_now() + timedelta(days=30))
+    _refresh(pool)
+    assert asyncio.run(fake_redis.ttl("events:list")) in (EVENTS_LIST_TTL - 1, EVENTS_LIST_TTL)
@@ -0,0 +1,111 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from bot.event_import import DocumentError, import_events, parse_event_document
+from bot.fakes import FakePool
+from bot.nelius_dev import _format_new_ids
+
+CSV = b"""title,links,starts,ends,id
+Launch week,https://x.com/nelius/status/1 https://instagram.com/p/2,2026-11-01,2026-11-08,
+AMA,https://x.com/nelius/status/3,,,
+"""
+
+
+def _parse(filename, data):
+    return parse_event_document(filename, data)
+
+
+def test_csv_rows_become_events_with_links_by_platform():
+    events, errors = _parse("events.csv", CSV)
+    assert errors == []
+    (line, launch), (_, ama) = events
+    assert line == 2  # line 1 is the header
+    assert launch["id"] is None and launch["title"] == "Launch week"
+    assert set(launch["links"]) == {"x", "instagram"}
+    assert launch["starts_at"].date().isoformat() == "2026-11-01"
+    assert ama["starts_at"] is None and ama["ends_at"] is None
+
+
+def test_csv_url_columns_count_as_links():
+    data = b"title,x,tiktok\nDrop,https://x.com/nelius/status/9,https://www.tiktok.com/@nelius/video/1\n"
+    events, errors = _parse("events.csv", data)
+    assert errors == []
+    assert set(events[0][1]["links"]) == {"x", "tiktok"}
+
+
+def test_json_list_or_events_object_with_link_dict():
+    rows = [{"title": "Launch", "links": {"x": "https://x.com/nelius/status/1"}, "starts": "2026-11-01T18:00"},
+            {"id": 4, "title": "Renamed"}]
+    for document in (rows, {"events": rows}):
+        events, errors = _parse("events.json", json.dumps(document).encode())
+        assert errors == []
+        assert [e["title"] for _, e in events] == ["Launch", "Renamed"]
+        assert events[1][1]["id"] == 4
+
+
+def test_bad_rows_are_rejected_with_their_line_and_the_rest_kept():
+    data = json.dumps([
+        {"title": "Fine"},
+        {"links": ["https://x.com/nelius/status/1"]},
+        {"title": "Bad date", "starts": "next friday"},
+        {"title": "Backwards", "starts": "2026-11-08", "ends": "2026-11-01"},
+        {"title": "Bad link", "links": ["not a url"]},
+        {"id": "seven", "title": "Bad id"},
+        {"id": 3},
+        "not an object",
+        {"title": "Numeric links", "links": 5},
+    ]).encode()
+    events, errors = _parse("events.json", data)
+    assert [e["title"] for _, e in events] == ["Fine"]
+    reasons = dict(errors)
+    assert set(reasons) == {2, 3, 4, 5, 6, 7, 8, 9}
+    assert "need a title" in reasons[2]
+    assert "is not a date" in reasons[3]
+    assert "ends before it starts" in reasons[4]
+    assert "is not a link" in reasons[5]
+    assert "is not a number" in reasons[6]
+    assert "nothing to update" in reasons[7]
+    assert "not an object" in reasons[8]
+    assert "'5' is not a link" in reasons[9]
+
+
+def test_the_same_event_updated_twice_in_one_batch_is_rejected():
+    data = b"id,title\n5,First\n5,Second\n"
+    events, errors = _parse("events.csv", data)
+    assert [e["title"] for _, e in events] == ["First"]
+    assert errors == [(3, "event 5 appears twice")]
+
+
+@pytest.mark.parametrize("filename, data, message", [
+    ("events.txt", b"title\nA\n", ".csv or .json"),
+    ("events.csv", b"", "empty"),
+    ("events.json", b"{not json", "doesn't parse"),
+    ("events.json", b'{"rows": []}', "must be a list"),
+    ("events.csv", "title\nCafé\n".encode("latin-1"), "UTF-8"),
+])
+def test_unreadable_documents_raise_document_error(filename, data, message):
+    with pytest.raises(DocumentError, match=message):
+        _parse(filename, data)
+
+
+def test_import_inserts_new_events_and_updates_existing_ones(fake_redis):
+    pool = FakePool.seeded(users=0, events=2)
+    existing = min(pool.db.events)
+    data = f"id,title,ends\n,Brand new,\n{existing},Renamed,2030-01-01\n{existing + 999},Ghost,\n".encode()
+    events, errors = _parse("events.csv", data)
+    assert errors == []
+
+    new_ids, updated_ids, missing = asyncio.run(import_events(pool, events))
+    assert pool.db.events[new_ids[0]]["title"] == "Brand new"
+    assert updated_ids == [existing]
+    assert pool.db.events[existing]["title"] == "Renamed"
+    assert pool.db.events[existing]["ends_at"] == datetime(2030, 1, 1, tzinfo=timezone.utc)
+    assert missing == [(4, f"no event with id {existing + 999}")]
+
+
+def test_new_ids_are_listed_not_assumed_contiguous():
+    assert _format_new_ids([12, 7, 9]) == "🆕 IDs: 7, 9, 12"
+    assert _format_new_ids(list(range(1, 100, 2))) == "🆕 50 IDs, first 1, last 99"
@@ -0,0 +1,87 @@
+import asyncio
+from types import SimpleNamespace
+
+from bot import db, event_search
+from bot.event_search import cached_search, inline_search, search_events
+from bot.fakes import FakePool
+
+
+def _pool():
+    pool = FakePool.seeded(users=0, events=0)
+    for title in ("Launch week", "Launch party", "Lagos meetup", "AMA"):
+        pool.db.add_event(title, {"x": "https://x.com/nelius/status/1"})
+    return pool
+
+
+def _counting_fetch(monkeypatch):
+    calls = []
+    fetch = db.fetch
+
+    async def counting_fetch(conn, name, *args):
+        calls.append(args[1] if name == "search_events" else name)
+        return await fetch(conn, name, *args)
+
+    monkeypatch.setattr(db, "fetch", counting_fetch)
+    return calls
+
+
+def test_a_complete_prefix_answers_longer_queries_without_postgres(monkeypatch):
+    pool = _pool()
+    calls = _counting_fetch(monkeypatch)
+
+    async def main():
+        await search_events(pool, "la")
+        return await cached_search("la"), await cached_search("launch p"), await cached_search("lagos")
+
+    exact, longer, other = asyncio.run(main())
+    assert {e["title"] for e in exact} == {"Launch week", "Launch party", "Lagos meetup"}
+    assert [e["title"] for e in longer] == ["Launch party"]
+    assert [e["title"] for e in other] == ["Lagos meetup"]
+    assert calls == ["la"]
+
+
+def test_a_prefix_cut_off_at_the_limit_is_not_reused(monkeypatch):
+    monkeypatch.setattr(event_search, "EVENT_SEARCH_LIMIT", 2)
+    pool = _pool()
+
+    async def main():
+        await search_events(pool, "la")
+        return await cached_search("la"), await cached_search("lagos")
+
+    exact, longer = asyncio.run(main())
+    assert len(exact) == 2
+    # "lagos" may be the match that didn't fit: ask Postgres
+    assert longer is None
+
+
+class FakeInlineQuery:
+    def __init__(self, query_id, user_id, text):
+        self.id = query_id
+        self.from_user = SimpleNamespace(id=user_id)
+        self.query = text
+        self.answers = []
+
+    async def answer(self, results, **kwargs):
+        self.answers.append([result.title for result in results])
+
+
+def test_only_the_newest_keystroke_reaches_postgres(monkeypatch):
+    monkeypatch.setattr(event_search, "EVENT_SEARCH_DEBOUNCE", 0.05)
+    pool = _pool()
+    calls = _counting_fetch(monkeypatch)
+    context = SimpleNamespace(bot_data={'db_pool': pool})
+    keystrokes = [FakeInlineQuery(str(n), 7, text) for n, text in enumerate(("l", "la", "lau"))]
+
+    async def main():
+        tasks = []
+        for query in keystrokes:
+            tasks.append(asyncio.create_task(inline_search(SimpleNamespace(inline_query=query), context)))
+            await asyncio.sleep(0.01)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    assert calls == ["lau"]
+    assert [query.answers for query in keystrokes[:2]] == [[], []]
+    (answer,) = keystrokes[2].answers
+    assert sorted(answer) == ["Launch party", "Launch week"]
+    assert 7 not in event_search._latest
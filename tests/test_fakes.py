@@ -0,0 +1,31 @@
+import asyncio
+
+import pytest
+
+from bot import db
+from bot.fakes import FakePool
+
+
+def test_a_transaction_that_raises_leaves_no_writes_behind():
+    pool = FakePool.seeded(users=1, events=1)
+    users, phone = pool.db.users, pool.db.users[1]["phone_number"]
+
+    async def main():
+        async with pool.acquire() as conn:
+            with pytest.raises(RuntimeError):
+                async with conn.transaction():
+                    await db.execute(conn, "set_phone", "+111111111", 1)
+                    pool.db.add_event("Half written")
+                    raise RuntimeError("boom")
+            async with conn.transaction():
+                await db.execute(conn, "set_handle", "x", "@kept", 1)
+
+    asyncio.run(main())
+    assert pool.db.users is users
+    assert pool.db.users[1]["phone_number"] == phone
+    assert [event["title"] for event in pool.db.events.values()] == ["Campaign #1"]
+    assert pool.db.users[1]["handles"]["x"] == "@kept"
+
+
+def test_expire_connections_is_awaitable_like_asyncpg():
+    asyncio.run(FakePool().expire_connections())
@@ -0,0 +1,156 @@
+import asyncio
+import copy
+import json
+import sqlite3
+from contextlib import asynccontextmanager
+
+import pytest
+
+from bot import import_legacy_db as legacy
+from bot.generate_and_load_ids import USED_KEY
+
+SOURCE = "neliusdao.db"
+
+
+class LegacyImportConnection:
+    """The Postgres side of the importer: staging, merge and progress, by statement."""
+
+    def __init__(self, users=None, fail_on_merge=None):
+        self.users = users or {}   # telegram_id -> row
+        self.events = []           # (title, publicity_score)
+        self.progress = {}         # (source, table) -> {"last_id", "imported", "skipped"}
+        self.stage = []
+        self.merges = 0
+        self.fail_on_merge = fail_on_merge
+
+    async def fetchval(self, sql, source, table):
+        return self.progress.get((source, table), {}).get("last_id")
+
+    async def copy_records_to_table(self, table, records, columns):
+        self.stage = [dict(zip(columns, record)) for record in records]
+
+    async def fetch(self, sql):
+        assert sql == legacy.DROP_SOCIAL_ID_CONFLICTS
+        taken = {row["social_id"]: telegram_id for telegram_id, row in self.users.items()}
+        conflicts = [row for row in self.stage
+                     if row["social_id"] in taken and taken[row["social_id"]] != row["telegram_id"]]
+        self.stage = [row for row in self.stage if row not in conflicts]
+        return conflicts
+
+    async def execute(self, sql, *args):
+        if sql in (legacy.STAGE_USERS, legacy.STAGE_EVENTS):
+            self.stage = []
+        elif sql in (legacy.MERGE_USERS, legacy.MERGE_EVENTS):
+            self.merges += 1
+            if self.merges == self.fail_on_merge:
+                raise ConnectionResetError("connection lost mid-import")
+            if sql == legacy.MERGE_EVENTS:
+                self.events += [(row["title"], row["publicity_score"]) for row in self.stage]
+            for row in self.stage if sql == legacy.MERGE_USERS else []:
+                live = self.users.get(row["telegram_id"])
+                handles = json.loads(row["handles"]) if row["handles"] else {}
+                if live is None:
+                    self.users[row["telegram_id"]] = {**row, "handles": handles}
+                else:
+                    live["phone_number"] = live["phone_number"] or row["phone_number"]
+                    live["points"] = max(live["points"], row["points"] or 0)
+                    live["handles"] = {**handles, **(live["handles"] or {})}
+        elif sql == legacy.SAVE_PROGRESS:
+            source, table, last_id, imported, skipped = args
+            saved = self.progress.setdefault((source, table), {"imported": 0, "skipped": 0})
+            saved["last_id"] = last_id
+            saved["imported"] += imported
+            saved["skipped"] += skipped
+        else:
+            raise AssertionError(f"unexpected statement: {sql.strip()[:60]}")
+
+    @asynccontextmanager
+    async def transaction(self):
+        saved = copy.deepcopy((self.users, self.events, self.progress))
+        try:
+            yield
+        except BaseException:
+            self.users, self.events, self.progress = saved
+            raise
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    """Five legacy users (one without a telegram_id, one with a taken social_id) and five events."""
+    path = tmp_path / SOURCE
+    lite = sqlite3.connect(path)
+    lite.executescript("""
+        CREATE TABLE users (id INTEGER PRIMARY KEY, telegram_id INTEGER, social_id TEXT,
+                            phone_number TEXT, points INTEGER, created_at TIMESTAMP);
+        CREATE TABLE social_handles (id INTEGER PRIMARY KEY, user_id INTEGER, platform TEXT, handle TEXT);
+        CREATE TABLE events (id INTEGER PRIMARY KEY, title TEXT, publicity_score INTEGER);
+        INSERT INTO users VALUES
+            (1, 101, 'Legacy1', '+2348100000101', 10, '2023-01-01 10:00:00'),
+            (2, NULL, 'Legacy2', NULL, 5, '2023-01-02 10:00:00'),
+            (3, 103, 'Taken', NULL, 7, '2023-01-03 10:00:00'),
+            (4, 104, 'Legacy4', '+2348100000104', 50, '2023-01-04 10:00:00'),
+            (5, 105, 'Legacy5', NULL, 0, '2023-01-05 10:00:00');
+        INSERT INTO social_handles (user_id, platform, handle) VALUES
+            (1, 'x', '@legacy1'), (1, 'tiktok', '@legacy1tt'), (4, 'x', '@old_handle');
+        INSERT INTO events VALUES (1, 'A', 1), (2, 'B', 2), (3, 'C', 3), (4, 'D', 4), (5, 'E', 5);
+    """)
+    lite.commit()
+    lite.close()
+    return str(path)
+
+
+def _run(conn, path, importer, chunk_size=2):
+    async def main():
+        lite = await asyncio.to_thread(legacy._open_sqlite, path)
+        try:
+            return await importer(conn, lite, SOURCE, chunk_size)
+        finally:
+            await asyncio.to_thread(lite.close)
+
+    return asyncio.run(main())
+
+
+def test_users_are_merged_without_overwriting_live_data(legacy_db, fake_redis):
+    live = {
+        104: {"telegram_id": 104, "social_id": "Legacy4", "phone_number": "+2340000000000", "points": 20,
+              "handles": {"x": "@new_handle"}},
+        999: {"telegram_id": 999, "social_id": "Taken", "phone_number": None, "points": 0, "handles": None},
+    }
+    conn = LegacyImportConnection(users=live)
+
+    imported, skipped = _run(conn, legacy_db, legacy._import_users)
+    # #2 has no telegram_id, #3's Social ID belongs to member 999
+    assert (imported, skipped) == (3, 2)
+    assert conn.users[101]["handles"] == {"x": "@legacy1", "tiktok": "@legacy1tt"}
+    assert conn.users[104]["phone_number"] == "+2340000000000"
+    assert conn.users[104]["points"] == 50
+    assert conn.users[104]["handles"] == {"x": "@new_handle"}
+    assert 103 not in conn.users
+    assert asyncio.run(fake_redis.smembers(USED_KEY)) >= {"Legacy1", "Legacy4", "Legacy5"}
+
+
+def test_interrupted_user_import_resumes_after_the_last_committed_chunk(legacy_db):
+    conn = LegacyImportConnection(fail_on_merge=2)
+    with pytest.raises(ConnectionResetError):
+        _run(conn, legacy_db, legacy._import_users)
+    # The first chunk (legacy ids 1-2) committed, the second rolled back
+    assert conn.progress[(SOURCE, "users")] == {"last_id": 2, "imported": 1, "skipped": 1}
+    assert set(conn.users) == {101}
+
+    conn.fail_on_merge = None
+    assert _run(conn, legacy_db, legacy._import_users) == (3, 0)
+    assert set(conn.users) == {101, 103, 104, 105}
+    assert conn.progress[(SOURCE, "users")] == {"last_id": 5, "imported": 4, "skipped": 1}
+
+
+def test_interrupted_event_import_does_not_duplicate_events(legacy_db):
+    conn = LegacyImportConnection(fail_on_merge=3)
+    with pytest.raises(ConnectionResetError):
+        _run(conn, legacy_db, legacy._import_events)
+    assert [title for title, _ in conn.events] == ["A", "B", "C", "D"]
+
+    conn.fail_on_merge = None
+    assert _run(conn, legacy_db, legacy._import_events) == 1
+    assert [title for title, _ in conn.events] == ["A", "B", "C", "D", "E"]
+    # A finished import has nothing left to do
+    assert _run(conn, legacy_db, legacy._import_events) == 0
@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from bot import db
+from bot.fakes import FakePool
+
+
+@pytest.fixture
+def postgres_down(monkeypatch):
+    """Every named query fails like a dropped connection (until monkeypatch.undo())."""
+    async def refused(conn, name):
+        raise ConnectionRefusedError("connection refused")
+
+    monkeypatch.setattr(db, "_statement", refused)
+
+
+def _journal_length(fake_redis):
+    return asyncio.run(fake_redis.xlen(db.JOURNAL_STREAM))
+
+
+def test_write_goes_straight_to_postgres_when_it_is_up():
+    pool = FakePool.seeded(users=1, events=0)
+    assert asyncio.run(db.write(pool, "set_phone", "+2348100000001", 1)) == "UPDATE 1"
+    assert pool.db.users[1]["phone_number"] == "+2348100000001"
+
+
+def test_writes_are_journaled_while_postgres_is_down_and_replayed_in_order(postgres_down, monkeypatch, fake_redis):
+    pool = FakePool.seeded(users=1, events=0)
+
+    async def while_down():
+        return [
+            await db.write(pool, "set_phone", "+111111111", 1),
+            await db.write(pool, "set_handle", "x", "@first", 1),
+            await db.write(pool, "set_phone", "+222222222", 1),
+        ]
+
+    assert asyncio.run(while_down()) == ["JOURNALED"] * 3
+    assert _journal_length(fake_redis) == 3
+    assert pool.db.users[1]["phone_number"] != "+222222222"
+
+    # Postgres is back
+    monkeypatch.undo()
+    asyncio.run(db.replay_journal(pool))
+    assert _journal_length(fake_redis) == 0
+    assert pool.db.users[1]["phone_number"] == "+222222222"
+    assert pool.db.users[1]["handles"]["x"] == "@first"
+
+
+def test_a_pending_journal_queues_writes_from_every_replica(fake_redis):
+    # Another replica journaled this while Postgres was down: this process never saw it
+    asyncio.run(fake_redis.xadd(db.JOURNAL_STREAM, {"name": "set_phone", "args": '["+111111111", 1]'}))
+    pool = FakePool.seeded(users=1, events=0)
+
+    async def newer_write():
+        status = await db.write(pool, "set_phone", "+222222222", 1)
+        # Let the replay it scheduled drain the journal
+        for _ in range(100):
+            if not await fake_redis.xlen(db.JOURNAL_STREAM):
+                break
+            await asyncio.sleep(0)
+        return status
+
+    # Not written directly, or the older journaled number would overwrite it on replay
+    assert asyncio.run(newer_write()) == "JOURNALED"
+    assert pool.db.users[1]["phone_number"] == "+222222222"
+
+
+def test_replay_drops_writes_postgres_rejects_and_keeps_going(fake_redis):
+    pool = FakePool.seeded(users=1, events=0)
+
+    async def journal():
+        # Member 1 already exists: the insert can never succeed
+        await db.journal_write("insert_user", 1, "FakeSocialIdDuplicate")
+        await db.journal_write("set_handle", "tiktok", "@after", 1)
+
+    asyncio.run(journal())
+    asyncio.run(db.replay_journal(pool))
+    assert _journal_length(fake_redis) == 0
+    assert pool.db.users[1]["social_id"] == "FakeSocialId1"
+    assert pool.db.users[1]["handles"]["tiktok"] == "@after"
+
+
+def test_replay_stops_and_keeps_the_rest_when_postgres_fails_again(postgres_down, fake_redis):
+    pool = FakePool.seeded(users=1, events=0)
+    asyncio.run(db.journal_write("set_phone", "+111111111", 1))
+
+    asyncio.run(db.replay_journal(pool))
+    assert _journal_length(fake_redis) == 1
+
+
+def test_only_one_replica_replays_at_a_time(fake_redis):
+    pool = FakePool.seeded(users=1, events=0)
+    asyncio.run(db.journal_write("set_phone", "+111111111", 1))
+    asyncio.run(fake_redis.set(db.JOURNAL_REPLAY_CLAIM, "1", nx=True, ex=60))
+
+    asyncio.run(db.replay_journal(pool))
+    assert _journal_length(fake_redis) == 1
+
+
+def test_non_journaled_writes_still_fail_while_postgres_is_down(postgres_down):
+    with pytest.raises(db.DatabaseUnavailable):
+        asyncio.run(db.write(FakePool.seeded(users=1, events=0), "allocate_points", 5, "FakeSocialId1"))
@@ -0,0 +1,141 @@
+import asyncio
+import itertools
+
+import pytest
+
+from bot import dedup, lanes, outbound
+from bot.fakes import FakePool
+from bot.lanes import LanePool, LaneUpdateProcessor
+from tests.conftest import make_callback, make_message
+
+# Update ids are remembered process-wide (bloom filter), so every test takes new ones
+_update_ids = itertools.count(10_000)
+
+
+def _run_all(processor, updates, seen):
+    async def handler(update):
+        seen.append(update.update_id)
+
+    async def main():
+        await asyncio.gather(*(processor.do_process_update(u, handler(u)) for u in updates))
+
+    asyncio.run(main())
+
+
+def test_same_user_keeps_arrival_order_when_the_dedup_round_trip_is_slower(monkeypatch):
+    first, second = (make_message(next(_update_ids), 1, text) for text in ("skip", "@nelius"))
+    delays = {first.update_id: 0.05, second.update_id: 0.0}
+
+    async def slow_dedup(update):
+        await asyncio.sleep(delays[update.update_id])
+        return False
+
+    monkeypatch.setattr(lanes, "is_duplicate_update", slow_dedup)
+    seen = []
+    _run_all(LaneUpdateProcessor(), [first, second], seen)
+    assert seen == [first.update_id, second.update_id]
+
+
+def test_different_users_are_not_serialized(monkeypatch):
+    slow, fast = make_message(next(_update_ids), 1, "hi"), make_message(next(_update_ids), 2, "hi")
+    delays = {slow.update_id: 0.05, fast.update_id: 0.0}
+
+    async def slow_dedup(update):
+        await asyncio.sleep(delays[update.update_id])
+        return False
+
+    monkeypatch.setattr(lanes, "is_duplicate_update", slow_dedup)
+    seen = []
+    _run_all(LaneUpdateProcessor(), [slow, fast], seen)
+    assert seen == [fast.update_id, slow.update_id]
+
+
+def test_redelivered_update_runs_once():
+    update_id = next(_update_ids)
+    seen = []
+    _run_all(LaneUpdateProcessor(), [make_message(update_id, 3, "/myid"), make_message(update_id, 3, "/myid")], seen)
+    assert seen == [update_id]
+
+
+def test_redelivery_to_a_restarted_instance_is_caught_in_redis(monkeypatch):
+    update_id = next(_update_ids)
+    seen = []
+    _run_all(LaneUpdateProcessor(), [make_message(update_id, 4, "/myid")], seen)
+
+    # A new process starts with an empty local filter; only Redis remembers
+    monkeypatch.setattr(dedup, "seen_updates", dedup.RotatingBloomFilter())
+    _run_all(LaneUpdateProcessor(), [make_message(update_id, 4, "/myid")], seen)
+    assert seen == [update_id]
+
+
+def test_heavy_dev_commands_go_to_the_background_lane():
+    assert lanes.classify_update(make_message(next(_update_ids), 5, "/dump_db users")) == lanes.BACKGROUND
+    assert lanes.classify_update(make_message(next(_update_ids), 5, "🏆 My Points")) == lanes.INTERACTIVE
+
+
+def test_a_throttled_button_tap_is_still_answered(monkeypatch):
+    answered = []
+
+    async def answer_once(query, *args, **kwargs):
+        answered.append((query.id, args, kwargs))
+        return True
+
+    async def throttled(update):
+        return True
+
+    monkeypatch.setattr(outbound, "answer_once", answer_once)
+    monkeypatch.setattr(lanes, "should_throttle", throttled)
+    tap, message = make_callback(next(_update_ids), 6, "events_list"), make_message(next(_update_ids), 6, "/events")
+    seen = []
+    _run_all(LaneUpdateProcessor(), [tap, message], seen)
+    # Neither handler ran, but the tap got an empty answer so its spinner stops
+    assert seen == []
+    assert answered == [(tap.callback_query.id, (), {})]
+
+
+def test_a_pool_too_small_for_two_lanes_is_rejected():
+    with pytest.raises(ValueError, match="at least 2"):
+        LanePool(FakePool(max_size=1))
+
+
+def test_background_work_leaves_connections_for_interactive_taps():
+    pool = LanePool(FakePool(max_size=3), background_connections=5)
+    held, interactive = [], []
+
+    async def background_job(release):
+        lanes.current_lane.set(lanes.BACKGROUND)
+        async with pool.acquire():
+            held.append(1)
+            await release.wait()
+            held.pop()
+
+    async def main():
+        release = asyncio.Event()
+        jobs = [asyncio.create_task(background_job(release)) for _ in range(4)]
+        await asyncio.sleep(0.01)
+        # Capped at max_size - 1, however many the setting asks for
+        assert len(held) == 2
+        async with pool.acquire():
+            interactive.append(1)
+        release.set()
+        await asyncio.gather(*jobs)
+
+    asyncio.run(main())
+    assert interactive == [1] and held == []
+
+
+def test_updates_take_db_connections_from_their_own_lane():
+    pool = LanePool(FakePool(max_size=4))
+    lanes_used = []
+
+    async def handler(update):
+        async with pool.acquire():
+            lanes_used.append(lanes.current_lane.get())
+
+    async def main(updates):
+        processor = LaneUpdateProcessor()
+        await asyncio.gather(*(processor.do_process_update(u, handler(u)) for u in updates))
+
+    asyncio.run(main([make_message(next(_update_ids), 8, "/dump_db users"),
+                      make_message(next(_update_ids), 9, "🏆 My Points")]))
+    assert sorted(lanes_used) == [lanes.BACKGROUND, lanes.INTERACTIVE]
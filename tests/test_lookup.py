@@ -0,0 +1,52 @@
+import asyncio
+
+from bot import metrics
+from bot.fakes import FakePool
+from bot.lookup import LOOKUP_KEY, find_user, index_handle, looks_like_phone
+
+
+def _find(pool, text, platform=None):
+    return asyncio.run(find_user(pool, text, platform))
+
+
+def _counter(name):
+    return metrics.counters.get(name, 0)
+
+
+def test_handles_and_phones_match_however_they_are_typed(fake_redis):
+    pool = FakePool.seeded(users=3, events=0)
+    pool.db.users[3]["handles"]["tiktok"] = "@Fake2_TT"
+
+    kind, row = _find(pool, "@FAKE1 ")
+    assert (kind, row["telegram_id"]) == ("x", 2)
+    kind, row = _find(pool, "fake2_tt")
+    assert (kind, row["telegram_id"]) == ("tiktok", 3)
+    kind, row = _find(pool, "+234 810-000-0002")
+    assert (kind, row["telegram_id"]) == ("phone", 3)
+    assert _find(pool, "@nobody") is None
+
+
+def test_a_database_hit_is_remembered_and_served_from_redis(fake_redis):
+    pool = FakePool.seeded(users=2, events=0)
+    db_hits, redis_hits = _counter("lookup.db_hit"), _counter("lookup.redis_hit")
+
+    assert _find(pool, "@fake1")[1]["telegram_id"] == 2
+    assert asyncio.run(fake_redis.hget(LOOKUP_KEY, "x:fake1")) == "2"
+    assert _find(pool, "@fake1")[1]["telegram_id"] == 2
+    assert (_counter("lookup.db_hit"), _counter("lookup.redis_hit")) == (db_hits + 1, redis_hits + 1)
+
+
+def test_a_stale_index_entry_is_dropped_and_repaired(fake_redis):
+    pool = FakePool.seeded(users=2, events=0)
+    # Member 1 used to be @fake1, who has since moved to member 2
+    asyncio.run(index_handle(1, "x", "@fake1"))
+
+    assert _find(pool, "@fake1", platform="x")[1]["telegram_id"] == 2
+    assert asyncio.run(fake_redis.hget(LOOKUP_KEY, "x:fake1")) == "2"
+
+
+def test_phone_numbers_are_told_apart_from_handles():
+    assert looks_like_phone("+234 810 000 0001")
+    assert not looks_like_phone("@2348100000001")
+    assert not looks_like_phone("nelius2024")
+    assert not looks_like_phone("12345")
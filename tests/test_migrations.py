@@ -0,0 +1,95 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import asyncpg
+
+from bot import migrations
+from bot.migrations import LATEST_VERSION, MIGRATIONS, migrate
+
+
+class MigrationConnection:
+    """Just the raw SQL migrate() sends; records every statement in order."""
+
+    def __init__(self, applied=None):
+        self.applied = applied  # None: schema_migrations doesn't exist yet
+        self.statements = []
+
+    async def fetchval(self, sql, *args):
+        self.statements.append(sql)
+        if "pg_try_advisory_lock" in sql:
+            return True
+        if self.applied is None:
+            raise asyncpg.exceptions.UndefinedTableError('relation "schema_migrations" does not exist')
+        return max(self.applied, default=0)
+
+    async def fetch(self, sql, *args):
+        return [{"version": version} for version in sorted(self.applied)]
+
+    async def execute(self, sql, *args, timeout=None):
+        self.statements.append(sql)
+        if "CREATE TABLE IF NOT EXISTS schema_migrations" in sql and self.applied is None:
+            self.applied = set()
+        elif sql.startswith("INSERT INTO schema_migrations"):
+            self.applied.add(args[0])
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+
+class MigrationPool:
+    def __init__(self, conn):
+        self.conn = conn
+        self.expired = 0
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.conn
+
+    async def expire_connections(self):
+        self.expired += 1
+
+
+def _migrated(conn):
+    return [sql for sql in conn.statements if any(sql == m[2] for m in MIGRATIONS)]
+
+
+def test_migrations_are_numbered_in_order():
+    versions = [version for version, _, _ in MIGRATIONS]
+    assert versions == list(range(1, LATEST_VERSION + 1))
+
+
+def test_fresh_database_gets_every_migration_in_order():
+    conn = MigrationConnection()
+    pool = MigrationPool(conn)
+    assert asyncio.run(migrate(pool)) is True
+    assert _migrated(conn) == [sql for _, _, sql in MIGRATIONS]
+    assert conn.applied == set(range(1, LATEST_VERSION + 1))
+    # Pooled connections prepared against the old schema are replaced
+    assert pool.expired == 1
+
+
+def test_only_missing_migrations_run():
+    conn = MigrationConnection(applied=set(range(1, 6)))
+    assert asyncio.run(migrate(MigrationPool(conn))) is True
+    assert _migrated(conn) == [sql for version, _, sql in MIGRATIONS if version > 5]
+
+
+def test_current_schema_takes_the_fast_path():
+    conn = MigrationConnection(applied=set(range(1, LATEST_VERSION + 1)))
+    pool = MigrationPool(conn)
+    assert asyncio.run(migrate(pool)) is False
+    # One read: no lock, no DDL, connections kept
+    assert conn.statements == ["SELECT COALESCE(MAX(version), 0) FROM schema_migrations"]
+    assert pool.expired == 0
+
+
+def test_migrations_another_replica_applied_under_the_lock_are_skipped(monkeypatch):
+    conn = MigrationConnection(applied=set(range(1, LATEST_VERSION)))
+
+    async def other_replica_finished(conn):
+        conn.applied.add(LATEST_VERSION)
+
+    monkeypatch.setattr(migrations, "_lock", other_replica_finished)
+    assert asyncio.run(migrate(MigrationPool(conn))) is True
+    assert _migrated(conn) == []
@@ -0,0 +1,58 @@
+import asyncio
+from types import SimpleNamespace
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import BadRequest
+
+from bot import outbound
+from bot.redis_client import RedisUnavailable
+
+KEYBOARD = InlineKeyboardMarkup([[InlineKeyboardButton("Back", callback_data="events_list")]])
+
+
+class FakeQuery:
+    """Just enough of a CallbackQuery for edit_message; counts Bot API edits."""
+
+    def __init__(self, message_id=1, not_modified=False):
+        self.inline_message_id = None
+        self.message = SimpleNamespace(chat=SimpleNamespace(id=42), message_id=message_id)
+        self.not_modified = not_modified
+        self.edits = 0
+
+    async def edit_message_text(self, text, **kwargs):
+        self.edits += 1
+        if self.not_modified:
+            raise BadRequest("Message is not modified: specified new message content is the same")
+
+
+def _edit(query, text):
+    return asyncio.run(outbound.edit_message(query, text, reply_markup=KEYBOARD))
+
+
+def test_identical_edit_is_skipped_even_from_another_process():
+    # Two query objects for one message stand in for two replicas: the only shared state is Redis
+    first, second = FakeQuery(), FakeQuery()
+    assert _edit(first, "🎉 Events") is True
+    assert _edit(second, "🎉 Events") is False
+    assert second.edits == 0
+
+
+def test_changed_content_or_another_message_is_edited():
+    assert _edit(FakeQuery(), "🎉 Events") is True
+    changed = FakeQuery()
+    assert _edit(changed, "🎉 Events (2)") is True
+    other = FakeQuery(message_id=2)
+    assert _edit(other, "🎉 Events") is True
+    assert changed.edits == other.edits == 1
+
+
+def test_without_redis_the_edit_is_sent_and_not_modified_is_swallowed(monkeypatch, fake_redis):
+    async def unavailable(*args, **kwargs):
+        raise RedisUnavailable("Redis circuit is open")
+
+    monkeypatch.setattr(fake_redis, "get", unavailable)
+    monkeypatch.setattr(fake_redis, "setex", unavailable)
+    query = FakeQuery(not_modified=True)
+    assert _edit(query, "🎉 Events") is True
+    assert _edit(query, "🎉 Events") is True
+    assert query.edits == 2
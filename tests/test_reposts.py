@@ -0,0 +1,176 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from bot import engagement, repost_providers, reposts
+from bot.fakes import FakePool
+from bot.repost_providers import StubProvider, create_provider
+from bot.nelius_dev import set_bot_commands
+from bot.rendering import render_event_detail
+from bot.variables import REPOSTS_UNAVAILABLE_MSG
+from config.settings import REPOST_POINTS, REPOST_PUBLICITY_BOOST
+
+EVENT_POST = "https://x.com/nelius/status/1"
+EVENT_REEL = "https://instagram.com/p/event-reel"
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent.append((chat_id, text))
+
+
+class FakeMessage:
+    def __init__(self):
+        self.replies = []
+
+    async def reply_text(self, text, **kwargs):
+        self.replies.append(text)
+
+
+def _submission(url, handle="@fake0", links=None):
+    return {"id": 1, "telegram_id": 1, "event_id": 1, "platform": "x", "url": url, "handle": handle,
+            "event_links": links or {"x": EVENT_POST}}
+
+
+def _verify(provider, submission):
+    return asyncio.run(provider.verify(submission))
+
+
+# --- provider checks ---
+
+def test_post_by_the_member_sharing_the_event_post_is_verified():
+    url = "https://x.com/fake0/status/500"
+    # Links are compared normalized: twitter.com, ?s=20 and trailing slashes don't matter
+    provider = StubProvider(posts={url: {"author": "@Fake0", "links": ["https://twitter.com/nelius/status/1/?s=20"]}})
+    assert _verify(provider, _submission(url)) == (True, None)
+
+
+def test_post_that_doesnt_share_the_event_post_is_rejected():
+    url = "https://x.com/fake0/status/501"
+    provider = StubProvider(posts={url: {"author": "@fake0", "links": ["https://x.com/someone/status/9"]}})
+    assert _verify(provider, _submission(url)) == (False, "That post doesn't share the event's post.")
+
+
+def test_post_from_another_account_is_rejected():
+    # Instagram URLs carry no author, so only the provider can catch this
+    url = "https://instagram.com/p/abc"
+    provider = StubProvider(posts={url: {"author": "@someone_else", "links": [EVENT_REEL]}})
+    submission = {**_submission(url, handle="@fake0", links={"instagram": EVENT_REEL}), "platform": "instagram"}
+    assert _verify(provider, submission) == (False, "That post isn't from your account.")
+
+
+def test_stub_rejects_urls_it_doesnt_know_by_default():
+    assert _verify(StubProvider(), _submission("https://x.com/fake0/status/502")) == \
+        (False, "We couldn't find this repost.")
+
+
+def test_dev_stub_approves_unknown_urls_but_still_needs_a_handle():
+    provider = StubProvider(approve_unknown=True)
+    assert _verify(provider, _submission("https://x.com/fake0/status/503"))[0] is True
+    assert _verify(provider, _submission("https://x.com/fake0/status/503", handle=None))[0] is False
+
+
+# --- startup ---
+
+@pytest.mark.parametrize("name", ["", "stub", "carrier-pigeon"])
+def test_no_usable_provider_means_no_provider(monkeypatch, name):
+    monkeypatch.setattr(repost_providers, "DEV_MODE", False)
+    assert create_provider(name) is None
+
+
+def test_stub_only_in_dev_mode(monkeypatch):
+    monkeypatch.setattr(repost_providers, "DEV_MODE", True)
+    provider = create_provider("stub")
+    assert isinstance(provider, StubProvider) and provider.approve_unknown
+
+
+def test_booting_without_a_provider_turns_reposts_off(monkeypatch):
+    monkeypatch.setattr(repost_providers, "DEV_MODE", False)
+    monkeypatch.setattr(reposts, "REPOST_PROVIDER", "")
+    pool = FakePool.seeded(users=1, events=1)
+    app = SimpleNamespace(bot_data={'db_pool': pool}, bot=FakeBot())
+    message = FakeMessage()
+
+    async def main():
+        await reposts.start_repost_pipeline(app)
+        update = SimpleNamespace(message=message, effective_user=SimpleNamespace(id=1))
+        await reposts.repost(update, SimpleNamespace(args=["1", "https://x.com/fake0/status/500"],
+                                                     bot_data=app.bot_data))
+        # Nothing was started, so the shutdown flush has nothing to do
+        await reposts.stop_repost_pipeline()
+
+    asyncio.run(main())
+    assert not reposts.reposts_enabled()
+    assert message.replies == [REPOSTS_UNAVAILABLE_MSG]
+    assert pool.db.reposts == {}
+
+
+def test_repost_is_not_advertised_without_a_provider():
+    commands = []
+
+    async def set_my_commands(listed, scope=None):
+        commands.append([c.command for c in listed])
+
+    app = SimpleNamespace(bot=SimpleNamespace(set_my_commands=set_my_commands))
+    asyncio.run(set_bot_commands(app))
+    assert commands and all("repost" not in listed for listed in commands)
+
+    msg, _ = render_event_detail("Launch", 3, {"x": EVENT_POST})
+    assert "/repost" not in msg
+
+
+# --- /repost -> verify -> credit_reposts ---
+
+def test_submissions_are_verified_then_credited_or_rejected_in_one_batch():
+    pool = FakePool.seeded(users=3, events=1)
+    pool.db.events[1]["links"]["instagram"] = EVENT_REEL
+    pool.db.users[3]["handles"]["instagram"] = "@fake2"
+    good, off_topic, impostor = ("https://x.com/fake0/status/500", "https://x.com/fake1/status/600",
+                                 "https://instagram.com/p/abc")
+    provider = StubProvider(posts={
+        good: {"author": "@fake0", "links": [EVENT_POST]},
+        off_topic: {"author": "@fake1", "links": ["https://x.com/someone/status/9"]},
+        impostor: {"author": "@not_fake2", "links": [EVENT_REEL]},
+    })
+    bot = FakeBot()
+    app = SimpleNamespace(bot_data={'db_pool': pool}, bot=bot)
+    points_before = {uid: pool.db.users[uid]["points"] for uid in (1, 2, 3)}
+    score_before = pool.db.events[1]["publicity_score"]
+
+    async def main():
+        await reposts.start_repost_pipeline(app, provider)
+        replies = []
+        for telegram_id, url in ((1, good), (2, off_topic), (3, impostor), (1, good)):
+            message = FakeMessage()
+            update = SimpleNamespace(message=message, effective_user=SimpleNamespace(id=telegram_id))
+            await reposts.repost(update, SimpleNamespace(args=["1", url], bot_data=app.bot_data))
+            replies.append(message.replies[-1])
+        await reposts._queue.join()
+        # Shutdown flush: applies the batch
+        await reposts.stop_repost_pipeline()
+        # Submissions leave nothing behind for the engagement fold to score again
+        await engagement.fold_engagement(pool)
+        return replies
+
+    replies = asyncio.run(main())
+
+    # The same URL again is caught by the unique index, not verified twice
+    assert "already submitted" in replies[3]
+    assert provider.calls == 3
+
+    statuses = {row["url"]: (row["status"], row["reason"]) for row in pool.db.reposts.values()}
+    assert statuses[good] == ("verified", None)
+    assert statuses[off_topic] == ("rejected", "That post doesn't share the event's post.")
+    assert statuses[impostor] == ("rejected", "That post isn't from your account.")
+
+    assert pool.db.users[1]["points"] == points_before[1] + REPOST_POINTS
+    assert pool.db.users[2]["points"] == points_before[2]
+    assert pool.db.users[3]["points"] == points_before[3]
+    assert [row["telegram_id"] for row in pool.db.ledger] == [1]
+    # Publicity only from the one verified repost, rejected ones add nothing
+    assert pool.db.events[1]["publicity_score"] == score_before + REPOST_PUBLICITY_BOOST
+    assert sorted(chat_id for chat_id, _ in bot.sent) == [1, 2, 3]
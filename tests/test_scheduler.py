@@ -0,0 +1,92 @@
+import asyncio
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from bot import metrics, scheduler
+from bot.lanes import current_lane, BACKGROUND
+from bot.scheduler import LOCK_PREFIX, ScheduledJob
+
+
+def _job(name, func, interval=60.0, **kwargs):
+    runs = []
+
+    async def wrapped(app):
+        runs.append(current_lane.get())
+        await func(app)
+
+    return ScheduledJob(name, interval, wrapped, **kwargs), runs
+
+
+async def _nothing(app):
+    pass
+
+
+def test_only_one_replica_runs_each_period(fake_redis):
+    # Two replicas' timers for the same job: the only shared state is Redis
+    first, first_runs = _job("warm_test", _nothing)
+    second, second_runs = _job("warm_test", _nothing)
+    skipped = metrics.counters.get("job.warm_test.skipped", 0)
+
+    assert asyncio.run(first.run_once(None)) is True
+    assert asyncio.run(second.run_once(None)) is False
+    assert (len(first_runs), len(second_runs)) == (1, 0)
+    assert metrics.counters["job.warm_test.skipped"] == skipped + 1
+    assert first.last_success is not None and second.last_success is None
+
+
+def test_the_claim_expires_before_the_next_period(fake_redis):
+    job, runs = _job("short_test", _nothing, interval=0.2, jitter=0.1)
+    assert asyncio.run(job.run_once(None)) is True
+    # 0.2s * (1 - jitter) * 0.9: gone before the earliest next timer
+    assert asyncio.run(fake_redis.exists(f"{LOCK_PREFIX}short_test")) == 1
+    asyncio.run(asyncio.sleep(0.17))
+    assert asyncio.run(job.run_once(None)) is True
+    assert len(runs) == 2
+
+
+def test_a_run_over_budget_is_cancelled_and_counted(fake_redis):
+    cancelled = []
+
+    async def slow(app):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    job, _ = _job("slow_test", slow, budget=0.05)
+    timeouts = metrics.counters.get("job.slow_test.timeouts", 0)
+    assert asyncio.run(job.run_once(None)) is False
+    assert cancelled == [True]
+    assert metrics.counters["job.slow_test.timeouts"] == timeouts + 1
+    assert job.last_success is None
+
+
+def test_a_failing_job_is_counted_and_the_loop_keeps_going(monkeypatch, fake_redis):
+    async def broken(app):
+        raise ValueError("bad row")
+
+    job, runs = _job("broken_test", broken, interval=0.01, run_at_start=True)
+    monkeypatch.setattr(scheduler, "jobs", [job])
+    errors = metrics.counters.get("job.broken_test.errors", 0)
+
+    async def main():
+        scheduler.start_scheduler(None)
+        await asyncio.sleep(0.1)
+        # Returns even when the cancel lands as a run finishes
+        await asyncio.wait_for(scheduler.stop_scheduler(), timeout=1)
+
+    asyncio.run(main())
+    assert metrics.counters["job.broken_test.errors"] - errors == len(runs) >= 2
+    # Jobs take their connections from the background slice
+    assert set(runs) == {BACKGROUND}
+
+
+def test_without_redis_nobody_runs_the_job(monkeypatch, fake_redis):
+    async def down(*args, **kwargs):
+        raise RedisConnectionError("Redis is down")
+
+    monkeypatch.setattr(fake_redis, "set", down)
+    job, runs = _job("offline_test", _nothing)
+    assert asyncio.run(job.run_once(None)) is False
+    assert runs == []
@@ -0,0 +1,87 @@
+import asyncio
+import itertools
+
+import pytest
+
+from bot import throttle
+from bot.throttle import should_throttle, throttle_command
+from tests.conftest import make_callback, make_message
+
+_update_ids = itertools.count(20_000)
+# Not in DEV_IDS: dev accounts are never throttled
+_user_ids = itertools.count(500)
+
+
+@pytest.fixture(autouse=True)
+def clean_local_caches():
+    throttle.blocked_until.clear()
+    throttle.last_taps.clear()
+    yield
+    throttle.blocked_until.clear()
+    throttle.last_taps.clear()
+
+
+def _decisions(updates):
+    async def main():
+        return [await should_throttle(update) for update in updates]
+
+    return asyncio.run(main())
+
+
+def test_budget_allows_up_to_the_limit_then_blocks(monkeypatch):
+    monkeypatch.setitem(throttle.RATE_LIMITS, "events", (3, 60.0))
+    user = next(_user_ids)
+    updates = [make_message(next(_update_ids), user, f"/events {n}") for n in range(5)]
+    assert _decisions(updates) == [False, False, False, True, True]
+
+
+def test_blocked_user_is_dropped_locally_without_a_redis_call(monkeypatch, fake_redis):
+    monkeypatch.setitem(throttle.RATE_LIMITS, "events", (1, 60.0))
+    user = next(_user_ids)
+    assert _decisions([make_message(next(_update_ids), user, "/events a"),
+                       make_message(next(_update_ids), user, "/events b")]) == [False, True]
+    assert (user, "events") in throttle.blocked_until
+
+    calls = []
+    monkeypatch.setattr(throttle, "_gcra", lambda: calls.append(1))
+    assert _decisions([make_message(next(_update_ids), user, "/events c")]) == [True]
+    assert calls == []
+
+
+def test_budgets_are_per_user(monkeypatch):
+    monkeypatch.setitem(throttle.RATE_LIMITS, "events", (1, 60.0))
+    first, second = next(_user_ids), next(_user_ids)
+    assert _decisions([make_message(next(_update_ids), first, "/events"),
+                       make_message(next(_update_ids), second, "/events")]) == [False, False]
+
+
+def test_menu_buttons_spend_their_command_budget():
+    user = next(_user_ids)
+    assert throttle_command(make_message(next(_update_ids), user, "🎉 Events")) == "events"
+    assert throttle_command(make_callback(next(_update_ids), user, "event_7")) == "event_detail"
+    assert throttle_command(make_message(next(_update_ids), user, "hello")) == "default"
+
+
+def test_repeated_callback_tap_is_coalesced():
+    user = next(_user_ids)
+    taps = [make_callback(next(_update_ids), user, "event_7") for _ in range(3)]
+    assert _decisions(taps) == [False, True, True]
+
+
+def test_repeated_menu_button_tap_is_coalesced():
+    user = next(_user_ids)
+    taps = [make_message(next(_update_ids), user, "🏆 My Points") for _ in range(2)]
+    assert _decisions(taps) == [False, True]
+
+
+def test_same_tap_from_another_user_is_not_coalesced():
+    taps = [make_callback(next(_update_ids), next(_user_ids), "event_7") for _ in range(2)]
+    assert _decisions(taps) == [False, False]
+
+
+def test_repeated_conversation_reply_is_not_coalesced():
+    # Onboarding: "skip" the phone question, then "skip" the handles question
+    user = next(_user_ids)
+    replies = [make_message(next(_update_ids), user, "skip") for _ in range(3)]
+    assert _decisions(replies) == [False, False, False]
+    assert throttle.last_taps == {}
@@ -0,0 +1,30 @@
+import asyncio
+import json
+import threading
+
+from bot import tracing
+
+
+def test_slow_traces_are_written_off_the_event_loop(monkeypatch, tmp_path):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing, "TRACE_LOG_PATH", str(path))
+    writer_threads = []
+    real_append = tracing._append_lines
+
+    def append(lines):
+        writer_threads.append(threading.get_ident())
+        real_append(lines)
+
+    monkeypatch.setattr(tracing, "_append_lines", append)
+
+    async def main():
+        for n in range(3):
+            tracing.write_trace({"trace_id": str(n)})
+        # Nothing written inline: the handler that finished the trace never waits on the disk
+        assert writer_threads == []
+        await tracing.flush_traces()
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(main())
+    assert writer_threads and loop_thread not in writer_threads
+    assert [json.loads(line)["trace_id"] for line in path.read_text().splitlines()] == ["0", "1", "2"]
@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+import pytest
+
+from bot import metrics, watchdog
+from bot.watchdog import BlockingCallError
+
+
+def test_blocking_call_on_the_loop_thread_raises():
+    # conftest turns strict mode on for every test
+    async def main():
+        time.sleep(0)
+
+    with pytest.raises(BlockingCallError, match="time.sleep"):
+        asyncio.run(main())
+
+
+def test_the_same_call_is_allowed_off_the_loop():
+    async def main():
+        await asyncio.to_thread(time.sleep, 0)
+
+    asyncio.run(main())
+    time.sleep(0)
+
+
+def test_disabling_strict_mode_restores_the_originals():
+    guarded = time.sleep
+    watchdog.disable_strict_mode()
+    try:
+        assert time.sleep is not guarded and not hasattr(time.sleep, "__wrapped__")
+    finally:
+        watchdog.enable_strict_mode()
+    assert time.sleep.__wrapped__ is not None
+
+
+def test_a_stalled_loop_is_reported_once_with_its_stack(monkeypatch, capsys):
+    monkeypatch.setattr(watchdog, "_interval", 0.01)
+    monkeypatch.setattr(watchdog, "_threshold", 0.05)
+    blocked_before = metrics.counters.get("loop.blocked", 0)
+    lag = metrics.histograms.setdefault("loop.lag", metrics.Histogram())
+    lag_before = lag.count
+
+    def hog_the_loop(seconds):
+        # CPU-bound on purpose: time.sleep would be caught by strict mode
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            pass
+
+    async def main():
+        watchdog.start_watchdog()
+        try:
+            await asyncio.sleep(0.05)
+            hog_the_loop(0.2)
+            await asyncio.sleep(0.05)
+        finally:
+            await watchdog.stop_watchdog()
+
+    asyncio.run(main())
+    output = capsys.readouterr().out
+    assert output.count("🐢 Event loop blocked") == 1
+    assert "hog_the_loop" in output
+    assert metrics.counters["loop.blocked"] == blocked_before + 1
+    # The tick that was held up records how late it ran
+    assert lag.count > lag_before
+    assert max(lag.samples) >= 0.1
@@ -0,0 +1,39 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+from telegram import Bot
+
+from bot.webhook import build_webhook_app
+
+
+def _post(body: bytes):
+    app = SimpleNamespace(update_queue=asyncio.Queue(), bot=Bot("123:test"))
+
+    async def main():
+        async with TestClient(TestServer(build_webhook_app(app, "hook"))) as client:
+            response = await client.post("/hook", data=body, headers={"Content-Type": "application/json"})
+            return response.status
+
+    return asyncio.run(main()), app.update_queue
+
+
+def test_an_update_is_queued():
+    status, queue = _post(json.dumps({"update_id": 1}).encode())
+    assert status == 200
+    assert queue.get_nowait().update_id == 1
+
+
+@pytest.mark.parametrize("body", [
+    b"{not json",
+    b"[1, 2]",
+    b'"update"',
+    json.dumps({"message": {"text": "no update_id"}}).encode(),
+    json.dumps({"update_id": 2, "message": "not a message"}).encode(),
+])
+def test_a_body_that_isnt_an_update_is_a_bad_request(body):
+    status, queue = _post(body)
+    assert status == 400
+    assert queue.empty()